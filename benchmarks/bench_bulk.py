@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark disabling many jobs one by one against one bulk request.
+
+Populates --jobs jobs and disables --select of them, in-process through
+the WSGI app:
+
+    per_job     - one POST /api/job/<id>/toggle per job (a transaction each)
+    bulk        - POST /api/jobs/bulk-disable in batches of --batch jobs
+                  (a transaction per batch)
+
+Usage:
+    python benchmarks/bench_bulk.py [--jobs 2000] [--select 500] [--batch 100]
+"""
+import argparse
+import json
+import time
+
+from common import create_jobs, run, use_temp_db, wsgi_request
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import webui
+
+
+def enable_all():
+    with database.get_db() as conn:
+        conn.execute("UPDATE jobs SET active = 1")
+        conn.commit()
+
+
+def per_job(job_ids):
+    start = time.perf_counter()
+    for job_id in job_ids:
+        status, _, _ = wsgi_request(webui.app, 'POST', f'/api/job/{job_id}/toggle')
+        assert status == 200
+    return (time.perf_counter() - start) * 1000
+
+
+def bulk(job_ids, batch):
+    start = time.perf_counter()
+    for i in range(0, len(job_ids), batch):
+        status, _, _ = wsgi_request(webui.app, 'POST', '/api/jobs/bulk-disable', body={'job_ids': job_ids[i:i + batch]})
+        assert status == 200
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-job toggles against bulk requests')
+    parser.add_argument('--jobs', type=int, default=2000, help='Jobs in the database')
+    parser.add_argument('--select', type=int, default=500, help='Jobs to disable')
+    parser.add_argument('--batch', type=int, default=100, help='Jobs per bulk request')
+    args = parser.parse_args()
+
+    create_jobs(args.jobs)
+    job_ids = list(range(1, args.select + 1))
+
+    per_job_ms = per_job(job_ids)
+    enable_all()
+    bulk_ms = bulk(job_ids, args.batch)
+
+    print(json.dumps({
+        'benchmark': 'bulk',
+        'jobs': args.jobs,
+        'selected': args.select,
+        'batch': args.batch,
+        'results': {
+            'per_job_ms': round(per_job_ms, 1),
+            'bulk_ms': round(bulk_ms, 1),
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
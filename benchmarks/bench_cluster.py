@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark spreading jobs over clustered scheduler nodes.
+
+Populates --jobs due jobs and registers --nodes scheduler nodes, then:
+
+    tick        - every node runs one scheduler tick (due check and claims)
+                  for the same minute; reports the time per node, how many
+                  jobs each node claimed and how many were started twice
+    node_loss   - one node's lease runs out; reports how many jobs moved
+                  with the consistent hash ring, compared to placing jobs
+                  by job ID modulo the number of nodes
+
+Usage:
+    python benchmarks/bench_cluster.py [--jobs 2000] [--nodes 4]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import create_jobs, run, use_temp_db
+
+# The database path and cluster mode must be set before the app modules are imported
+use_temp_db()
+os.environ['SCHEDULER_CLUSTER'] = '1'
+
+import database
+import scheduler
+
+
+def populate(num_jobs, node_ids):
+    create_jobs(num_jobs)
+    for node_id in node_ids:
+        database.register_scheduler_node(node_id, 'bench', os.getpid())
+
+
+def tick(node_ids, minute):
+    """One tick on every node; returns ({node: claimed job IDs}, [ms per node])"""
+    claimed = {}
+    samples = []
+    for node_id in node_ids:
+        scheduler.NODE_ID = node_id
+        start = time.perf_counter()
+        jobs = scheduler.claim_due_jobs(scheduler.get_jobs_to_run(minute), minute, scheduler.get_membership())
+        samples.append((time.perf_counter() - start) * 1000)
+        claimed[node_id] = [job['id'] for job in jobs]
+    return claimed, samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark job placement and claiming across scheduler nodes')
+    parser.add_argument('--jobs', type=int, default=2000, help='Due jobs')
+    parser.add_argument('--nodes', type=int, default=4, help='Scheduler nodes')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    node_ids = [f"node-{i}" for i in range(args.nodes)]
+    populate(args.jobs, node_ids)
+    minute = datetime.now(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+
+    claimed, samples = tick(node_ids, minute)
+    all_claimed = [job_id for job_ids in claimed.values() for job_id in job_ids]
+    per_node = [len(job_ids) for job_ids in claimed.values()]
+
+    # The last node stops heartbeating and its lease runs out
+    with database.get_db() as conn:
+        expired = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=database.SCHEDULER_LEASE_SECONDS + 1)
+        conn.execute("UPDATE scheduler_nodes SET heartbeat_at = ? WHERE node_id = ?", (expired, node_ids[-1]))
+        conn.commit()
+    survivors = node_ids[:-1]
+    after, _ = tick(survivors, minute + timedelta(minutes=1))
+    owner_before = {job_id: node_id for node_id, job_ids in claimed.items() for job_id in job_ids}
+    owner_after = {job_id: node_id for node_id, job_ids in after.items() for job_id in job_ids}
+    moved_ring = sum(1 for job_id, node_id in owner_after.items() if owner_before.get(job_id) != node_id)
+    moved_modulo = sum(1 for job_id in range(1, args.jobs + 1) if job_id % args.nodes != job_id % len(survivors))
+
+    print(json.dumps({
+        'benchmark': 'cluster',
+        'jobs': args.jobs,
+        'nodes': args.nodes,
+        'results': {
+            'tick': {
+                'ms_per_node': round(sum(samples) / len(samples), 1),
+                'claimed_min': min(per_node),
+                'claimed_max': max(per_node),
+                'started_twice': len(all_claimed) - len(set(all_claimed)),
+                'unclaimed': args.jobs - len(set(all_claimed)),
+            },
+            'node_loss': {
+                'picked_up': len(owner_after),
+                'moved_ring': moved_ring,
+                'moved_modulo': moved_modulo,
+            },
+        },
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark dashboard (`/`) and `/api/jobs` request latency at 1k and 10k jobs.
+
+Each size gets a fresh database with a run history per job. For every
+endpoint three cases are measured in-process through the WSGI app (no
+network):
+
+    legacy  - the previous N+1 queries (two job_runs queries per job)
+    full    - the single-query job list, full 200 response
+    304     - repeat poll with If-None-Match (only the change counter is read)
+
+Usage:
+    python benchmarks/bench_dashboard.py [--sizes 1000,10000] [--runs-per-job 20] [--requests 20]
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from common import measure, reset_database, run, use_temp_db, wsgi_get
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import webui
+
+
+def populate(num_jobs, runs_per_job):
+    """Create a fresh database with num_jobs jobs and runs_per_job finished runs each"""
+    reset_database()
+
+    start = datetime(2026, 1, 1)
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active) VALUES (?, ?, 'every', 5, 1)",
+            [(f"job-{i}", "true") for i in range(num_jobs)]
+        )
+        cursor.executemany(
+            "INSERT INTO job_runs (job_id, start_at, finish_at, duration, result) VALUES (?, ?, ?, 3, 'success')",
+            [(job_id, start + timedelta(minutes=5 * n), start + timedelta(minutes=5 * n, seconds=3))
+             for job_id in range(1, num_jobs + 1) for n in range(runs_per_job)]
+        )
+        conn.commit()
+
+
+def legacy_job_list():
+    """The job list as built before: one query for jobs plus two per job"""
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM jobs ORDER BY id")
+        jobs = [dict(row) for row in cursor.fetchall()]
+        for job in jobs:
+            cursor.execute("""
+                SELECT id FROM job_runs
+                WHERE job_id = ? AND start_at IS NOT NULL AND finish_at IS NULL
+                LIMIT 1
+            """, (job['id'],))
+            if cursor.fetchone():
+                job['last_duration'] = 'Running'
+            else:
+                cursor.execute("SELECT duration FROM job_runs WHERE job_id = ? ORDER BY start_at DESC LIMIT 1", (job['id'],))
+                last_run = cursor.fetchone()
+                job['last_duration'] = webui.format_duration(last_run['duration']) if last_run else '-'
+    graph = database.get_dependency_graph()
+    for job in jobs:
+        job['schedule_text'] = webui.get_schedule_text(job)
+        job['depends_on'] = graph.get(job['id'], [])
+    return json.dumps(jobs)
+
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard and /api/jobs latency')
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated job counts')
+    parser.add_argument('--runs-per-job', type=int, default=20, help='Run history per job')
+    parser.add_argument('--requests', type=int, default=20, help='Requests per case')
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        populate(size, args.runs_per_job)
+        size_results = {'legacy_job_list': measure(legacy_job_list, args.requests)}
+
+        for name, path in (('dashboard', '/'), ('api_jobs', '/api/jobs')):
+            status, headers, body = wsgi_get(webui.app, path)
+            assert status == 200, status
+            etag = headers['etag']
+            size_results[name] = {
+                'full': measure(lambda: wsgi_get(webui.app, path), args.requests),
+                '304': measure(lambda: wsgi_get(webui.app, path, {'If-None-Match': etag}), args.requests),
+                'body_bytes': len(body),
+            }
+        results[str(size)] = size_results
+
+    print(json.dumps({
+        'benchmark': 'dashboard',
+        'runs_per_job': args.runs_per_job,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark Python job start latency: cold `python script.py` vs the warm forkserver.
+
+A throwaway script imports the given modules and exits. The cold path pays
+interpreter startup plus the imports on every run; the forkserver path only
+pays fork() because the modules are preloaded once.
+
+Usage:
+    python benchmarks/bench_forkserver.py [--runs 50] [--imports json,decimal,http.client]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import summarize
+import forkserver
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold vs forkserver Python job start latency')
+    parser.add_argument('--runs', type=int, default=50, help='Runs per mode')
+    parser.add_argument('--imports', default='json,decimal,email.mime.text,http.client,urllib.request,logging.handlers',
+                        help='Comma-separated modules the job script imports (and the forkserver preloads)')
+    args = parser.parse_args()
+
+    if not forkserver.is_supported():
+        print(json.dumps({'benchmark': 'forkserver', 'error': 'forkserver not supported on this platform'}))
+        return
+
+    modules = [m.strip() for m in args.imports.split(',') if m.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, 'job.py')
+        with open(script, 'w') as f:
+            for module in modules:
+                f.write(f"import {module}\n")
+            f.write("print('done')\n")
+
+        cold = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, script], stdout=subprocess.DEVNULL, check=True)
+            cold.append((time.perf_counter() - start) * 1000)
+
+        server = forkserver.ForkServer(modules)
+        # Start the server outside the timed section
+        server.spawn({'argv': [script], 'module': False}).wait()
+
+        warm = []
+        try:
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                process = server.spawn({'argv': [script], 'module': False})
+                process.stdout.read()
+                process.stdout.close()
+                process.wait()
+                warm.append((time.perf_counter() - start) * 1000)
+        finally:
+            server.stop()
+
+    print(json.dumps({
+        'benchmark': 'forkserver',
+        'imports': modules,
+        'results': {'cold': summarize(cold), 'forkserver': summarize(warm)},
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Load test: concurrent request throughput of the web UI per HTTP server.
+
+Starts the web UI in a subprocess with each server and hits it with
+--clients concurrent keep-alive clients for --duration seconds, in two
+scenarios:
+
+    api          - /api/job/<id> and /api/jobs
+    log_streams  - the same while --streams live log streams (SSE) are open
+
+Servers:
+
+    wsgiref  - Bottle's single-threaded development server (the previous setup)
+    threaded - serving.py's standard library server
+    waitress - serving.py with waitress (skipped if it isn't installed)
+
+Requests that take longer than --timeout count as errors - on a
+single-threaded server every other request waits for an open log stream.
+
+Usage:
+    python benchmarks/bench_http_concurrency.py [--clients 16] [--duration 5] [--streams 4] [--jobs 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from common import create_jobs, free_port, run, summarize, use_temp_db, wait_for_port
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import serving
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVER_CODE = """
+import sys, bottle, serving, webui
+from compression import GzipMiddleware
+mode, port = sys.argv[1], int(sys.argv[2])
+app = GzipMiddleware(webui.app)
+if mode == 'wsgiref':
+    bottle.run(app, host='127.0.0.1', port=port, quiet=True)
+else:
+    serving.serve(app, '127.0.0.1', port, server=mode, quiet=True)
+"""
+
+
+def populate(num_jobs):
+    """Create jobs with a short run history, plus one running run with output; return its ID"""
+    create_jobs(num_jobs)
+    run_id = database.create_job_run(1)
+    for i in range(100):
+        database.add_log_line(run_id, f"line {i}")
+    return run_id
+
+
+def start_server(mode, port, threads):
+    env = dict(os.environ, WEB_THREADS=str(threads), PYTHONPATH=REPO_DIR)
+    process = subprocess.Popen([sys.executable, '-c', SERVER_CODE, mode, str(port)], cwd=REPO_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port, process, f"{mode} server")
+    return process
+
+
+def hold_stream(url, stop):
+    """Keep a live log stream open until stop is set"""
+    try:
+        with requests.get(url, stream=True, timeout=(2, 30)) as response:
+            for _ in response.iter_lines():
+                if stop.is_set():
+                    return
+    except requests.RequestException:
+        pass
+
+
+def load(base_url, clients, duration, timeout, num_jobs):
+    """Run clients concurrent request loops for duration seconds"""
+    samples = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def client(n):
+        session = requests.Session()
+        i = n
+        while time.time() < deadline:
+            i += 1
+            path = '/api/jobs' if i % 5 == 0 else f'/api/job/{i % num_jobs + 1}'
+            start = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=timeout)
+                response.raise_for_status()
+                elapsed = (time.perf_counter() - start) * 1000
+                with lock:
+                    samples.append(elapsed)
+            except requests.RequestException:
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    result = {'requests_per_s': round(len(samples) / elapsed, 1), 'errors': errors[0]}
+    if samples:
+        result.update(summarize(samples))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the web UI HTTP servers')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per scenario')
+    parser.add_argument('--streams', type=int, default=4, help='Open log streams in the log_streams scenario')
+    parser.add_argument('--jobs', type=int, default=200, help='Jobs in the database')
+    parser.add_argument('--threads', type=int, default=serving.WEB_THREADS, help='Server worker threads')
+    parser.add_argument('--timeout', type=float, default=5, help='Client timeout per request (seconds)')
+    args = parser.parse_args()
+
+    run_id = populate(args.jobs)
+    modes = ['wsgiref', 'threaded'] + (['waitress'] if serving.waitress_available() else [])
+
+    results = {}
+    for mode in modes:
+        port = free_port()
+        process = start_server(mode, port, args.threads)
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            mode_results = {'api': load(base_url, args.clients, args.duration, args.timeout, args.jobs)}
+
+            stop = threading.Event()
+            streams = [threading.Thread(target=hold_stream, args=(f'{base_url}/api/run/{run_id}/logs/stream', stop),
+                                        daemon=True)
+                       for _ in range(args.streams)]
+            for stream in streams:
+                stream.start()
+            time.sleep(0.5)
+            mode_results['log_streams'] = load(base_url, args.clients, args.duration, args.timeout, args.jobs)
+            stop.set()
+            results[mode] = mode_results
+        finally:
+            process.kill()
+            process.wait()
+
+    print(json.dumps({
+        'benchmark': 'http_concurrency',
+        'clients': args.clients,
+        'threads': args.threads,
+        'streams': args.streams,
+        'jobs': args.jobs,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
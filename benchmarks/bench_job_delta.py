@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark keeping a copy of the job list current: full list vs. delta sync.
+
+Populates --jobs jobs, then repeatedly changes --changes of them (a run
+starting and finishing each) and fetches, in-process through the WSGI app:
+
+    full        - GET /api/jobs, the whole list after every change
+    delta       - GET /api/jobs?since=<version>, only the changed jobs
+    unchanged   - GET /api/jobs?since=<current version>, nothing changed
+
+Reports response size and latency for each.
+
+Usage:
+    python benchmarks/bench_job_delta.py [--jobs 5000] [--changes 10] [--requests 30]
+"""
+import argparse
+import json
+import time
+
+from common import create_jobs, run, summarize, use_temp_db, wsgi_get
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import webui
+
+
+def change_jobs(first_id, count):
+    for job_id in range(first_id, first_id + count):
+        run_id = database.create_job_run(job_id)
+        database.finish_job_run(run_id, 'success', 1)
+
+
+def measure(path_fn, num_jobs, changes, requests):
+    samples = []
+    sizes = []
+    for i in range(requests):
+        change_jobs(1 + (i * changes) % (num_jobs - changes), changes)
+        path = path_fn()
+        start = time.perf_counter()
+        status, _, body = wsgi_get(webui.app, path)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert status == 200, (path, status)
+        sizes.append(len(body))
+    return dict(summarize(samples), bytes=sum(sizes) // len(sizes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full job list fetches against delta sync')
+    parser.add_argument('--jobs', type=int, default=5000, help='Jobs in the database')
+    parser.add_argument('--changes', type=int, default=10, help='Jobs changed between fetches')
+    parser.add_argument('--requests', type=int, default=30, help='Fetches per case')
+    args = parser.parse_args()
+
+    create_jobs(args.jobs)
+
+    def since_last():
+        return f'/api/jobs?since={database.get_state_version() - 2 * args.changes}'
+
+    results = {
+        'full': measure(lambda: '/api/jobs', args.jobs, args.changes, args.requests),
+        'delta': measure(since_last, args.jobs, args.changes, args.requests),
+        'unchanged': measure(lambda: f'/api/jobs?since={database.get_state_version()}', args.jobs, 0, args.requests),
+    }
+
+    print(json.dumps({
+        'benchmark': 'job_delta',
+        'jobs': args.jobs,
+        'changes': args.changes,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
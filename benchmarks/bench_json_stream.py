@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of `/api/run/<id>/logs` and `/api/jobs` for growing result sizes.
+
+Each size gets a fresh database. Two cases are measured with tracemalloc,
+in-process through the WSGI app (no network). The response is consumed
+chunk by chunk, the way a server writes it to the socket:
+
+    buffered - the previous approach: rows -> list of dicts -> one json.dumps string
+    streamed - the current handlers, which encode rows as they are read
+
+Peak memory of the streamed case should stay flat as the size grows.
+
+Usage:
+    python benchmarks/bench_json_stream.py [--sizes 1000,10000] [--line-bytes 120]
+"""
+import argparse
+import io
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from wsgiref.util import setup_testing_defaults
+
+from common import reset_database, run, use_temp_db
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import webui
+
+
+def populate(size, line_bytes):
+    """Create a fresh database with size jobs and one run with size log lines"""
+    reset_database()
+
+    timestamp = datetime(2026, 1, 1)
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active) VALUES (?, ?, 'every', 5, 1)",
+            [(f"job-{i}", "true") for i in range(size)]
+        )
+        cursor.execute("INSERT INTO job_runs (job_id, start_at) VALUES (1, ?)", (timestamp,))
+        run_id = cursor.lastrowid
+        cursor.executemany(
+            "INSERT INTO run_logs (run_id, timestamp, log_line) VALUES (?, ?, ?)",
+            [(run_id, timestamp, f"{i:08d} " + 'x' * line_bytes) for i in range(size)]
+        )
+        conn.commit()
+    return run_id
+
+
+def drain(path):
+    """Request path from the web UI and consume the body chunk by chunk; return its size"""
+    path, _, query = path.partition('?')
+    environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    body = webui.app(environ, lambda status, headers, exc_info=None: None)
+    size = sum(len(chunk) for chunk in body)
+    if hasattr(body, 'close'):
+        body.close()
+    return size
+
+
+def buffered_logs(run_id, limit):
+    logs, has_more = database.get_logs_page(run_id, limit=limit)
+    return len(json.dumps({'logs': logs, 'has_more': has_more}).encode())
+
+
+def buffered_jobs():
+    jobs = database.get_job_list()
+    for job in jobs:
+        job['schedule_text'] = webui.get_schedule_text(job)
+    return len(json.dumps(jobs).encode())
+
+
+def measure(func):
+    """Run func once under tracemalloc; return peak memory and duration"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    body_bytes = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'peak_kib': round(peak / 1024, 1), 'ms': round(elapsed * 1000, 1), 'body_bytes': body_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark peak memory of streamed JSON responses')
+    parser.add_argument('--sizes', default='1000,10000', help='Comma-separated jobs / log lines per database')
+    parser.add_argument('--line-bytes', type=int, default=120, help='Length of each log line')
+    args = parser.parse_args()
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(',')]:
+        run_id = populate(size, args.line_bytes)
+        logs_path = f'/api/run/{run_id}/logs?limit={size}'
+        # Warm up imports and template/regex caches so they don't count towards the peak
+        drain(logs_path)
+        drain('/api/jobs')
+
+        results[str(size)] = {
+            'logs': {
+                'buffered': measure(lambda: buffered_logs(run_id, size)),
+                'streamed': measure(lambda: drain(logs_path)),
+            },
+            'jobs': {
+                'buffered': measure(buffered_jobs),
+                'streamed': measure(lambda: drain('/api/jobs')),
+            },
+        }
+
+    print(json.dumps({
+        'benchmark': 'json_stream',
+        'line_bytes': args.line_bytes,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
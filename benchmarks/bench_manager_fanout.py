@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark the manager's main page with many instances, some of them hanging.
+
+Starts --instances fake Cronishe instances answering /api/jobs after
+--latency seconds, of which --hanging never answer within the fetch
+timeout, and times rendering the manager's main page in-process:
+
+    serial      - fetching every instance in turn (the original behaviour)
+    cold        - first load: concurrent fetches under MANAGER_FETCH_DEADLINE
+    warm        - later loads, served from the snapshots kept by the refresher
+
+Usage:
+    python benchmarks/bench_manager_fanout.py [--instances 20] [--hanging 2] [--latency 0.2] [--jobs 50]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from bottle import template
+
+from common import summarize, wsgi_get
+
+
+def start_instance(jobs, delay):
+    """Serve a fake /api/jobs on a free port after delay seconds; return its URL"""
+    body = json.dumps([{
+        'id': i, 'name': f'job-{i}', 'path': 'true', 'schedule_text': 'Every 5 min', 'timezone': 'UTC',
+        'active': 1, 'last_run': None, 'last_run_result': None,
+    } for i in range(1, jobs + 1)]).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the manager's instance fan-out")
+    parser.add_argument('--instances', type=int, default=20, help='Configured instances')
+    parser.add_argument('--hanging', type=int, default=2, help='Instances that never answer in time')
+    parser.add_argument('--latency', type=float, default=0.2, help='Response time of the other instances (seconds)')
+    parser.add_argument('--jobs', type=int, default=50, help='Jobs per instance')
+    parser.add_argument('--requests', type=int, default=20, help='Warm page loads')
+    args = parser.parse_args()
+
+    urls = [start_instance(args.jobs, 3600 if i < args.hanging else args.latency) for i in range(args.instances)]
+    os.environ['CRONISHE_INSTANCES'] = ','.join(f'instance-{i}:{url}' for i, url in enumerate(urls))
+
+    import manager
+
+    def legacy_fetch(url):
+        try:
+            response = requests.get(f"{url}/api/jobs", timeout=manager.FETCH_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException:
+            return None
+
+    def serial():
+        instances = []
+        for instance in manager.get_instances():
+            jobs = legacy_fetch(instance['url'])
+            view = dict(instance, jobs=jobs if jobs is not None else [], error=jobs is None,
+                        index=len(instances), pending=False, age=None)
+            instances.append(template('manager_instance', instance=view))
+        return template('manager_index', sections=instances, health='', health_interval=manager.HEALTH_INTERVAL)
+
+    start = time.perf_counter()
+    serial()
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, _, body = wsgi_get(manager.app, '/')
+    cold_s = time.perf_counter() - start
+    assert status == 200
+    pending = body.count(b'data-pending="true"')
+
+    # Let the hanging instances time out, as they would have by the next page load
+    time.sleep(manager.FETCH_TIMEOUT + 0.5)
+    samples = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        wsgi_get(manager.app, '/')
+        samples.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        'benchmark': 'manager_fanout',
+        'instances': args.instances,
+        'hanging': args.hanging,
+        'latency_s': args.latency,
+        'fetch_timeout_s': manager.FETCH_TIMEOUT,
+        'fetch_deadline_s': manager.FETCH_DEADLINE,
+        'results': {
+            'serial_s': round(serial_s, 2),
+            'cold_s': round(cold_s, 2),
+            'cold_pending_sections': pending,
+            'warm': summarize(samples),
+        },
+    }, indent=2))
+    os._exit(0)  # don't wait for the hanging fetches
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark manager proxy latency with and without connection reuse.
+
+Starts a web UI instance in a subprocess and calls the manager's proxy
+endpoints in-process:
+
+    runs    - POST /proxy/runs (job run history, streamed through)
+    logs    - POST /proxy/logs (run log page, streamed through)
+    toggle  - POST /proxy/toggle (job enable/disable)
+
+"new_connection" uses module-level requests calls, opening a connection
+per proxied request as before; "pooled" uses the per-instance sessions.
+
+Usage:
+    python benchmarks/bench_proxy_latency.py [--requests 200]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import requests
+
+from common import free_port, measure, ok_request, reset_database, run, use_temp_db, wait_for_port
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+SERVER_CODE = """
+import sys, serving, webui
+from compression import GzipMiddleware
+serving.serve(GzipMiddleware(webui.app), '127.0.0.1', int(sys.argv[1]), server='threaded', quiet=True)
+"""
+
+
+def populate():
+    """One job with some run history and a run with log output; return the run ID"""
+    reset_database()
+    with database.get_db() as conn:
+        conn.execute("INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active) VALUES ('job', 'true', 'every', 5, 1)")
+        conn.commit()
+    for _ in range(20):
+        run_id = database.create_job_run(1)
+        database.finish_job_run(run_id, 'success', 1)
+    for i in range(200):
+        database.add_log_line(run_id, f"line {i}")
+    return run_id
+
+
+def start_server(port):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    process = subprocess.Popen([sys.executable, '-c', SERVER_CODE, str(port)], cwd=REPO_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port, process, "web UI")
+    return process
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark manager proxy latency with and without connection reuse')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and case')
+    args = parser.parse_args()
+
+    run_id = populate()
+    port = free_port()
+    url = f'http://127.0.0.1:{port}'
+    os.environ['CRONISHE_INSTANCES'] = f'bench:{url}'
+    process = start_server(port)
+
+    import manager
+    pooled_session = manager.get_session
+
+    cases = {
+        'runs': ('/proxy/runs', {'instance_url': url, 'job_id': 1}),
+        'logs': ('/proxy/logs', {'instance_url': url, 'run_id': run_id}),
+        'toggle': ('/proxy/toggle', {'instance_url': url, 'job_id': 1}),
+    }
+    results = {}
+    try:
+        for name, (path, body) in cases.items():
+            manager.get_session = lambda instance_url: requests
+            new_connection = measure(ok_request(manager.app, 'POST', path, body), args.requests)
+            manager.get_session = pooled_session
+            pooled = measure(ok_request(manager.app, 'POST', path, body), args.requests)
+            results[name] = {'new_connection': new_connection, 'pooled': pooled}
+    finally:
+        # Let the refetches started by toggle finish before the instance goes away
+        manager._fetch_pool.shutdown(wait=True)
+        process.kill()
+        process.wait()
+
+    print(json.dumps({
+        'benchmark': 'proxy_latency',
+        'requests': args.requests,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark page render time before and after startup precomputation.
+
+Pages are requested in-process through the WSGI app (no network):
+
+    /job/add, /job/<id>/edit - timezone list (legacy: rebuilt per request)
+    /                        - schedule text per job (legacy: recomputed per job and request)
+
+"before" swaps the legacy per-request computations back in. first_request
+is the first render of each page after a restart, without (before) and
+with (after) templates precompiled at startup.
+
+Usage:
+    python benchmarks/bench_render.py [--jobs 1000] [--requests 50]
+"""
+import argparse
+import json
+import time
+from zoneinfo import available_timezones
+
+import bottle
+
+from common import measure, ok_request, reset_database, run, use_temp_db, wsgi_get
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import serving
+import webui
+
+
+def legacy_timezone_list():
+    """The timezone list as built before, on every form render"""
+    all_timezones = sorted(available_timezones())
+    priority_zones = []
+    if 'UTC' in all_timezones:
+        priority_zones.append('UTC')
+    priority_zones.extend([tz for tz in all_timezones if tz.startswith('Pacific/') and 'Auckland' in tz or 'Chatham' in tz])
+    priority_zones.extend([tz for tz in all_timezones if tz.startswith('Australia/')])
+    priority_zones.extend([tz for tz in all_timezones if tz.startswith('America/') and any(city in tz for city in ['New_York', 'Chicago', 'Denver', 'Los_Angeles', 'Phoenix', 'Anchorage', 'Honolulu'])])
+    priority_zones.extend([tz for tz in all_timezones if tz.startswith('US/')])
+    seen = set()
+    priority_zones = [tz for tz in priority_zones if tz not in seen and not seen.add(tz)]
+    remaining_zones = [tz for tz in all_timezones if tz not in priority_zones]
+    return priority_zones + remaining_zones
+
+
+def legacy_schedule_text(job):
+    """Schedule text computed from scratch, as before"""
+    return webui._schedule_text.__wrapped__(tuple(job[field] for field in webui.SCHEDULE_FIELDS))
+
+
+def populate(num_jobs):
+    """Create num_jobs jobs with a mix of 'every' and 'at' schedules"""
+    reset_database()
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, frequency_at_hr, frequency_at_min,"
+            " frequency_at_mon, frequency_at_wed, frequency_at_fri, active) VALUES (?, 'true', ?, ?, ?, ?, 1, 1, 1, 1)",
+            [(f"job-{i}", 'every' if i % 2 else 'at', [1, 5, 15, 60, 120][i % 5], i % 24, (i * 7) % 60)
+             for i in range(num_jobs)]
+        )
+        conn.commit()
+
+
+def first_request(path, precompile):
+    """Time the first render of a page after a restart (empty template cache)"""
+    bottle.TEMPLATES.clear()
+    if precompile:
+        serving.precompile_templates(webui.TEMPLATE_DIR)
+    start = time.perf_counter()
+    wsgi_get(webui.app, path)
+    return round((time.perf_counter() - start) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page render time before and after precomputation')
+    parser.add_argument('--jobs', type=int, default=1000, help='Jobs on the dashboard')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per page and case')
+    args = parser.parse_args()
+
+    populate(args.jobs)
+    pages = {'add_job': '/job/add', 'edit_job': '/job/1/edit', 'dashboard': '/'}
+
+    current = (webui.get_timezone_list, webui.get_schedule_text)
+    results = {}
+    for name, path in pages.items():
+        webui.get_timezone_list, webui.get_schedule_text = legacy_timezone_list, legacy_schedule_text
+        before = measure(ok_request(webui.app, 'GET', path), args.requests)
+        first_before = first_request(path, precompile=False)
+        webui.get_timezone_list, webui.get_schedule_text = current
+        after = measure(ok_request(webui.app, 'GET', path), args.requests)
+        first_after = first_request(path, precompile=True)
+        results[name] = {
+            'before': before,
+            'after': after,
+            'first_request_ms': {'before': first_before, 'after': first_after},
+        }
+
+    print(json.dumps({
+        'benchmark': 'render',
+        'jobs': args.jobs,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
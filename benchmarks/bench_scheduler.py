@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark the scheduler against synthetic fleets of 1k, 10k and 100k jobs.
+
+Each size gets a fresh database with a mix of `every` jobs (1 minute to
+1 day) and `at` jobs (random times and weekdays in several timezones).
+About --due of the `every` jobs are due in the benchmarked minute; `at`
+jobs are due when their time happens to match. For every size:
+
+    due_check   - scheduler.get_jobs_to_run for one minute
+    tick        - one full scheduler tick (retries, due check, launches);
+                  the due jobs run `true` and the due set is restored
+                  between ticks. Runs that couldn't be recorded (the
+                  database was locked) show as due_jobs * ticks minus
+                  runs_recorded
+    dashboard   - `/` through the WSGI app (no network)
+    api_jobs    - `/api/jobs` through the WSGI app
+
+Then, once:
+
+    log_ingest  - --log-jobs jobs each print --log-rate lines per second for
+                  --log-seconds through scheduler.execute_job, with supervised
+                  (spool file) and piped output capture; reports lines stored
+                  per second and how long after the last line the run finished
+
+The output is JSON; run_all.py collects it with the other benchmarks so
+compare.py can diff two commits.
+
+Usage:
+    python benchmarks/bench_scheduler.py [--sizes 1000,10000,100000] [--due 0.002] [--ticks 5]
+                                         [--requests 10] [--log-jobs 2] [--log-rate 10000] [--log-seconds 1]
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import measure, reset_database, run, summarize, use_temp_db, wsgi_get
+
+# The database path must be set before the app modules are imported
+TMP_DIR = use_temp_db()
+
+import database
+import scheduler
+import webui
+
+TIMEZONES = [None, 'UTC', 'Europe/Berlin', 'America/New_York', 'America/Los_Angeles',
+             'Asia/Kolkata', 'Asia/Tokyo', 'Australia/Sydney']
+INTERVALS = [1, 5, 15, 60, 1440]
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Prints argv[1] lines per second for argv[2] seconds, in 100 batches per second
+EMITTER = """
+import sys, time
+rate, seconds = int(sys.argv[1]), float(sys.argv[2])
+batch = max(1, rate // 100)
+start = time.monotonic()
+n = 0
+while n < rate * seconds:
+    sys.stdout.write(''.join(f'line {n + i} ' + 'x' * 60 + '\\n' for i in range(batch)))
+    sys.stdout.flush()
+    n += batch
+    delay = start + n / rate - time.monotonic()
+    if delay > 0:
+        time.sleep(delay)
+"""
+
+
+def populate(num_jobs, minute, due, seed=42):
+    """Create a fresh database with num_jobs jobs; returns {job ID: last_run} to restore between ticks"""
+    reset_database()
+
+    rng = random.Random(seed)
+    rows = []
+    for i in range(num_jobs):
+        days = [1 if rng.random() < 0.7 else 0 for _ in WEEKDAYS]
+        if rng.random() < 0.6:
+            interval = rng.choice(INTERVALS)
+            if rng.random() < due:
+                last_run = minute - timedelta(minutes=interval, seconds=rng.randint(0, 3600))
+            else:
+                last_run = minute - timedelta(seconds=rng.uniform(0, interval * 54))
+            rows.append((f"every-{i}", 'every', interval, None, None, *days, None, last_run.isoformat(sep=' ')))
+        else:
+            rows.append((f"at-{i}", 'at', None, rng.randint(0, 23), rng.randint(0, 59), *days,
+                         rng.choice(TIMEZONES), None))
+
+    with database.get_db() as conn:
+        conn.executemany(f"""
+            INSERT INTO jobs (name, path, exec_mode, frequency_type, frequency_every_min, frequency_at_hr, frequency_at_min,
+                              {', '.join(f'frequency_at_{day}' for day in WEEKDAYS)}, timezone, last_run, active)
+            VALUES (?, 'true', 'exec', ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+        """, rows)
+        conn.commit()
+        return {row['id']: row['last_run'] for row in conn.execute("SELECT id, last_run FROM jobs")}
+
+
+def restore_last_runs(last_runs):
+    with database.get_db() as conn:
+        conn.executemany("UPDATE jobs SET last_run = ? WHERE id = ?",
+                         [(last_run, job_id) for job_id, last_run in last_runs.items()])
+        conn.commit()
+
+
+def wait_for_runs(timeout=120):
+    """Wait until the runs started by a tick have finished"""
+    deadline = time.monotonic() + timeout
+    while scheduler.registry.running_slots() or scheduler.registry.queued_count():
+        if time.monotonic() > deadline:
+            raise RuntimeError('Runs started by the tick did not finish')
+        time.sleep(0.05)
+
+
+
+def measure_ticks(minute, last_runs, ticks):
+    """Time ticks at minute; also reports how many of the runs they started were recorded and failed"""
+    with database.get_db() as conn:
+        first_run = conn.execute("SELECT COALESCE(MAX(id), 0) FROM job_runs").fetchone()[0]
+    samples = []
+    for _ in range(ticks):
+        restore_last_runs(last_runs)
+        # Naive UTC, a second into the minute like a real tick
+        start = time.perf_counter()
+        scheduler.run_tick(minute + timedelta(seconds=1))
+        samples.append((time.perf_counter() - start) * 1000)
+        wait_for_runs()
+    with database.get_db() as conn:
+        recorded, failed = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(result != 'success'), 0) FROM job_runs WHERE id > ?", (first_run,)).fetchone()
+    return dict(summarize(samples), runs_recorded=recorded, failed_runs=failed)
+
+
+def run_fleet(size, args):
+    minute = datetime.now(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+    last_runs = populate(size, minute, args.due)
+    with database.get_db() as conn:
+        counts = dict(conn.execute("SELECT frequency_type, COUNT(*) FROM jobs GROUP BY frequency_type").fetchall())
+
+    due = len(scheduler.get_jobs_to_run(minute))
+    results = {
+        'every_jobs': counts.get('every', 0),
+        'at_jobs': counts.get('at', 0),
+        'due_jobs': due,
+        'due_check': measure(lambda: scheduler.get_jobs_to_run(minute), args.ticks),
+    }
+    for name, path in (('dashboard', '/'), ('api_jobs', '/api/jobs')):
+        status, _, body = wsgi_get(webui.app, path)
+        assert status == 200, status
+        results[name] = dict(measure(lambda: wsgi_get(webui.app, path), args.requests), body_bytes=len(body))
+    results['tick'] = measure_ticks(minute, last_runs, args.ticks)
+    return results
+
+
+def log_ingest(args, supervised):
+    """Run --log-jobs chatty jobs at once; returns throughput and drain time"""
+    scheduler.SUPERVISE_JOBS = supervised
+    emitter = os.path.join(TMP_DIR, 'emitter.py')
+    with open(emitter, 'w') as f:
+        f.write(EMITTER)
+    with database.get_db() as conn:
+        cursor = conn.execute(
+            "INSERT INTO jobs (name, path, exec_mode, frequency_type, frequency_every_min, active, retry_count) "
+            "VALUES (?, ?, 'exec', 'every', 60, 1, 0)",
+            ('emitter', f"{sys.executable} {emitter} {args.log_rate} {args.log_seconds}")
+        )
+        conn.commit()
+        job = dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone())
+        first_run = conn.execute("SELECT COALESCE(MAX(id), 0) FROM job_runs").fetchone()[0]
+
+    threads = [threading.Thread(target=scheduler.execute_job, args=(job,)) for _ in range(args.log_jobs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    with database.get_db() as conn:
+        lines = conn.execute(
+            "SELECT COUNT(*) FROM run_logs WHERE run_id IN (SELECT id FROM job_runs WHERE id > ?)", (first_run,)).fetchone()[0]
+        failed = conn.execute(
+            "SELECT COUNT(*) FROM job_runs WHERE id > ? AND result != 'success'", (first_run,)).fetchone()[0]
+    return {
+        'seconds': round(seconds, 2),
+        'lines_emitted': args.log_jobs * round(args.log_rate * args.log_seconds),
+        'lines_stored': lines,
+        'lines_per_second': round(lines / seconds),
+        'drain_seconds': round(max(0.0, seconds - args.log_seconds), 2),
+        'failed_runs': failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scheduler against synthetic job fleets')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated job counts')
+    parser.add_argument('--due', type=float, default=0.002, help='Share of `every` jobs due in the benchmarked minute')
+    parser.add_argument('--ticks', type=int, default=5, help='Due checks and ticks per size')
+    parser.add_argument('--requests', type=int, default=10, help='Requests per endpoint and size')
+    parser.add_argument('--log-jobs', type=int, default=2, help='Chatty jobs running at once')
+    parser.add_argument('--log-rate', type=int, default=10000, help='Lines per second each chatty job prints')
+    parser.add_argument('--log-seconds', type=float, default=1, help='How long each chatty job prints')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = {str(size): run_fleet(size, args) for size in (int(s) for s in args.sizes.split(','))}
+
+    capture = {'pipe': False}
+    if scheduler.supervisor.is_supported():
+        capture['supervised'] = True
+    results['log_ingest'] = {name: log_ingest(args, supervised) for name, supervised in capture.items()}
+
+    print(json.dumps({
+        'benchmark': 'scheduler',
+        'due': args.due,
+        'log_jobs': args.log_jobs,
+        'log_rate': args.log_rate,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
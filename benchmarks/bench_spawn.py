@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark job spawn latency for the 'shell' and 'exec' exec modes.
+
+Measures the wall time from Popen() to process exit for a trivial command,
+which is dominated by fork/exec cost (plus the extra /bin/sh in shell mode).
+
+Usage:
+    python benchmarks/bench_spawn.py [--runs 200] [--command "true"]
+"""
+import argparse
+import json
+import subprocess
+import time
+
+from common import summarize
+from job_process import build_popen_args
+
+
+def measure(job, runs):
+    """Spawn the job's command `runs` times and return latencies in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.STDOUT,
+            **build_popen_args(job)
+        )
+        process.wait()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark job spawn latency per exec mode')
+    parser.add_argument('--runs', type=int, default=200, help='Spawns per mode')
+    parser.add_argument('--command', default='true', help='Command to spawn')
+    args = parser.parse_args()
+
+    results = {}
+    for exec_mode in ('shell', 'exec'):
+        job = {'path': args.command, 'exec_mode': exec_mode}
+        results[exec_mode] = summarize(measure(job, args.runs))
+
+    print(json.dumps({'benchmark': 'spawn', 'command': args.command, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark run statistics from the rollups against scanning the run history.
+
+Populates --jobs jobs with --days days of history (--runs-per-day runs each)
+and compares, in-process through the WSGI app:
+
+    job_stats   - /api/job/<id>/stats?period=day&buckets=N (30 and 365) vs.
+                  the same figures computed from a scan of the job's job_runs rows
+    sparklines  - /api/jobs/sparklines vs. a GROUP BY over all job_runs
+                  of the last 14 days
+
+finish_run reports the cost of finishing a run (finish_job_run) with and
+without the rollup triggers.
+
+Usage:
+    python benchmarks/bench_stats.py [--jobs 50] [--days 365] [--runs-per-day 24] [--requests 30]
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from common import measure, ok_request, reset_database, run, summarize, use_temp_db
+
+# The database path must be set before the app modules are imported
+use_temp_db()
+
+import database
+import webui
+
+
+def populate(num_jobs, days, runs_per_day):
+    """Create jobs with finished run history, then build the rollups from it (as on upgrade)"""
+    reset_database()
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE job_run_stats")
+        cursor.executemany(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active) VALUES (?, 'true', 'every', 60, 1)",
+            [(f"job-{i}",) for i in range(num_jobs)]
+        )
+        step = timedelta(days=1) / runs_per_day
+        for job_id in range(1, num_jobs + 1):
+            rows = []
+            for n in range(days * runs_per_day):
+                start = now - timedelta(days=days) + step * n
+                duration = int(rng.lognormvariate(3, 1))
+                result = 'fail' if rng.random() < 0.05 else 'success'
+                rows.append((job_id, start, start + timedelta(seconds=duration), duration, result))
+            cursor.executemany(
+                "INSERT INTO job_runs (job_id, start_at, finish_at, duration, result) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        conn.commit()
+    start = time.perf_counter()
+    database.init_database()
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def raw_job_stats(job_id, days):
+    """The job_stats figures computed from the run history"""
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days - 1)
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT date(finish_at) AS day, result, duration FROM job_runs WHERE job_id = ? AND finish_at >= ?",
+            (job_id, since.strftime('%Y-%m-%d'))
+        )
+        rows = cursor.fetchall()
+    buckets = {}
+    durations = []
+    for row in rows:
+        bucket = buckets.setdefault(row['day'], {'runs': 0, 'failures': 0, 'durations': []})
+        bucket['runs'] += 1
+        bucket['failures'] += row['result'] == 'fail'
+        if row['duration'] is not None and row['result'] != 'aborted':
+            bucket['durations'].append(row['duration'])
+            durations.append(row['duration'])
+    durations.sort()
+    pct = {p: durations[min(len(durations) - 1, int(len(durations) * p / 100))] for p in (50, 95, 99)} if durations else {}
+    return json.dumps({'buckets': buckets, 'percentiles': pct})
+
+
+def raw_sparklines(days):
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days - 1)
+    with database.get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT job_id, date(finish_at) AS day, COUNT(*) AS runs, SUM(result = 'fail') AS failures,
+                   AVG(CASE WHEN result != 'aborted' THEN duration END) AS duration_mean
+            FROM job_runs
+            WHERE finish_at >= ?
+            GROUP BY job_id, day
+        """, (since.strftime('%Y-%m-%d'),))
+        return json.dumps([dict(row) for row in cursor.fetchall()])
+
+
+
+def finish_runs(count):
+    """Time finish_job_run for count new runs of job 1"""
+    samples = []
+    for _ in range(count):
+        run_id = database.create_job_run(1)
+        start = time.perf_counter()
+        database.finish_job_run(run_id, 'success', 12)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark run statistics rollups against raw run scans')
+    parser.add_argument('--jobs', type=int, default=50, help='Jobs in the database')
+    parser.add_argument('--days', type=int, default=365, help='Days of run history per job')
+    parser.add_argument('--runs-per-day', type=int, default=24, help='Runs per job and day')
+    parser.add_argument('--requests', type=int, default=30, help='Requests per case')
+    args = parser.parse_args()
+
+    backfill_ms = populate(args.jobs, args.days, args.runs_per_day)
+
+    results = {}
+    for days in (30, 365):
+        results[f'job_stats_{days}d'] = {
+            'raw_scan': measure(lambda: raw_job_stats(1, days), args.requests),
+            'rollups': measure(ok_request(webui.app, 'GET', f'/api/job/1/stats?period=day&buckets={days}'), args.requests),
+        }
+    results.update({
+        'sparklines': {
+            'raw_scan': measure(lambda: raw_sparklines(webui.SPARKLINE_DAYS), args.requests),
+            'rollups': measure(ok_request(webui.app, 'GET', '/api/jobs/sparklines'), args.requests),
+        },
+    })
+
+    with_triggers = finish_runs(args.requests)
+    with database.get_db() as conn:
+        for period in database.STATS_PERIODS:
+            conn.execute(f"DROP TRIGGER trg_job_run_stats_{period}")
+        conn.commit()
+    results['finish_run'] = {'without_rollups': finish_runs(args.requests), 'with_rollups': with_triggers}
+
+    print(json.dumps({
+        'benchmark': 'stats',
+        'jobs': args.jobs,
+        'runs': args.jobs * args.days * args.runs_per_day,
+        'backfill_ms': backfill_ms,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark running jobs on remote workers, all on this host.
+
+Starts the scheduler's worker API on a Unix socket and --workers worker.py
+processes connected to it, then runs --runs jobs that each print --lines
+lines through the scheduler's normal execute_job path:
+
+    batched     - workers send output in batches (WORKER_BATCH_LINES=200)
+    per_line    - workers send every line on its own (WORKER_BATCH_LINES=1)
+
+Reports wall time, log lines stored per second, how the runs were spread
+over the workers and how many runs failed (with one line per request, the
+scheduler's log writes contend for the database lock).
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 3] [--capacity 2] [--runs 12] [--lines 2000]
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+from common import reset_database, run, use_temp_db
+
+# The database path must be set before the app modules are imported
+TMP_DIR = use_temp_db()
+
+import database
+import scheduler
+import workers
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'worker.py')
+
+
+def start_workers(socket_path, count, capacity, batch_lines):
+    env = dict(os.environ, WORKER_BATCH_LINES=str(batch_lines))
+    processes = [
+        subprocess.Popen([sys.executable, WORKER_SCRIPT, '--scheduler', f'unix://{socket_path}',
+                          '--id', f'worker-{i}', '--capacity', str(capacity)],
+                         env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for i in range(count)
+    ]
+    deadline = time.monotonic() + 10
+    while len(workers.pool.summary()) < count:
+        if time.monotonic() > deadline:
+            raise RuntimeError('Workers did not register')
+        time.sleep(0.05)
+    return processes
+
+
+def stop_workers(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+
+
+def measure(job, runs):
+    threads = [threading.Thread(target=scheduler.execute_job, args=(job,)) for _ in range(runs)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def run_case(socket_path, job, args, batch_lines):
+    # A fresh pool, so the workers of the previous case are gone
+    workers.pool = workers.WorkerPool()
+    processes = start_workers(socket_path, args.workers, args.capacity, batch_lines)
+    try:
+        with database.get_db() as conn:
+            first_run = conn.execute("SELECT COALESCE(MAX(id), 0) FROM job_runs").fetchone()[0]
+        seconds = measure(job, args.runs)
+    finally:
+        stop_workers(processes)
+
+    with database.get_db() as conn:
+        runs = [dict(row) for row in conn.execute(
+            "SELECT id, result, worker_id, cpu_seconds, max_rss_kb FROM job_runs WHERE id > ?", (first_run,))]
+        lines = conn.execute(
+            "SELECT COUNT(*) FROM run_logs WHERE run_id IN (SELECT id FROM job_runs WHERE id > ?)", (first_run,)).fetchone()[0]
+    return {
+        'seconds': round(seconds, 2),
+        'lines_per_second': round(lines / seconds),
+        'lines_stored': lines,
+        'runs_per_worker': dict(sorted(Counter(run['worker_id'] for run in runs).items())),
+        'failed_runs': sum(1 for run in runs if run['result'] != 'success'),
+        'max_rss_kb': max(run['max_rss_kb'] or 0 for run in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark jobs on remote workers')
+    parser.add_argument('--workers', type=int, default=3, help='Worker processes')
+    parser.add_argument('--capacity', type=int, default=2, help='Runs per worker at once')
+    parser.add_argument('--runs', type=int, default=12, help='Runs per case')
+    parser.add_argument('--lines', type=int, default=2000, help='Output lines per run')
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    reset_database()
+    with database.get_db() as conn:
+        cursor = conn.execute(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active, retry_count) VALUES (?, ?, 'every', 5, 1, 0)",
+            ('printer', f"{sys.executable} -c \"[print('line', i) for i in range({args.lines})]\"")
+        )
+        conn.commit()
+        job = dict(conn.execute("SELECT * FROM jobs WHERE id = ?", (cursor.lastrowid,)).fetchone())
+
+    socket_path = os.path.join(TMP_DIR, 'workers.sock')
+    workers.start_server(socket_path=socket_path)
+
+    results = {
+        'batched': run_case(socket_path, job, args, 200),
+        'per_line': run_case(socket_path, job, args, 1),
+    }
+
+    print(json.dumps({
+        'benchmark': 'workers',
+        'workers': args.workers,
+        'capacity': args.capacity,
+        'runs': args.runs,
+        'lines_per_run': args.lines,
+        'results': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    run(main)
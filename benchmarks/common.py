@@ -0,0 +1,153 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import shutil
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+# Make the repository modules importable when running `python benchmarks/<script>.py`
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Temporary directories to remove when the benchmark ends (see run)
+_tmp_dirs = []
+
+
+def use_temp_db():
+    """Point DB_PATH at a database in a new temporary directory and return the directory
+
+    Call it before importing the app modules, which read DB_PATH on import.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix='cronishe-bench-')
+    _tmp_dirs.append(tmp_dir)
+    os.environ['DB_PATH'] = os.path.join(tmp_dir, 'bench.db')
+    return tmp_dir
+
+
+def reset_database():
+    """Replace the benchmark database with an empty one"""
+    import database
+    if os.path.exists(database.DB_PATH):
+        os.unlink(database.DB_PATH)
+    database.init_database()
+
+
+def create_jobs(num_jobs, interval=5):
+    """Reset the database and add num_jobs active `every` jobs named job-<i> that run `true`"""
+    import database
+    reset_database()
+    with database.get_db() as conn:
+        conn.executemany(
+            "INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active) VALUES (?, 'true', 'every', ?, 1)",
+            [(f"job-{i}", interval) for i in range(num_jobs)]
+        )
+        conn.commit()
+
+
+def run(main):
+    """Run a benchmark's main(), then remove the directories made by use_temp_db"""
+    try:
+        return main()
+    finally:
+        for tmp_dir in _tmp_dirs:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def free_port():
+    """A TCP port on 127.0.0.1 that is free right now"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, process, name, timeout=10):
+    """Wait until a server started as process accepts connections on port (killing it if it doesn't)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{name} did not start")
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples (nearest-rank)"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Summarize latency samples given in milliseconds"""
+    return {
+        'runs': len(samples),
+        'mean_ms': round(statistics.mean(samples), 3),
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+    }
+
+
+def measure(func, runs):
+    """Call func runs times and summarize how long each call took"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def ok_request(app, method, path, body=b''):
+    """A function making the request in-process and checking for a 200 response, to pass to measure"""
+    def call():
+        status, _, _ = wsgi_request(app, method, path, body=body)
+        assert status == 200, (method, path, status)
+    return call
+
+
+def wsgi_get(app, path, headers=None):
+    """Call a WSGI app in-process with a GET request; return (status_code, headers, body)
+
+    Header names in the returned dict are lowercased.
+    """
+    return wsgi_request(app, 'GET', path, headers)
+
+
+def wsgi_request(app, method, path, headers=None, body=b''):
+    """Call a WSGI app in-process; return (status_code, headers, body)
+
+    body may be bytes or a JSON-serializable object. Header names in the
+    returned dict are lowercased.
+    """
+    import io
+    import json
+    from wsgiref.util import setup_testing_defaults
+
+    headers = dict(headers or {})
+    if not isinstance(body, bytes):
+        body = json.dumps(body).encode()
+        headers.setdefault('Content-Type', 'application/json')
+
+    path, _, query = path.partition('?')
+    environ = {'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query,
+               'wsgi.input': io.BytesIO(body), 'CONTENT_LENGTH': str(len(body))}
+    setup_testing_defaults(environ)
+    for name, value in headers.items():
+        key = name.upper().replace('-', '_')
+        environ[key if key in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + key] = value
+
+    result = {}
+
+    def start_response(status, response_headers, exc_info=None):
+        result['status'] = int(status.split()[0])
+        result['headers'] = {name.lower(): value for name, value in response_headers}
+
+    chunks = app(environ, start_response)
+    body = b''.join(chunks)
+    if hasattr(chunks, 'close'):
+        chunks.close()
+    return result['status'], result['headers'], body
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Compare two result files written by run_all.py.
+
+Prints every numeric result whose value changed by more than --threshold
+percent. Timings (`*_ms`, `seconds`) that went up and throughputs
+(`*_per_second`) that went down are marked as regressions, and the exit
+code is 1 if there are any, so the script can gate a CI job.
+
+Usage:
+    python benchmarks/compare.py before.json after.json [--threshold 10] [--all]
+"""
+import argparse
+import json
+import sys
+
+
+def flatten(value, prefix=''):
+    """{dotted path: number} for the numeric leaves of a JSON value"""
+    if isinstance(value, dict):
+        items = {}
+        for key, child in value.items():
+            items.update(flatten(child, f'{prefix}.{key}' if prefix else str(key)))
+        return items
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+
+def direction(path):
+    """1 if higher is worse, -1 if higher is better, 0 if unknown"""
+    name = path.rsplit('.', 1)[-1]
+    if name.endswith('_ms') or name.endswith('seconds'):
+        return 1
+    if name.endswith('_per_second'):
+        return -1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('before', help='Results of the baseline commit')
+    parser.add_argument('after', help='Results of the commit to check')
+    parser.add_argument('--threshold', type=float, default=10, help='Percent change to report')
+    parser.add_argument('--all', action='store_true', help='Also list unchanged results')
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print(f"before: {before.get('commit') or '?'}  after: {after.get('commit') or '?'}")
+
+    old = flatten(before.get('benchmarks', {}))
+    new = flatten(after.get('benchmarks', {}))
+    regressions = 0
+    for path in sorted(old.keys() & new.keys()):
+        if path.endswith('.seconds') and path.count('.') == 1:
+            continue  # wall time of the whole script
+        a, b = old[path], new[path]
+        change = (b - a) / abs(a) * 100 if a else (0.0 if b == a else float('inf'))
+        if abs(change) < args.threshold and not args.all:
+            continue
+        mark = ''
+        if abs(change) >= args.threshold and direction(path) * change > 0:
+            mark = '  REGRESSION'
+            regressions += 1
+        print(f"{path}: {a} -> {b} ({change:+.1f}%){mark}")
+
+    for path in sorted(old.keys() - new.keys()):
+        print(f"{path}: only in {args.before}")
+    for path in sorted(new.keys() - old.keys()):
+        print(f"{path}: only in {args.after}")
+
+    print(f"{regressions} regression(s) above {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Run the benchmark scripts and collect their JSON output in one file.
+
+Every bench_*.py in this directory runs in its own process with its
+default arguments. The collected results are tagged with the git commit
+and the Python version, so results from two commits can be diffed with
+compare.py:
+
+    git checkout main && python benchmarks/run_all.py --output main.json
+    git checkout my-branch && python benchmarks/run_all.py --output branch.json
+    python benchmarks/compare.py main.json branch.json
+
+A benchmark that fails is recorded with its exit code and the end of its
+error output, and the others still run.
+
+Usage:
+    python benchmarks/run_all.py [--only scheduler,dashboard] [--skip workers] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def git_commit():
+    """The checked-out commit (None outside a git checkout)"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def run_benchmark(path, timeout):
+    start = time.perf_counter()
+    try:
+        result = subprocess.run([sys.executable, path], cwd=BENCH_DIR, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {'error': f'timed out after {timeout}s'}
+    seconds = round(time.perf_counter() - start, 1)
+    if result.returncode != 0:
+        return {'error': f'exit code {result.returncode}', 'stderr': result.stderr[-2000:], 'seconds': seconds}
+    try:
+        output = json.loads(result.stdout)
+    except ValueError:
+        return {'error': 'output is not JSON', 'stdout': result.stdout[-2000:], 'seconds': seconds}
+    output['seconds'] = seconds
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run all benchmarks and collect their results')
+    parser.add_argument('--only', help='Comma-separated benchmarks to run (e.g. scheduler,dashboard)')
+    parser.add_argument('--skip', default='', help='Comma-separated benchmarks to leave out')
+    parser.add_argument('--timeout', type=int, default=1800, help='Seconds per benchmark')
+    parser.add_argument('--output', help='File to write the results to (default: stdout)')
+    args = parser.parse_args()
+
+    names = sorted(os.path.basename(path)[len('bench_'):-len('.py')]
+                   for path in glob.glob(os.path.join(BENCH_DIR, 'bench_*.py')))
+    if args.only:
+        names = [name for name in names if name in args.only.split(',')]
+    names = [name for name in names if name not in args.skip.split(',')]
+
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run_benchmark(os.path.join(BENCH_DIR, f'bench_{name}.py'), args.timeout)
+
+    output = json.dumps({
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'finished_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'benchmarks': results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 1 if any('error' in result for result in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
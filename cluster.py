@@ -0,0 +1,66 @@
+"""
+Clustered scheduling: several scheduler processes sharing one database.
+
+Every node holds a lease in scheduler_nodes that its heartbeats renew (see
+database.SCHEDULER_LEASE_SECONDS). The jobs are spread over the nodes whose
+lease is valid with a consistent hash ring, so a node joining or leaving
+only moves the jobs that hash to it (about 1/N of them) instead of
+reshuffling all of them. A job with a node_label is only placed on the
+nodes that carry that label (SCHEDULER_LABELS).
+
+Nodes can briefly disagree about the membership - right after a node joins,
+or while the lease of a dead node runs out - so each due run is also claimed
+in the database before it is started (database.claim_job_runs), which lets
+exactly one node start it.
+"""
+import bisect
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+
+def parse_labels(value: Optional[str]) -> List[str]:
+    """Split a comma-separated label list, dropping blanks and duplicates"""
+    return sorted({label.strip() for label in (value or '').split(',') if label.strip()})
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to node IDs"""
+
+    # Points per node on the ring; more points spread the keys more evenly
+    REPLICAS = 100
+
+    def __init__(self, node_ids: Iterable[str], replicas: int = REPLICAS):
+        points = sorted((_hash(f"{node_id}#{i}"), node_id) for node_id in set(node_ids) for i in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node_id for _, node_id in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Node that key maps to (None if the ring is empty)"""
+        if not self._nodes:
+            return None
+        return self._nodes[bisect.bisect(self._hashes, _hash(key)) % len(self._nodes)]
+
+
+class Membership:
+    """The live scheduler nodes at one point in time, and which of them owns each job"""
+
+    def __init__(self, nodes: List[dict]):
+        self.node_ids = [node['node_id'] for node in nodes]
+        self.labels = {node['node_id']: set(parse_labels(node.get('labels'))) for node in nodes}
+        self._rings: Dict[Optional[str], HashRing] = {}
+
+    def ring(self, label: Optional[str] = None) -> HashRing:
+        """Ring of the nodes that can run jobs with label (None: all nodes)"""
+        ring = self._rings.get(label)
+        if ring is None:
+            ring = HashRing(node_id for node_id in self.node_ids if label is None or label in self.labels[node_id])
+            self._rings[label] = ring
+        return ring
+
+    def owner(self, job: dict) -> Optional[str]:
+        """Node that should run job (None if no live node has the job's label)"""
+        return self.ring(job.get('node_label') or None).owner(str(job['id']))
@@ -0,0 +1,132 @@
+"""
+gzip compression for responses of the web UI and the manager.
+
+GzipMiddleware wraps a WSGI app and compresses text responses (HTML, JSON,
+CSS, ...) for clients that send Accept-Encoding: gzip. The body is
+compressed chunk by chunk as the app produces it, so streamed responses
+stay streamed and memory use doesn't grow with the response size.
+
+Server-Sent Event streams are left alone - compressors hold data back, which
+would delay live log lines.
+"""
+import os
+import zlib
+from typing import Optional
+
+
+# zlib compression level (1 = fastest, 9 = smallest)
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', '6'))
+
+# Responses known to be smaller than this are sent uncompressed
+GZIP_MIN_SIZE = 512
+
+# Content types worth compressing (images other than SVG/ICO are already compressed)
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/manifest+json',
+    'image/svg+xml',
+    'image/x-icon',
+    'image/vnd.microsoft.icon',
+)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Check whether an Accept-Encoding header allows gzip (honouring q=0)"""
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        params = params.replace(' ', '').lower()
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Check whether a Content-Type header names a type worth compressing"""
+    return (content_type or '').split(';')[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+def weak_etag(etag: str) -> str:
+    """
+    Mark an ETag as weak. The gzipped body differs byte for byte from the one
+    the tag was computed for, so it may only be used for weak comparison
+    (If-None-Match), never as a strong validator (Range, If-Match).
+    """
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+class GzipMiddleware:
+    """WSGI middleware compressing compressible responses with gzip"""
+
+    def __init__(self, app, level: int = GZIP_LEVEL, min_size: int = GZIP_MIN_SIZE):
+        self.app = app
+        self.level = level
+        self.min_size = min_size
+
+    def _should_compress(self, status: str, headers: dict) -> bool:
+        code = int(status.split()[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if 'content-encoding' in headers or not is_compressible(headers.get('content-type')):
+            return False
+        length = headers.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or not accepts_gzip(environ.get('HTTP_ACCEPT_ENCODING')):
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def gzip_start_response(status, response_headers, exc_info=None):
+            headers = {name.lower(): value for name, value in response_headers}
+            state['compress'] = self._should_compress(status, headers)
+            if is_compressible(headers.get('content-type')):
+                vary = headers.get('vary')
+                if not vary:
+                    response_headers = response_headers + [('Vary', 'Accept-Encoding')]
+                elif 'accept-encoding' not in vary.lower():
+                    response_headers = [(name, value) for name, value in response_headers if name.lower() != 'vary']
+                    response_headers.append(('Vary', f'{vary}, Accept-Encoding'))
+            if state['compress']:
+                response_headers = [(name, weak_etag(value) if name.lower() == 'etag' else value)
+                                    for name, value in response_headers if name.lower() != 'content-length']
+                response_headers.append(('Content-Encoding', 'gzip'))
+            return start_response(status, response_headers, exc_info)
+
+        body = self.app(environ, gzip_start_response)
+        if state.get('compress') is False:
+            # Nothing to do - keep the original iterable (e.g. a wsgi.file_wrapper)
+            return body
+        return self._compress(body, state)
+
+    def _compress(self, body, state):
+        compressor = None
+        try:
+            for chunk in body:
+                # start_response may be deferred until the first chunk
+                if not state.get('compress'):
+                    yield chunk
+                    continue
+                if compressor is None:
+                    compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            if state.get('compress'):
+                if compressor is None:
+                    compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+                yield compressor.flush()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
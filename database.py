@@ -1,12 +1,89 @@
 import sqlite3
 import os
-from datetime import datetime, timezone
+import socket
+import json
+from datetime import datetime, timedelta, timezone
 from contextlib import contextmanager
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import metrics
 
 
 DB_PATH = os.environ.get("DB_PATH", "cronishe.db")
 
+# How a job's path is launched:
+#   shell  - run through /bin/sh -c (supports pipes, redirects, globbing)
+#   exec   - split into argv with shlex and exec directly, no intermediate shell
+#   python - fork the Python script from a warm forkserver (falls back to exec)
+EXEC_MODES = ('shell', 'exec', 'python')
+
+# What happens when a job is due while a previous run is still going:
+#   skip     - don't start the new run
+#   queue    - start it once the current run finishes (at most one queued run)
+#   parallel - run alongside, up to max_parallel runs at once
+#   replace  - stop the current run and start the new one
+OVERLAP_POLICIES = ('skip', 'queue', 'parallel', 'replace')
+
+# Per-job run statistics are rolled up into job_run_stats rows per period.
+# Each row keeps a duration histogram with buckets ending (exclusive, seconds)
+# at these bounds, plus one for anything longer.
+DURATION_HISTOGRAM_BOUNDS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 10800, 43200)
+
+# Rollup periods -> strftime format of the bucket start (UTC)
+STATS_PERIODS = {
+    'hour': '%Y-%m-%d %H:00:00',
+    'day': '%Y-%m-%d 00:00:00',
+}
+
+# Hourly rollups older than this are dropped (daily ones are kept)
+STATS_HOURLY_RETENTION_DAYS = 31
+
+# Seconds between scheduler heartbeats
+SCHEDULER_HEARTBEAT_SECONDS = int(os.environ.get('SCHEDULER_HEARTBEAT_SECONDS', '10'))
+
+# A scheduler's lease: it counts as alive (and may claim runs) until this many
+# seconds after its last heartbeat. In a cluster, the jobs of a node that died
+# move to the other nodes once its lease has run out.
+SCHEDULER_LEASE_SECONDS = int(os.environ.get('SCHEDULER_LEASE_SECONDS', str(3 * SCHEDULER_HEARTBEAT_SECONDS)))
+
+# Seconds between the heartbeats a scheduler writes for its running runs
+RUN_HEARTBEAT_SECONDS = int(os.environ.get('RUN_HEARTBEAT_SECONDS', '5'))
+
+# A running run without a heartbeat for this long is orphaned (its scheduler
+# or output capture is gone) and gets aborted
+RUN_HEARTBEAT_TIMEOUT_SECONDS = int(os.environ.get('RUN_HEARTBEAT_TIMEOUT_SECONDS', str(3 * RUN_HEARTBEAT_SECONDS)))
+
+# Run claims older than this are pruned (they only need to outlive the minute they are for)
+JOB_CLAIM_RETENTION_HOURS = 24
+
+# Commands the web UI queues for the schedulers in the commands table:
+#   run    - start a job now
+#   stop   - stop a run
+#   signal - send a signal to a run's process group
+COMMAND_ACTIONS = ('run', 'stop', 'signal')
+
+# Signals that can be sent to a run
+RUN_SIGNALS = ('SIGHUP', 'SIGINT', 'SIGQUIT', 'SIGTERM', 'SIGKILL', 'SIGUSR1', 'SIGUSR2')
+
+# Commands older than this are pruned
+COMMAND_RETENTION_HOURS = 24
+
+# Schedulers listen for wake-ups on a Unix datagram socket in this directory
+# (<node ID>.sock), so a queued command is picked up at once instead of at
+# their next (idle, slow) poll of the commands table
+COMMAND_WAKE_DIR = os.environ.get('COMMAND_WAKE_DIR') or os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), 'wake')
+
+# Rows read per query by the iter_* functions. Each batch is fetched completely
+# before it is handed out, so no read lock is held while a slow client drains
+# a streamed response (which would block the scheduler writing log lines).
+STREAM_BATCH_SIZE = 500
+
+
+# Latency of the writes made for every run and log line, timed here so that
+# every caller is covered
+DB_WRITE_SECONDS = metrics.Histogram(
+    'cronishe_db_write_duration_seconds', 'Latency of database writes made for every run and log line', ['operation'])
+
 
 @contextmanager
 def get_db():
@@ -48,7 +125,14 @@ def init_database():
                 retry_count INTEGER NOT NULL DEFAULT 3,
                 on_start TEXT,
                 on_success TEXT,
-                on_fail TEXT
+                on_fail TEXT,
+                exec_mode TEXT NOT NULL DEFAULT 'shell',
+                env TEXT,
+                cwd TEXT,
+                overlap_policy TEXT NOT NULL DEFAULT 'skip',
+                max_parallel INTEGER NOT NULL DEFAULT 1,
+                tags TEXT,
+                version INTEGER NOT NULL DEFAULT 0
             )
         """)
 
@@ -90,12 +174,183 @@ def init_database():
             )
         """)
 
+        # Create job_dependencies table (job_id runs after depends_on_job_id succeeds)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS job_dependencies (
+                job_id INTEGER NOT NULL,
+                depends_on_job_id INTEGER NOT NULL,
+                PRIMARY KEY (job_id, depends_on_job_id),
+                FOREIGN KEY (job_id) REFERENCES jobs(id),
+                FOREIGN KEY (depends_on_job_id) REFERENCES jobs(id)
+            )
+        """)
+
+        # Create dag_runs table - one row per execution of a dependency graph
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dag_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                root_job_id INTEGER NOT NULL,
+                start_at TIMESTAMP,
+                finish_at TIMESTAMP,
+                duration INTEGER,
+                result TEXT CHECK(result IN ('success', 'fail', NULL)),
+                nodes_total INTEGER NOT NULL DEFAULT 0,
+                nodes_failed INTEGER NOT NULL DEFAULT 0,
+                nodes_skipped INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (root_job_id) REFERENCES jobs(id)
+            )
+        """)
+
+        # Drop dependency edges together with the job
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_delete_dependencies
+            AFTER DELETE ON jobs
+            BEGIN
+                DELETE FROM job_dependencies WHERE job_id = OLD.id OR depends_on_job_id = OLD.id;
+            END
+        """)
+
+        # Change counter for the job list, used as its ETag. Triggers bump it on
+        # every change to the data the dashboard and /api/jobs are built from
+        # (PRAGMA data_version can't be used - it is per connection), and stamp
+        # the new value on the job it concerns (jobs.version), or on a tombstone
+        # in deleted_jobs, so clients can fetch just the jobs changed since a
+        # version they have.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS state_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO state_version (id, version) VALUES (1, 0)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS deleted_jobs (
+                job_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        """)
+
+        # Add version column to jobs if it doesn't exist (migration for existing
+        # databases - their jobs start at version 0)
+        cursor.execute("PRAGMA table_info(jobs)")
+        if 'version' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+        stamp_job = "UPDATE jobs SET version = (SELECT version FROM state_version WHERE id = 1) WHERE id = {};"
+        for trigger_name, event, stamp in (
+            ('jobs_insert', 'INSERT ON jobs',
+             stamp_job.format('NEW.id') + " DELETE FROM deleted_jobs WHERE job_id = NEW.id;"),
+            # Not for the stamping itself
+            ('jobs_update', 'UPDATE ON jobs WHEN NEW.version IS OLD.version', stamp_job.format('NEW.id')),
+            ('jobs_delete', 'DELETE ON jobs',
+             "INSERT OR REPLACE INTO deleted_jobs (job_id, version)"
+             " SELECT OLD.id, version FROM state_version WHERE id = 1;"),
+            ('job_runs_insert', 'INSERT ON job_runs', stamp_job.format('NEW.job_id')),
+            # Not on every column: log capture updates spool_offset with every batch of lines
+            ('job_runs_update', 'UPDATE OF start_at, finish_at, duration, result ON job_runs',
+             stamp_job.format('NEW.job_id')),
+            ('job_runs_delete', 'DELETE ON job_runs', stamp_job.format('OLD.job_id')),
+            ('job_dependencies_insert', 'INSERT ON job_dependencies', stamp_job.format('NEW.job_id')),
+            ('job_dependencies_delete', 'DELETE ON job_dependencies', stamp_job.format('OLD.job_id')),
+        ):
+            # Recreated on every start, so databases with the older definitions get the stamping
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_state_version_{trigger_name}")
+            cursor.execute(f"""
+                CREATE TRIGGER trg_state_version_{trigger_name}
+                AFTER {event}
+                BEGIN
+                    UPDATE state_version SET version = version + 1 WHERE id = 1;
+                    {stamp}
+                END
+            """)
+
+        # Per-job run statistics, maintained incrementally by triggers whenever a run finishes
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_run_stats'")
+        backfill_stats = cursor.fetchone() is None
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS job_run_stats (
+                job_id INTEGER NOT NULL,
+                period TEXT NOT NULL CHECK(period IN ('hour', 'day')),
+                bucket TIMESTAMP NOT NULL,
+                runs INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0,
+                aborted INTEGER NOT NULL DEFAULT 0,
+                duration_count INTEGER NOT NULL DEFAULT 0,
+                duration_min INTEGER,
+                duration_max INTEGER,
+                duration_sum INTEGER NOT NULL DEFAULT 0,
+                histogram TEXT NOT NULL,
+                PRIMARY KEY (job_id, period, bucket)
+            ) WITHOUT ROWID
+        """)
+        create_run_stats_triggers(cursor)
+        if backfill_stats:
+            backfill_run_stats(cursor)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_jobs_delete_run_stats
+            AFTER DELETE ON jobs
+            BEGIN
+                DELETE FROM job_run_stats WHERE job_id = OLD.id;
+            END
+        """)
+
+        # Running scheduler processes, with their liveness (reported by /api/health)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS scheduler_nodes (
+                node_id TEXT PRIMARY KEY,
+                hostname TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                started_at TIMESTAMP NOT NULL,
+                heartbeat_at TIMESTAMP NOT NULL,
+                last_tick_at TIMESTAMP,
+                labels TEXT
+            )
+        """)
+
+        # Due runs claimed by scheduler nodes: the primary key lets only one
+        # node start a job for a given due time
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS job_claims (
+                job_id INTEGER NOT NULL,
+                due_at TIMESTAMP NOT NULL,
+                node_id TEXT NOT NULL,
+                claimed_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (job_id, due_at)
+            )
+        """)
+
+        # Commands for the schedulers (see COMMAND_ACTIONS). node_id is the
+        # scheduler that must carry a command out (NULL: the job's scheduler).
+        # status goes from pending to done or error; commands nobody answered
+        # in time are withdrawn as expired.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS commands (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                action TEXT NOT NULL,
+                job_id INTEGER,
+                run_id INTEGER,
+                signal TEXT,
+                node_id TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                result TEXT,
+                created_at TIMESTAMP NOT NULL,
+                finished_at TIMESTAMP
+            )
+        """)
+
         # Create indexes for better performance
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job_id ON job_runs(job_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_job_id_start_at ON job_runs(job_id, start_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_run_logs_run_id ON run_logs(run_id)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_active ON jobs(active)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_version ON jobs(version)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_retry_queue_retry_at ON retry_queue(retry_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_retry_queue_job_id ON retry_queue(job_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_dependencies_upstream ON job_dependencies(depends_on_job_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_dag_runs_root_job_id ON dag_runs(root_job_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_run_stats_period_bucket ON job_run_stats(period, bucket)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_claims_claimed_at ON job_claims(claimed_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_commands_status ON commands(status)")
 
         # Add retry_count column if it doesn't exist (migration for existing databases)
         cursor.execute("PRAGMA table_info(jobs)")
@@ -103,38 +358,215 @@ def init_database():
         if 'retry_count' not in columns:
             cursor.execute("ALTER TABLE jobs ADD COLUMN retry_count INTEGER NOT NULL DEFAULT 3")
 
+        # Add exec_mode, env and cwd columns if they don't exist (migration for existing databases)
+        if 'exec_mode' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN exec_mode TEXT NOT NULL DEFAULT 'shell'")
+        if 'env' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN env TEXT")
+        if 'cwd' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN cwd TEXT")
+
+        # Add overlap_policy and max_parallel columns if they don't exist (migration for existing databases)
+        if 'overlap_policy' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN overlap_policy TEXT NOT NULL DEFAULT 'skip'")
+        if 'max_parallel' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN max_parallel INTEGER NOT NULL DEFAULT 1")
+
+        # Add tags column if it doesn't exist (migration for existing databases)
+        if 'tags' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN tags TEXT")
+
+        # Add node_label column if it doesn't exist (migration for existing databases)
+        if 'node_label' not in columns:
+            cursor.execute("ALTER TABLE jobs ADD COLUMN node_label TEXT")
+
         # Add pid column to job_runs if it doesn't exist (migration for existing databases)
         cursor.execute("PRAGMA table_info(job_runs)")
         run_columns = [row[1] for row in cursor.fetchall()]
         if 'pid' not in run_columns:
             cursor.execute("ALTER TABLE job_runs ADD COLUMN pid INTEGER")
 
+        # Add dag_run_id column to job_runs if it doesn't exist (migration for existing databases)
+        if 'dag_run_id' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN dag_run_id INTEGER")
+
+        # Add columns used to reattach to supervised runs after a scheduler restart
+        # (migration for existing databases)
+        if 'pid_start_time' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN pid_start_time INTEGER")
+        if 'spool_offset' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN spool_offset INTEGER")
+        if 'retry_attempt' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN retry_attempt INTEGER NOT NULL DEFAULT 0")
+
+        # Add the scheduler node that started each run and DAG run (migration for existing databases)
+        if 'node_id' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN node_id TEXT")
+        # Add the worker that ran each run and its resource usage (migration for existing databases)
+        if 'worker_id' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN worker_id TEXT")
+        if 'cpu_seconds' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN cpu_seconds REAL")
+        if 'max_rss_kb' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN max_rss_kb INTEGER")
+        # Add run heartbeats (migration for existing databases - unfinished runs count from their start)
+        if 'heartbeat_at' not in run_columns:
+            cursor.execute("ALTER TABLE job_runs ADD COLUMN heartbeat_at TIMESTAMP")
+            cursor.execute("UPDATE job_runs SET heartbeat_at = start_at WHERE finish_at IS NULL")
+        # Only the unfinished runs, so the reaper's check stays cheap however long the history
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_job_runs_unfinished_heartbeat ON job_runs(heartbeat_at) WHERE finish_at IS NULL")
+
+        cursor.execute("PRAGMA table_info(dag_runs)")
+        if 'node_id' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE dag_runs ADD COLUMN node_id TEXT")
+
+        # Add labels column to scheduler_nodes if it doesn't exist (migration for existing databases)
+        cursor.execute("PRAGMA table_info(scheduler_nodes)")
+        if 'labels' not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE scheduler_nodes ADD COLUMN labels TEXT")
+
         conn.commit()
 
 
-def add_log_line(run_id: int, log_line: str):
-    """Add a log line to run_logs"""
+def _histogram_index_sql(duration: str) -> str:
+    """SQL expression for the DURATION_HISTOGRAM_BOUNDS bucket a duration falls into"""
+    cases = ' '.join(f"WHEN {duration} < {bound} THEN {i}" for i, bound in enumerate(DURATION_HISTOGRAM_BOUNDS))
+    return f"(CASE {cases} ELSE {len(DURATION_HISTOGRAM_BOUNDS)} END)"
+
+
+def create_run_stats_triggers(cursor):
+    """
+    Create the triggers that roll a run into job_run_stats when it finishes.
+
+    Only finished success/fail runs with a duration count towards the
+    duration figures; aborted runs are counted separately.
+    """
+    empty_histogram = json.dumps([0] * (len(DURATION_HISTOGRAM_BOUNDS) + 1))
+    timed = "(NEW.duration IS NOT NULL AND NEW.result IN ('success', 'fail'))"
+    index_path = f"'$[' || {_histogram_index_sql('NEW.duration')} || ']'"
+
+    for period, bucket_format in STATS_PERIODS.items():
+        # Hourly rows are pruned as new ones are written (cheap: a range on the primary key)
+        prune = ''
+        if period == 'hour':
+            prune = f"""
+                DELETE FROM job_run_stats
+                WHERE job_id = NEW.job_id AND period = 'hour'
+                  AND bucket < strftime('{bucket_format}', NEW.finish_at, '-{STATS_HOURLY_RETENTION_DAYS} days');"""
+
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_job_run_stats_{period}
+            AFTER UPDATE OF finish_at ON job_runs
+            WHEN OLD.finish_at IS NULL AND NEW.finish_at IS NOT NULL
+            BEGIN
+                INSERT INTO job_run_stats (job_id, period, bucket, runs, failures, aborted,
+                                           duration_count, duration_min, duration_max, duration_sum, histogram)
+                VALUES (
+                    NEW.job_id, '{period}', strftime('{bucket_format}', NEW.finish_at), 1,
+                    NEW.result = 'fail', NEW.result = 'aborted',
+                    {timed},
+                    CASE WHEN {timed} THEN NEW.duration END,
+                    CASE WHEN {timed} THEN NEW.duration END,
+                    CASE WHEN {timed} THEN NEW.duration ELSE 0 END,
+                    CASE WHEN {timed} THEN json_set('{empty_histogram}', {index_path}, 1) ELSE '{empty_histogram}' END
+                )
+                ON CONFLICT (job_id, period, bucket) DO UPDATE SET
+                    runs = runs + 1,
+                    failures = failures + excluded.failures,
+                    aborted = aborted + excluded.aborted,
+                    duration_count = duration_count + excluded.duration_count,
+                    duration_min = min(coalesce(duration_min, excluded.duration_min),
+                                       coalesce(excluded.duration_min, duration_min)),
+                    duration_max = max(coalesce(duration_max, excluded.duration_max),
+                                       coalesce(excluded.duration_max, duration_max)),
+                    duration_sum = duration_sum + excluded.duration_sum,
+                    histogram = CASE WHEN {timed}
+                        THEN json_set(histogram, {index_path}, json_extract(histogram, {index_path}) + 1)
+                        ELSE histogram END;{prune}
+            END
+        """)
+
+
+def backfill_run_stats(cursor):
+    """Build job_run_stats from the existing run history (once, when the table is created)"""
+    histogram = ', '.join(f"SUM(timed AND idx = {i})" for i in range(len(DURATION_HISTOGRAM_BOUNDS) + 1))
+    for period, bucket_format in STATS_PERIODS.items():
+        cursor.execute(f"""
+            INSERT INTO job_run_stats (job_id, period, bucket, runs, failures, aborted,
+                                       duration_count, duration_min, duration_max, duration_sum, histogram)
+            SELECT job_id, '{period}', bucket, COUNT(*), SUM(result = 'fail'), SUM(result = 'aborted'),
+                   SUM(timed), MIN(CASE WHEN timed THEN duration END), MAX(CASE WHEN timed THEN duration END),
+                   COALESCE(SUM(CASE WHEN timed THEN duration END), 0), json_array({histogram})
+            FROM (
+                SELECT job_id, result, duration, strftime('{bucket_format}', finish_at) AS bucket,
+                       (duration IS NOT NULL AND result IN ('success', 'fail')) AS timed,
+                       {_histogram_index_sql('duration')} AS idx
+                FROM job_runs
+                WHERE finish_at IS NOT NULL
+            )
+            WHERE bucket IS NOT NULL
+            GROUP BY job_id, bucket
+        """)
+    cursor.execute(
+        "DELETE FROM job_run_stats WHERE period = 'hour' AND bucket < strftime(?, 'now', ?)",
+        (STATS_PERIODS['hour'], f'-{STATS_HOURLY_RETENTION_DAYS} days')
+    )
+
+
+@metrics.timed(DB_WRITE_SECONDS, 'add_log_line')
+def add_log_line(run_id: int, log_line: str, spool_offset: Optional[int] = None):
+    """Add a log line to run_logs
+
+    For supervised runs, spool_offset (the spool file position after this
+    line) is saved in the same transaction so capture can resume exactly
+    there after a scheduler restart.
+    """
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO run_logs (run_id, timestamp, log_line) VALUES (?, ?, ?)",
             (run_id, datetime.now(timezone.utc).replace(tzinfo=None), log_line)
         )
+        if spool_offset is not None:
+            cursor.execute("UPDATE job_runs SET spool_offset = ? WHERE id = ?", (spool_offset, run_id))
         conn.commit()
 
 
-def create_job_run(job_id: int) -> int:
-    """Create a new job run record and return its ID"""
+@metrics.timed(DB_WRITE_SECONDS, 'add_log_lines')
+def add_log_lines(run_id: int, log_lines: List[str], spool_offset: Optional[int] = None):
+    """Add several log lines to run_logs in one transaction
+
+    spool_offset is the spool file position after the last line, for
+    supervised runs (see add_log_line).
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO run_logs (run_id, timestamp, log_line) VALUES (?, ?, ?)",
+            [(run_id, now, log_line) for log_line in log_lines]
+        )
+        if spool_offset is not None:
+            cursor.execute("UPDATE job_runs SET spool_offset = ? WHERE id = ?", (spool_offset, run_id))
+        conn.commit()
+
+
+@metrics.timed(DB_WRITE_SECONDS, 'create_job_run')
+def create_job_run(job_id: int, dag_run_id: Optional[int] = None, retry_attempt: int = 0,
+                   node_id: Optional[str] = None) -> int:
+    """Create a new job run record (started by scheduler node node_id) and return its ID"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO job_runs (job_id, start_at) VALUES (?, ?)",
-            (job_id, datetime.now(timezone.utc).replace(tzinfo=None))
+            "INSERT INTO job_runs (job_id, start_at, heartbeat_at, dag_run_id, retry_attempt, node_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, now, now, dag_run_id, retry_attempt, node_id)
         )
         conn.commit()
         return cursor.lastrowid
 
 
+@metrics.timed(DB_WRITE_SECONDS, 'finish_job_run')
 def finish_job_run(run_id: int, result: str, duration: int):
     """Update job run with finish time, duration, and result"""
     with get_db() as conn:
@@ -146,6 +578,7 @@ def finish_job_run(run_id: int, result: str, duration: int):
         conn.commit()
 
 
+@metrics.timed(DB_WRITE_SECONDS, 'update_job_last_run')
 def update_job_last_run(job_id: int, result: str):
     """Update job's last run timestamp and result"""
     with get_db() as conn:
@@ -193,12 +626,292 @@ def get_pending_retries(current_time: datetime):
         return [dict(row) for row in cursor.fetchall()]
 
 
-def remove_retry(retry_id: int):
-    """Remove a retry from the queue"""
+def count_retries() -> int:
+    """Number of retries waiting in the queue (due or not)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM retry_queue")
+        return cursor.fetchone()[0]
+
+
+def register_scheduler_node(node_id: str, hostname: str, pid: int, labels: Optional[List[str]] = None):
+    """Record a scheduler process starting (replacing an earlier one with the same node ID)"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT OR REPLACE INTO scheduler_nodes (node_id, hostname, pid, started_at, heartbeat_at, labels) VALUES (?, ?, ?, ?, ?, ?)",
+            (node_id, hostname, pid, now, now, ','.join(sorted(labels)) if labels else None)
+        )
+        conn.commit()
+
+
+def heartbeat_scheduler_node(node_id: str, tick: bool = False):
+    """Record that a scheduler is alive (with tick, that its minute loop just completed a tick)"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if tick:
+            cursor.execute("UPDATE scheduler_nodes SET heartbeat_at = ?, last_tick_at = ? WHERE node_id = ?",
+                           (now, now, node_id))
+        else:
+            cursor.execute("UPDATE scheduler_nodes SET heartbeat_at = ? WHERE node_id = ?", (now, node_id))
+        conn.commit()
+
+
+def get_scheduler_nodes() -> List[dict]:
+    """Get all registered scheduler nodes, most recent heartbeat first"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scheduler_nodes ORDER BY heartbeat_at DESC")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def _lease_cutoff() -> datetime:
+    """Oldest heartbeat of a scheduler node whose lease is still valid"""
+    return datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=SCHEDULER_LEASE_SECONDS)
+
+
+def get_live_scheduler_nodes() -> List[dict]:
+    """Get the scheduler nodes whose lease is still valid, ordered by node ID"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM scheduler_nodes WHERE heartbeat_at >= ? ORDER BY node_id", (_lease_cutoff(),))
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def claim_job_runs(job_ids: List[int], due_at: datetime, node_id: str) -> List[int]:
+    """
+    Claim the runs of jobs due at due_at for a scheduler node, in one transaction.
+
+    Only one node can claim a given job and due time, and only while its own
+    lease is valid. Returns the IDs of the jobs this call claimed.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    claimed = []
+    with get_db() as conn:
+        cursor = conn.cursor()
+        # Take the write lock first, so the lease can't lapse between the check and the claims
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT 1 FROM scheduler_nodes WHERE node_id = ? AND heartbeat_at >= ?", (node_id, _lease_cutoff()))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return claimed
+        for job_id in job_ids:
+            cursor.execute(
+                "INSERT OR IGNORE INTO job_claims (job_id, due_at, node_id, claimed_at) VALUES (?, ?, ?, ?)",
+                (job_id, due_at, node_id, now)
+            )
+            if cursor.rowcount == 1:
+                claimed.append(job_id)
+        conn.commit()
+    return claimed
+
+
+def prune_job_claims():
+    """Delete run claims older than JOB_CLAIM_RETENTION_HOURS"""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=JOB_CLAIM_RETENTION_HOURS)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM job_claims WHERE claimed_at < ?", (cutoff,))
+        conn.commit()
+
+
+def get_remote_running_jobs(node_id: str) -> List[int]:
+    """IDs of jobs with a run in progress on another live scheduler node"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT DISTINCT job_runs.job_id FROM job_runs
+               JOIN scheduler_nodes ON scheduler_nodes.node_id = job_runs.node_id
+               WHERE job_runs.finish_at IS NULL AND job_runs.node_id != ? AND scheduler_nodes.heartbeat_at >= ?""",
+            (node_id, _lease_cutoff())
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def heartbeat_runs(run_ids: List[int]):
+    """Record that runs are still being tracked by their scheduler, in one UPDATE"""
+    if not run_ids:
+        return
+    placeholders = ','.join('?' * len(run_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE job_runs SET heartbeat_at = ? WHERE id IN ({placeholders}) AND finish_at IS NULL",
+            (datetime.now(timezone.utc).replace(tzinfo=None), *run_ids)
+        )
+        conn.commit()
+
+
+def reap_orphaned_runs(node_id: Optional[str] = None,
+                       stop_run: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """
+    Abort the unfinished runs without a heartbeat for RUN_HEARTBEAT_TIMEOUT_SECONDS,
+    in one transaction.
+
+    Runs of a scheduler node that started less than that long ago are left
+    alone: it may still be reattaching them. Supervised runs (pid_start_time
+    set) can outlive their scheduler, so they are only aborted once their
+    node has restarted since their last heartbeat (it reattaches the live
+    ones), or when they belong to node_id - the calling node, which can
+    reach their processes - after stop_run(run) has signalled them. Returns
+    the aborted runs (id, job_id, node_id, heartbeat_at).
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(seconds=RUN_HEARTBEAT_TIMEOUT_SECONDS)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        # Take the write lock first, so a run finishing meanwhile isn't aborted on top
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute(
+            """SELECT job_runs.id, job_runs.job_id, job_runs.node_id, job_runs.start_at, job_runs.heartbeat_at,
+                      job_runs.pid, job_runs.pid_start_time,
+                      COALESCE(scheduler_nodes.started_at > job_runs.heartbeat_at, 0) AS node_restarted
+               FROM job_runs
+               LEFT JOIN scheduler_nodes ON scheduler_nodes.node_id = job_runs.node_id
+               WHERE job_runs.finish_at IS NULL AND job_runs.heartbeat_at < ?
+                 AND (scheduler_nodes.started_at IS NULL OR scheduler_nodes.started_at < ?)""",
+            (cutoff, cutoff)
+        )
+        runs = []
+        for row in cursor.fetchall():
+            run = dict(row)
+            if run['pid_start_time'] is not None and not run['node_restarted']:
+                if node_id is None or run['node_id'] != node_id or stop_run is None:
+                    continue  # May still be running on a node that is down
+                if run['pid']:
+                    stop_run(run)
+            runs.append(run)
+        if not runs:
+            conn.rollback()
+            return runs
+        cursor.executemany(
+            "INSERT INTO run_logs (run_id, timestamp, log_line) VALUES (?, ?, ?)",
+            [(run['id'], now, "Job aborted - its scheduler stopped tracking it (no heartbeat)") for run in runs]
+        )
+        cursor.executemany(
+            "UPDATE job_runs SET finish_at = ?, duration = ?, result = 'aborted', pid = NULL WHERE id = ?",
+            [(now, int((now - datetime.fromisoformat(run['start_at'])).total_seconds()), run['id']) for run in runs]
+        )
+        conn.commit()
+    for run in runs:
+        for key in ('start_at', 'pid', 'pid_start_time', 'node_restarted'):
+            del run[key]
+    return runs
+
+
+def create_commands(commands: List[dict]) -> List[int]:
+    """Queue commands ({'action', 'job_id', 'run_id', 'signal', 'node_id'}) in one transaction; returns their IDs"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    command_ids = []
+    with get_db() as conn:
+        cursor = conn.cursor()
+        for command in commands:
+            cursor.execute(
+                "INSERT INTO commands (action, job_id, run_id, signal, node_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (command['action'], command.get('job_id'), command.get('run_id'), command.get('signal'),
+                 command.get('node_id'), now)
+            )
+            command_ids.append(cursor.lastrowid)
+        conn.commit()
+    return command_ids
+
+
+def get_pending_commands(node_id: str) -> List[dict]:
+    """Get the pending commands for a scheduler node, and those for any node, oldest first"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM commands WHERE status = 'pending' AND (node_id = ? OR node_id IS NULL) ORDER BY id",
+            (node_id,)
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def claim_command(command_id: int, node_id: str) -> bool:
+    """Take a pending command for a scheduler node; returns False if it was taken or withdrawn already"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE commands SET status = 'running', node_id = ? WHERE id = ? AND status = 'pending'",
+            (node_id, command_id)
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def finish_command(command_id: int, success: bool, result: dict):
+    """Record a command's outcome (result is stored as JSON)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE commands SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+            ('done' if success else 'error', json.dumps(result),
+             datetime.now(timezone.utc).replace(tzinfo=None), command_id)
+        )
+        conn.commit()
+
+
+def get_commands(command_ids: List[int]) -> Dict[int, dict]:
+    """Get commands by ID, with result decoded"""
+    placeholders = ','.join('?' * len(command_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM commands WHERE id IN ({placeholders})", command_ids)
+        commands = {}
+        for row in cursor.fetchall():
+            command = dict(row)
+            command['result'] = json.loads(command['result']) if command['result'] else None
+            commands[command['id']] = command
+        return commands
+
+
+def expire_commands(command_ids: List[int]):
+    """Withdraw commands that are still pending, so no scheduler carries them out late"""
+    placeholders = ','.join('?' * len(command_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"UPDATE commands SET status = 'expired', finished_at = ? WHERE id IN ({placeholders}) AND status = 'pending'",
+            (datetime.now(timezone.utc).replace(tzinfo=None), *command_ids)
+        )
+        conn.commit()
+
+
+def wake_schedulers():
+    """Tell the schedulers on this host that commands are waiting (best effort)"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return
+    try:
+        names = [name for name in os.listdir(COMMAND_WAKE_DIR) if name.endswith('.sock')]
+    except OSError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+        sock.setblocking(False)
+        for name in names:
+            try:
+                sock.sendto(b'1', os.path.join(COMMAND_WAKE_DIR, name))
+            except OSError:
+                pass  # Stale socket of a stopped scheduler, or its queue is full (it's awake already)
+
+
+def prune_commands():
+    """Delete commands older than COMMAND_RETENTION_HOURS"""
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=COMMAND_RETENTION_HOURS)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM commands WHERE created_at < ?", (cutoff,))
+        conn.commit()
+
+
+def remove_retry(retry_id: int) -> bool:
+    """Remove a retry from the queue; returns False if it was already gone (taken by another scheduler node)"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM retry_queue WHERE id = ?", (retry_id,))
         conn.commit()
+        return cursor.rowcount == 1
 
 
 def clear_retries_for_job(job_id: int):
@@ -209,13 +922,33 @@ def clear_retries_for_job(job_id: int):
         conn.commit()
 
 
-def update_run_pid(run_id: int, pid: int):
-    """Update the PID for a running job"""
+@metrics.timed(DB_WRITE_SECONDS, 'update_run_pid')
+def update_run_pid(run_id: int, pid: int, pid_start_time: Optional[int] = None):
+    """Update the PID (and its process start time, if known) for a running job"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE job_runs SET pid = ?, pid_start_time = ? WHERE id = ?",
+            (pid, pid_start_time, run_id)
+        )
+        conn.commit()
+
+
+def set_run_worker(run_id: int, worker_id: str):
+    """Record the remote worker a run was sent to"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE job_runs SET worker_id = ? WHERE id = ?", (worker_id, run_id))
+        conn.commit()
+
+
+def record_run_resources(run_id: int, cpu_seconds: Optional[float], max_rss_kb: Optional[int]):
+    """Record a finished run's CPU time (user + system) and peak memory"""
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "UPDATE job_runs SET pid = ? WHERE id = ?",
-            (pid, run_id)
+            "UPDATE job_runs SET cpu_seconds = ?, max_rss_kb = ? WHERE id = ?",
+            (cpu_seconds, max_rss_kb, run_id)
         )
         conn.commit()
 
@@ -232,6 +965,7 @@ def get_run_pid(run_id: int) -> Optional[int]:
         return row['pid'] if row else None
 
 
+@metrics.timed(DB_WRITE_SECONDS, 'abort_run')
 def abort_run(run_id: int, duration: int):
     """Mark a run as aborted"""
     with get_db() as conn:
@@ -243,6 +977,164 @@ def abort_run(run_id: int, duration: int):
         conn.commit()
 
 
+def set_jobs_active(job_ids: List[int], active: bool) -> Dict[int, dict]:
+    """
+    Enable or disable jobs in one transaction.
+
+    Returns {job ID: {'name', 'changed'}} for the jobs that exist.
+    """
+    placeholders = ','.join('?' * len(job_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, name, active FROM jobs WHERE id IN ({placeholders})", job_ids)
+        jobs = {row['id']: {'name': row['name'], 'changed': bool(row['active']) != active}
+                for row in cursor.fetchall()}
+        cursor.execute(
+            f"UPDATE jobs SET active = ? WHERE id IN ({placeholders}) AND active != ?",
+            (int(active), *job_ids, int(active))
+        )
+        conn.commit()
+    return jobs
+
+
+def get_running_runs(job_ids: List[int]) -> List[dict]:
+    """Get the running runs (with start_at but no finish_at) of the given jobs"""
+    placeholders = ','.join('?' * len(job_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM job_runs WHERE job_id IN ({placeholders}) AND start_at IS NOT NULL AND finish_at IS NULL",
+            job_ids
+        )
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def abort_runs(durations: Dict[int, int], log_line: str):
+    """Mark runs ({run ID: duration}) as aborted, adding log_line to each, in one transaction"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO run_logs (run_id, timestamp, log_line) VALUES (?, ?, ?)",
+            [(run_id, now, log_line) for run_id in durations]
+        )
+        cursor.executemany(
+            "UPDATE job_runs SET finish_at = ?, duration = ?, result = 'aborted', pid = NULL WHERE id = ?",
+            [(now, duration, run_id) for run_id, duration in durations.items()]
+        )
+        conn.commit()
+
+
+def get_runs_page(job_id: int, before_id: Optional[int] = None, after_id: Optional[int] = None,
+                  limit: int = 50) -> Tuple[List[dict], bool]:
+    """
+    Get one page of a job's runs, newest first, using the run ID as keyset cursor.
+
+    before_id pages towards older runs, after_id towards newer ones. Returns
+    (runs, has_more), where has_more tells whether there are further runs in
+    the paging direction.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if after_id is not None:
+            cursor.execute(
+                "SELECT * FROM job_runs WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (job_id, after_id, limit + 1)
+            )
+            rows = cursor.fetchall()
+            runs = [dict(row) for row in rows[:limit]][::-1]
+        else:
+            # A plain range on id (rather than "? IS NULL OR ...") lets SQLite seek in the index
+            cursor.execute(
+                "SELECT * FROM job_runs WHERE job_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (job_id, before_id if before_id is not None else 2 ** 63 - 1, limit + 1)
+            )
+            rows = cursor.fetchall()
+            runs = [dict(row) for row in rows[:limit]]
+        return runs, len(rows) > limit
+
+
+def get_logs_page(run_id: int, after_id: Optional[int] = None, before_id: Optional[int] = None,
+                  limit: int = 1000) -> Tuple[List[dict], bool]:
+    """
+    Get one page of a run's log lines in output order, using the rowid as keyset cursor.
+
+    Lines are returned with their rowid as 'id'. after_id pages forward (the
+    default, from the first line), before_id pages backwards. Returns
+    (logs, has_more), where has_more tells whether there are further lines
+    in the paging direction.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if before_id is not None:
+            cursor.execute(
+                "SELECT rowid AS id, * FROM run_logs WHERE run_id = ? AND rowid < ? ORDER BY rowid DESC LIMIT ?",
+                (run_id, before_id, limit + 1)
+            )
+            rows = cursor.fetchall()
+            logs = [dict(row) for row in rows[:limit]][::-1]
+        else:
+            cursor.execute(
+                "SELECT rowid AS id, * FROM run_logs WHERE run_id = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (run_id, after_id or 0, limit + 1)
+            )
+            rows = cursor.fetchall()
+            logs = [dict(row) for row in rows[:limit]]
+        return logs, len(rows) > limit
+
+
+def iter_logs_page(run_id: int, after_id: Optional[int] = None, before_id: Optional[int] = None,
+                   limit: int = 1000) -> Iterator[dict]:
+    """
+    Yield the same page of log lines as get_logs_page, in output order, without building a list.
+
+    Lines are read in batches of STREAM_BATCH_SIZE, so memory use stays flat
+    whatever the page size. Use has_more_logs() with the first or last
+    yielded ID to check for further lines.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        upper = 2 ** 63 - 1
+        if before_id is not None:
+            # Find where the page starts using the index alone, then read it forwards
+            cursor.execute(
+                "SELECT MIN(id) FROM (SELECT rowid AS id FROM run_logs WHERE run_id = ? AND rowid < ? "
+                "ORDER BY rowid DESC LIMIT ?)",
+                (run_id, before_id, limit)
+            )
+            first_id = cursor.fetchone()[0]
+            if first_id is None:
+                return
+            after_id, upper = first_id - 1, before_id
+
+        last_id = after_id or 0
+        remaining = limit
+        while remaining > 0:
+            batch_size = min(remaining, STREAM_BATCH_SIZE)
+            cursor.execute(
+                "SELECT rowid AS id, * FROM run_logs WHERE run_id = ? AND rowid > ? AND rowid < ? ORDER BY rowid LIMIT ?",
+                (run_id, last_id, upper, batch_size)
+            )
+            rows = cursor.fetchall()
+            for row in rows:
+                yield dict(row)
+            if len(rows) < batch_size:
+                return
+            remaining -= len(rows)
+            last_id = rows[-1]['id']
+
+
+def has_more_logs(run_id: int, after_id: Optional[int] = None, before_id: Optional[int] = None) -> bool:
+    """Check whether a run has log lines after after_id (or before before_id)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        if before_id is not None:
+            cursor.execute("SELECT 1 FROM run_logs WHERE run_id = ? AND rowid < ? LIMIT 1", (run_id, before_id))
+        else:
+            cursor.execute("SELECT 1 FROM run_logs WHERE run_id = ? AND rowid > ? LIMIT 1", (run_id, after_id or 0))
+        return cursor.fetchone() is not None
+
+
 def get_running_run(run_id: int) -> Optional[dict]:
     """Get a running job run by ID (with start_at but no finish_at)"""
     with get_db() as conn:
@@ -253,3 +1145,223 @@ def get_running_run(run_id: int) -> Optional[dict]:
         )
         row = cursor.fetchone()
         return dict(row) if row else None
+
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """A job's tags column (comma-separated) as a list"""
+    return tags.split(',') if tags else []
+
+
+def get_state_version() -> int:
+    """Return the change counter bumped on every change to jobs, runs or dependencies"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version FROM state_version WHERE id = 1")
+        row = cursor.fetchone()
+        return row['version'] if row else 0
+
+
+def iter_job_list(since: Optional[int] = None) -> Iterator[dict]:
+    """
+    Yield all jobs (with since, only those changed after that state version)
+    with their latest run duration, running state and upstream job IDs, in
+    batches of STREAM_BATCH_SIZE jobs.
+
+    Each job's latest run is found with an index seek on (job_id, start_at), so
+    the cost doesn't grow with run history (a window function over job_runs
+    has to scan every run).
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        changed, changed_params = ('AND jobs.version > ?', (since,)) if since is not None else ('', ())
+        last_id = 0
+        while True:
+            cursor.execute(f"""
+                SELECT jobs.*,
+                    (SELECT duration FROM job_runs
+                     WHERE job_runs.job_id = jobs.id
+                     ORDER BY start_at DESC LIMIT 1) AS last_duration,
+                    EXISTS (SELECT 1 FROM job_runs
+                            WHERE job_runs.job_id = jobs.id AND start_at IS NOT NULL AND finish_at IS NULL) AS running,
+                    (SELECT GROUP_CONCAT(depends_on_job_id) FROM job_dependencies
+                     WHERE job_dependencies.job_id = jobs.id) AS depends_on
+                FROM jobs
+                WHERE jobs.id > ? {changed}
+                ORDER BY jobs.id
+                LIMIT ?
+            """, (last_id, *changed_params, STREAM_BATCH_SIZE))
+            rows = cursor.fetchall()
+            for row in rows:
+                job = dict(row)
+                job['running'] = bool(job['running'])
+                job['depends_on'] = sorted(int(i) for i in job['depends_on'].split(',')) if job['depends_on'] else []
+                job['tags'] = split_tags(job['tags'])
+                yield job
+            if len(rows) < STREAM_BATCH_SIZE:
+                return
+            last_id = rows[-1]['id']
+
+
+def get_job_list() -> List[dict]:
+    """Return all jobs as built by iter_job_list()"""
+    return list(iter_job_list())
+
+
+def get_deleted_jobs(since: int) -> List[int]:
+    """Return the IDs of jobs deleted after state version since"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT job_id FROM deleted_jobs WHERE version > ? ORDER BY job_id", (since,))
+        return [row['job_id'] for row in cursor.fetchall()]
+
+
+def get_job_stats(job_id: int, period: str, since: datetime) -> List[dict]:
+    """Get a job's rollup rows for period ('hour' or 'day') with buckets starting at or after since"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM job_run_stats WHERE job_id = ? AND period = ? AND bucket >= ? ORDER BY bucket",
+            (job_id, period, since.strftime(STATS_PERIODS[period]))
+        )
+        stats = []
+        for row in cursor.fetchall():
+            row = dict(row)
+            row['histogram'] = json.loads(row['histogram'])
+            stats.append(row)
+        return stats
+
+
+def get_daily_stats(since: datetime) -> Dict[int, List[dict]]:
+    """Get every job's daily rollups since a date as {job_id: [rows]} (without histograms)"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT job_id, bucket, runs, failures, aborted, duration_count, duration_sum
+            FROM job_run_stats
+            WHERE period = 'day' AND bucket >= ?
+            ORDER BY job_id, bucket
+        """, (since.strftime(STATS_PERIODS['day']),))
+        stats = {}
+        for row in cursor.fetchall():
+            stats.setdefault(row['job_id'], []).append(dict(row))
+        return stats
+
+
+def get_dependency_graph() -> Dict[int, List[int]]:
+    """Return all dependencies as {job_id: [upstream job IDs]}"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT job_id, depends_on_job_id FROM job_dependencies ORDER BY job_id, depends_on_job_id")
+        graph = {}
+        for row in cursor.fetchall():
+            graph.setdefault(row['job_id'], []).append(row['depends_on_job_id'])
+        return graph
+
+
+def validate_dependencies(job_id: Optional[int], upstream_ids: List[int]):
+    """
+    Check that upstream_ids exist and that depending on them would not create a cycle.
+
+    job_id is None for a job that doesn't exist yet (it cannot be part of a cycle).
+    Raises ValueError describing the problem.
+    """
+    if not upstream_ids:
+        return
+
+    if job_id is not None and job_id in upstream_ids:
+        raise ValueError("A job cannot depend on itself")
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(upstream_ids))
+        cursor.execute(f"SELECT id FROM jobs WHERE id IN ({placeholders})", upstream_ids)
+        missing = set(upstream_ids) - {row['id'] for row in cursor.fetchall()}
+        if missing:
+            raise ValueError(f"Unknown upstream job ID(s): {', '.join(str(i) for i in sorted(missing))}")
+
+    if job_id is None:
+        return
+
+    # Walk upstream from the proposed dependencies; reaching job_id means a cycle
+    graph = get_dependency_graph()
+    graph[job_id] = list(upstream_ids)
+    stack = list(upstream_ids)
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current == job_id:
+            raise ValueError("Dependencies would create a cycle")
+        if current in seen:
+            continue
+        seen.add(current)
+        stack.extend(graph.get(current, []))
+
+
+def set_job_dependencies(job_id: int, upstream_ids: List[int]):
+    """Replace the upstream dependencies of a job"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM job_dependencies WHERE job_id = ?", (job_id,))
+        cursor.executemany(
+            "INSERT INTO job_dependencies (job_id, depends_on_job_id) VALUES (?, ?)",
+            [(job_id, upstream_id) for upstream_id in sorted(set(upstream_ids))]
+        )
+        conn.commit()
+
+
+def get_succeeded_jobs(job_ids: List[int], since: Optional[str] = None) -> List[int]:
+    """
+    IDs among job_ids whose latest finished run succeeded - and finished
+    after since (a naive UTC timestamp), if given.
+    """
+    if not job_ids:
+        return []
+    with get_db() as conn:
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(job_ids))
+        cursor.execute(f"""
+            SELECT job_id, result, finish_at FROM job_runs AS r
+            WHERE id = (SELECT MAX(id) FROM job_runs WHERE job_id = r.job_id AND finish_at IS NOT NULL)
+              AND job_id IN ({placeholders})
+        """, list(job_ids))
+        since_time = datetime.fromisoformat(str(since)) if since else None
+        return [row['job_id'] for row in cursor.fetchall()
+                if row['result'] == 'success'
+                and (since_time is None or datetime.fromisoformat(str(row['finish_at'])) > since_time)]
+
+
+def create_dag_run(root_job_id: int, nodes_total: int, node_id: Optional[str] = None) -> int:
+    """Create a new DAG run record (coordinated by scheduler node node_id) and return its ID"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO dag_runs (root_job_id, start_at, nodes_total, node_id) VALUES (?, ?, ?, ?)",
+            (root_job_id, datetime.now(timezone.utc).replace(tzinfo=None), nodes_total, node_id)
+        )
+        conn.commit()
+        return cursor.lastrowid
+
+
+def finish_dag_run(dag_run_id: int, result: str, duration: int, nodes_failed: int, nodes_skipped: int):
+    """Update DAG run with finish time, duration, result and node outcome counts"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """UPDATE dag_runs SET finish_at = ?, duration = ?, result = ?, nodes_failed = ?, nodes_skipped = ?
+               WHERE id = ?""",
+            (datetime.now(timezone.utc).replace(tzinfo=None), duration, result, nodes_failed, nodes_skipped, dag_run_id)
+        )
+        conn.commit()
+
+
+def abort_unfinished_dag_runs(node_id: Optional[str] = None):
+    """Mark DAG runs left unfinished by a previous scheduler session (of node_id, if given) as failed"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE dag_runs SET finish_at = ?, result = 'fail' WHERE finish_at IS NULL"
+            + (" AND node_id = ?" if node_id is not None else ""),
+            (datetime.now(timezone.utc).replace(tzinfo=None), *([node_id] if node_id is not None else []))
+        )
+        conn.commit()
@@ -0,0 +1,341 @@
+"""
+Warm forkserver for Python jobs.
+
+A long-lived Python process imports a configurable set of modules once and
+then forks a child per job run. The child runs the job script (or module) as
+__main__ with its stdout/stderr connected to a pipe owned by the scheduler,
+so output goes through the normal capture path. This skips interpreter
+startup and the preloaded imports on every run.
+
+The server is started by the scheduler (see ForkServer) and speaks a tiny
+line-based JSON protocol over a Unix socket (one JSON object per line):
+
+    client -> server: {"argv": [...], "module": false, "cwd": ..., "env": {...}}
+                      (the pipe's write end is passed alongside with SCM_RIGHTS)
+    server -> client: {"pid": 1234}
+    server -> client: {"returncode": 0}   (when the child exits)
+
+Unix only - on other platforms the scheduler falls back to plain exec.
+"""
+import os
+import sys
+import json
+import socket
+import signal
+import logging
+import argparse
+import tempfile
+import threading
+import selectors
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Interpreter names stripped from a job path before running it in the forkserver
+PYTHON_NAMES = ('python', 'python3', os.path.basename(sys.executable))
+
+
+def is_supported() -> bool:
+    """Check whether the forkserver can run on this platform"""
+    return hasattr(os, 'fork') and hasattr(socket, 'send_fds') and hasattr(socket, 'AF_UNIX')
+
+
+def parse_python_command(argv: List[str]) -> Optional[Dict]:
+    """
+    Turn a job's argv into a forkserver request.
+
+    Accepts `script.py args`, `python script.py args`, `python -u script.py args`
+    and `python -m module args`. Returns None if the command is not a plain
+    Python script invocation (the caller should then fall back to exec).
+    """
+    if not argv:
+        return None
+
+    args = list(argv)
+    if os.path.basename(args[0]) in PYTHON_NAMES:
+        args.pop(0)
+        # Skip interpreter flags that don't change how the script runs here
+        while args and args[0] in ('-u', '-B', '-E', '-s', '-S', '-O', '-OO'):
+            args.pop(0)
+        if args and args[0] == '-m':
+            if len(args) < 2:
+                return None
+            return {'argv': args[1:], 'module': True}
+        if not args or args[0].startswith('-'):
+            return None
+        return {'argv': args, 'module': False}
+
+    if args[0].endswith('.py'):
+        return {'argv': args, 'module': False}
+
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Server side (runs inside the warm process)
+# ---------------------------------------------------------------------------
+
+def _run_child(request: Dict, output_fd: int, close_fds: List[int]):
+    """Child side of a fork: become the job and never return"""
+    exit_code = 1
+    try:
+        for fd in close_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+        os.setsid()
+        signal.set_wakeup_fd(-1)
+        for sig in (signal.SIGCHLD, signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+
+        os.dup2(output_fd, 1)
+        os.dup2(output_fd, 2)
+        os.close(output_fd)
+
+        if request.get('cwd'):
+            os.chdir(request['cwd'])
+        if request.get('env'):
+            os.environ.update(request['env'])
+
+        # Don't share the parent's random state between runs
+        if 'random' in sys.modules:
+            sys.modules['random'].seed()
+
+        import runpy
+        argv = request['argv']
+        sys.argv = list(argv)
+        try:
+            if request.get('module'):
+                sys.path[0] = os.getcwd()
+                runpy.run_module(argv[0], run_name='__main__', alter_sys=True)
+            else:
+                sys.path[0] = os.path.dirname(os.path.abspath(argv[0]))
+                runpy.run_path(argv[0], run_name='__main__')
+            exit_code = 0
+        except SystemExit as e:
+            if e.code is None:
+                exit_code = 0
+            elif isinstance(e.code, int):
+                exit_code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                exit_code = 1
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(exit_code)
+
+
+def _read_request(conn: socket.socket):
+    """Read one request line and the attached output fd from a client connection"""
+    data, fds, _flags, _addr = socket.recv_fds(conn, 65536, 1)
+    while data and not data.endswith(b'\n'):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    if not data or not fds:
+        for fd in fds:
+            os.close(fd)
+        return None, None
+    return json.loads(data), fds[0]
+
+
+def serve(socket_path: str, preload: List[str]):
+    """Preload modules, then accept run requests and fork a child per request"""
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception as e:
+            print(f"forkserver: failed to preload '{module}': {e}", file=sys.stderr)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(64)
+
+    # SIGCHLD wakes the selector through a self-pipe so children are reaped promptly
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, 'accept')
+    selector.register(wakeup_r, selectors.EVENT_READ, 'wakeup')
+
+    children: Dict[int, socket.socket] = {}
+    parent_pid = os.getppid()
+
+    while True:
+        for key, _mask in selector.select(timeout=1.0):
+            if key.data == 'accept':
+                conn, _ = listener.accept()
+                try:
+                    request, output_fd = _read_request(conn)
+                except (OSError, ValueError) as e:
+                    print(f"forkserver: bad request: {e}", file=sys.stderr)
+                    conn.close()
+                    continue
+                if request is None:
+                    conn.close()
+                    continue
+
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    close_fds = [listener.fileno(), wakeup_r, wakeup_w, conn.fileno()]
+                    close_fds.extend(c.fileno() for c in children.values())
+                    _run_child(request, output_fd, close_fds)
+
+                os.close(output_fd)
+                children[pid] = conn
+                try:
+                    conn.sendall(json.dumps({'pid': pid}).encode() + b'\n')
+                except OSError:
+                    pass
+            else:
+                try:
+                    while os.read(wakeup_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+
+        # Reap any finished children and report their exit status
+        while children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid, None)
+            if conn is not None:
+                try:
+                    returncode = os.waitstatus_to_exitcode(status)
+                    conn.sendall(json.dumps({'returncode': returncode}).encode() + b'\n')
+                except OSError:
+                    pass
+                finally:
+                    conn.close()
+
+        # Exit when the scheduler that started us goes away
+        if os.getppid() != parent_pid:
+            break
+
+
+# ---------------------------------------------------------------------------
+# Client side (used by the scheduler)
+# ---------------------------------------------------------------------------
+
+class ForkedProcess:
+    """Minimal Popen-like handle for a job forked by the forkserver"""
+
+    def __init__(self, conn: socket.socket, stdout):
+        self._conn = conn
+        self._reader = conn.makefile('r', encoding='utf-8')
+        self.stdout = stdout
+        self.returncode = None
+
+        line = self._reader.readline()
+        if not line:
+            self._reader.close()
+            conn.close()
+            stdout.close()
+            raise RuntimeError("forkserver closed the connection before starting the job")
+        self.pid = json.loads(line)['pid']
+
+    def wait(self) -> int:
+        """Block until the job exits and return its exit code"""
+        if self.returncode is None:
+            line = self._reader.readline()
+            # Lost the forkserver mid-run: treat like a killed process
+            self.returncode = json.loads(line)['returncode'] if line else -signal.SIGKILL
+            self._reader.close()
+            self._conn.close()
+        return self.returncode
+
+
+class ForkServer:
+    """Starts and talks to a warm forkserver process"""
+
+    def __init__(self, preload: List[str]):
+        self.preload = preload
+        self.process = None
+        self.socket_path = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self.process is not None and self.process.poll() is None:
+            return
+
+        self.socket_path = os.path.join(tempfile.mkdtemp(prefix='cronishe-fs-'), 'forkserver.sock')
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--socket', self.socket_path,
+             '--preload', ','.join(self.preload)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+        )
+
+        # Wait for the socket to appear (preloading heavy modules can take a while)
+        deadline = time.monotonic() + 30
+        while not os.path.exists(self.socket_path):
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("forkserver failed to start")
+            time.sleep(0.01)
+        logger.info(f"Forkserver started with PID {self.process.pid} (preloaded: {', '.join(self.preload) or 'none'})")
+
+    def spawn(self, request: Dict) -> ForkedProcess:
+        """Fork a new job from the warm process, returning a handle with its output pipe"""
+        with self._lock:
+            self._ensure_started()
+            socket_path = self.socket_path
+
+        read_fd, write_fd = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(socket_path)
+            socket.send_fds(conn, [json.dumps(request).encode() + b'\n'], [write_fd])
+        except OSError:
+            conn.close()
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        stdout = os.fdopen(read_fd, 'r', buffering=1, errors='replace')
+        return ForkedProcess(conn, stdout)
+
+    def stop(self):
+        """Terminate the forkserver process"""
+        with self._lock:
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
+            self.process = None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cronishe warm forkserver for Python jobs')
+    parser.add_argument('--socket', required=True, help='Unix socket path to listen on')
+    parser.add_argument('--preload', default='', help='Comma-separated modules to import up front')
+    args = parser.parse_args()
+
+    try:
+        serve(args.socket, [m.strip() for m in args.preload.split(',') if m.strip()])
+    finally:
+        try:
+            os.unlink(args.socket)
+        except OSError:
+            pass
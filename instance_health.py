@@ -0,0 +1,128 @@
+"""
+Health tracking and circuit breaking for the manager's instances.
+
+Each instance has an InstanceHealth record, fed by the manager's background
+health checks and by the outcome of every request sent through the
+instance's session (see BreakerAdapter). After `threshold` consecutive
+connection failures, timeouts or server errors (5xx) the circuit opens:
+requests to the instance then fail immediately with CircuitOpenError
+instead of waiting out a timeout. Only the background checks contact an instance whose circuit is
+open, and the first one that succeeds closes it again - so page views and
+proxied calls never pay for probing a dead instance.
+"""
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to an instance whose circuit is open"""
+
+
+class InstanceHealth:
+    """Recent request outcomes and circuit state of one instance"""
+
+    # Outcomes kept for the latency and error rate figures
+    WINDOW = 50
+
+    def __init__(self, threshold: int):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=self.WINDOW)  # (succeeded, latency in seconds or None)
+        self.consecutive_failures = 0
+        self.open_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_ok_at: Optional[float] = None
+        self.last_check_at: Optional[float] = None
+        # Scheduler part of the instance's last /api/health response (None: unknown)
+        self.scheduler: Optional[dict] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.open_since is not None
+
+    def record_response(self, latency: float, ok: bool = True, error: Optional[str] = None) -> bool:
+        """
+        Record a response from the instance (ok False for server errors).
+
+        A good response resets the failure count and closes the circuit;
+        returns True if it was open. A server error counts as a failure
+        towards the threshold, like a timeout: an instance answering every
+        request with a 5xx is no more usable than one that doesn't answer.
+        """
+        with self._lock:
+            if not ok:
+                self._fail((False, latency), error)
+                return False
+            self._outcomes.append((True, latency))
+            self.consecutive_failures = 0
+            self.last_ok_at = time.time()
+            was_open = self.open_since is not None
+            self.open_since = None
+            return was_open
+
+    def record_failure(self, error: str) -> bool:
+        """Record a connection failure or timeout; returns True if this opened the circuit"""
+        with self._lock:
+            return self._fail((False, None), error)
+
+    def _fail(self, outcome: tuple, error: Optional[str]) -> bool:
+        self._outcomes.append(outcome)
+        self.consecutive_failures += 1
+        self.last_error = error
+        if self.open_since is None and self.consecutive_failures >= self.threshold:
+            self.open_since = time.time()
+            return True
+        return False
+
+    def summary(self) -> dict:
+        """Circuit state, latency percentiles (ms) and error rate over the last WINDOW outcomes"""
+        with self._lock:
+            outcomes = list(self._outcomes)
+            summary = {
+                'circuit': 'open' if self.open_since is not None else 'closed',
+                'open_since': self.open_since,
+                'consecutive_failures': self.consecutive_failures,
+                'last_error': self.last_error,
+                'last_ok_at': self.last_ok_at,
+                'last_check_at': self.last_check_at,
+                'scheduler': self.scheduler,
+            }
+        latencies = sorted(latency for ok, latency in outcomes if latency is not None)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 1)
+
+        summary.update(
+            latency_p50_ms=percentile(50),
+            latency_p95_ms=percentile(95),
+            error_rate=round(sum(not ok for ok, _ in outcomes) / len(outcomes), 3) if outcomes else None,
+        )
+        return summary
+
+
+class BreakerAdapter(HTTPAdapter):
+    """HTTPAdapter that records outcomes in an InstanceHealth and fails fast while its circuit is open"""
+
+    def __init__(self, health: InstanceHealth, **kwargs):
+        self.health = health
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.health.is_open:
+            raise CircuitOpenError(f"{request.url}: instance is down (circuit open)", request=request)
+        start = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.health.record_failure(str(e))
+            raise
+        ok = response.status_code < 500
+        self.health.record_response(time.perf_counter() - start, ok, None if ok else f"HTTP {response.status_code}")
+        return response
@@ -0,0 +1,63 @@
+"""
+How job processes are started and stopped, shared by the scheduler and the
+remote workers (worker.py).
+"""
+import json
+import os
+import shlex
+import signal
+import subprocess
+from typing import Dict
+
+
+def build_popen_args(job: Dict) -> Dict:
+    """
+    Build subprocess.Popen arguments for a job according to its exec_mode.
+
+    'shell' jobs run through the system shell so pipes and redirects work.
+    'exec' jobs are split into argv with shlex and executed directly, which
+    saves the intermediate shell process and delivers signals straight to the job.
+    'python' jobs normally go through the forkserver; here they fall back to exec.
+    All modes honour the optional per-job env (JSON object) and cwd.
+    """
+    exec_mode = job.get('exec_mode') or 'shell'
+
+    if exec_mode in ('exec', 'python'):
+        args = shlex.split(job['path'], posix=os.name != 'nt')
+        if not args:
+            raise ValueError("Job path is empty")
+        popen_args = {'args': args, 'shell': False}
+    elif exec_mode == 'shell':
+        popen_args = {'args': job['path'], 'shell': True}
+    else:
+        raise ValueError(f"Unknown exec_mode '{exec_mode}'")
+
+    if job.get('env'):
+        env = os.environ.copy()
+        env.update({str(k): str(v) for k, v in json.loads(job['env']).items()})
+        popen_args['env'] = env
+
+    if job.get('cwd'):
+        popen_args['cwd'] = job['cwd']
+
+    # Give each job its own process group so stopping it never signals the scheduler
+    if os.name != 'nt':
+        popen_args['start_new_session'] = True
+
+    return popen_args
+
+
+def stop_process(pid: int, sig: int = signal.SIGTERM):
+    """Signal a job's whole process tree (jobs lead their own process group on Unix)"""
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)], capture_output=True, check=False)
+        return
+    try:
+        os.killpg(pid, sig)
+    except ProcessLookupError:
+        pass
+    except OSError:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,120 @@
+"""
+Shared live tail of run logs for streaming endpoints.
+
+Every viewer of a running job's logs subscribes to a per-run tail. One
+background thread per run polls run_logs for rows after its rowid cursor
+and fans new lines out to all subscribers, so N viewers of the same run
+cost one DB query per poll interval instead of N. The thread stops when
+the run has finished (after delivering its last lines) or when the last
+subscriber leaves.
+"""
+import os
+import time
+import queue
+import threading
+from typing import Dict, List
+
+from database import get_logs_page, get_running_run
+
+
+# Seconds between polls of run_logs for a run that has viewers
+POLL_INTERVAL = float(os.environ.get('LOG_TAIL_INTERVAL', '0.5'))
+
+# Batches buffered per subscriber before it is dropped as too slow
+# (SSE clients reconnect and resume from their Last-Event-ID)
+MAX_PENDING = 100
+
+# Maximum log lines read per poll
+BATCH_SIZE = 1000
+
+
+class Subscriber:
+    """One viewer: a queue of log batches (lists of rows), then None when the run has finished"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=MAX_PENDING)
+        # Set if the viewer fell too far behind and was unsubscribed
+        self.dropped = False
+
+
+class RunTail:
+    """Polls one run's log lines and distributes them to its subscribers"""
+
+    def __init__(self, hub: 'LogTailHub', run_id: int, cursor: int):
+        self.hub = hub
+        self.run_id = run_id
+        # rowid of the last line delivered to subscribers
+        self.cursor = cursor
+        self.subscribers: List[Subscriber] = []
+        self.thread = threading.Thread(target=self._poll, name=f'log-tail-{run_id}', daemon=True)
+
+    def _broadcast(self, item):
+        """Deliver item to every subscriber (caller holds the hub lock)"""
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(item)
+            except queue.Full:
+                subscriber.dropped = True
+                self.subscribers.remove(subscriber)
+
+    def _poll(self):
+        while True:
+            # Check for completion before reading, so lines written before the run finished aren't missed
+            finished = get_running_run(self.run_id) is None
+            logs, has_more = get_logs_page(self.run_id, after_id=self.cursor, limit=BATCH_SIZE)
+
+            with self.hub.lock:
+                if logs:
+                    self.cursor = logs[-1]['id']
+                    self._broadcast(logs)
+                done = finished and not has_more
+                if done:
+                    self._broadcast(None)
+                if done or not self.subscribers:
+                    del self.hub.tails[self.run_id]
+                    return
+
+            if not has_more:
+                time.sleep(POLL_INTERVAL)
+
+
+class LogTailHub:
+    """Registry of active run tails"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tails: Dict[int, RunTail] = {}
+
+    def subscribe(self, run_id: int, after_id: int):
+        """
+        Subscribe to new log lines of run_id.
+
+        Returns (subscriber, start_cursor). The subscriber receives every
+        line after start_cursor; if that is past after_id, the caller must
+        read the lines in between itself. The first viewer of a run starts
+        the tail at its own after_id.
+        """
+        subscriber = Subscriber()
+        with self.lock:
+            tail = self.tails.get(run_id)
+            if tail is None:
+                tail = RunTail(self, run_id, after_id)
+                self.tails[run_id] = tail
+                tail.thread.start()
+            tail.subscribers.append(subscriber)
+            return subscriber, tail.cursor
+
+    def unsubscribe(self, run_id: int, subscriber: Subscriber):
+        with self.lock:
+            tail = self.tails.get(run_id)
+            if tail is not None and subscriber in tail.subscribers:
+                tail.subscribers.remove(subscriber)
+
+    def viewer_count(self, run_id: int) -> int:
+        """Number of viewers currently tailing run_id"""
+        with self.lock:
+            tail = self.tails.get(run_id)
+            return len(tail.subscribers) if tail else 0
+
+
+hub = LogTailHub()
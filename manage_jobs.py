@@ -4,22 +4,32 @@ Job management utility for cronishe.
 Add, list, update, and delete scheduled jobs.
 """
 import argparse
+import json
+import os
 import sys
+import time
 from datetime import datetime
-from database import init_database, get_db
+import requests
+from database import init_database, get_db, get_logs_page, get_running_run, EXEC_MODES, OVERLAP_POLICIES
 
 
 def add_job(args):
     """Add a new job to the database"""
+    # Parse environment variables (e.g., --env KEY=VALUE --env OTHER=1)
+    env = None
+    if args.env:
+        env = json.dumps(dict(item.split('=', 1) for item in args.env))
+
     with get_db() as conn:
         cursor = conn.cursor()
 
         # Build the INSERT query based on frequency type
         if args.frequency_type == 'every':
             cursor.execute("""
-                INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active, on_start, on_success, on_fail)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (args.name, args.path, 'every', args.every, 1, args.on_start, args.on_success, args.on_fail))
+                INSERT INTO jobs (name, path, frequency_type, frequency_every_min, active, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (args.name, args.path, 'every', args.every, 1, args.on_start, args.on_success, args.on_fail, args.exec_mode, env, args.cwd,
+                  args.overlap_policy, args.max_parallel))
         else:  # 'at'
             # Parse days (e.g., "mon,wed,fri")
             days = {}
@@ -32,15 +42,16 @@ def add_job(args):
                 INSERT INTO jobs (name, path, frequency_type,
                     frequency_at_mon, frequency_at_tue, frequency_at_wed, frequency_at_thu,
                     frequency_at_fri, frequency_at_sat, frequency_at_sun,
-                    frequency_at_hr, frequency_at_min, active, on_start, on_success, on_fail)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    frequency_at_hr, frequency_at_min, active, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 args.name, args.path, 'at',
                 days.get('frequency_at_mon'), days.get('frequency_at_tue'),
                 days.get('frequency_at_wed'), days.get('frequency_at_thu'),
                 days.get('frequency_at_fri'), days.get('frequency_at_sat'),
                 days.get('frequency_at_sun'),
-                args.hour, args.minute, 1, args.on_start, args.on_success, args.on_fail
+                args.hour, args.minute, 1, args.on_start, args.on_success, args.on_fail,
+                args.exec_mode, env, args.cwd, args.overlap_policy, args.max_parallel
             ))
 
         conn.commit()
@@ -110,8 +121,96 @@ def delete_job(args):
             print(f"Job {args.job_id} not found")
 
 
+def print_log_line(log):
+    """Print one log line in the `logs` command format"""
+    timestamp = datetime.fromisoformat(log['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+    print(f"[{timestamp}] {log['log_line']}", flush=True)
+
+
+def stream_logs_sse(url, run_id, after_id):
+    """Yield a run's log lines from the web UI's event stream, then its final state
+
+    Yields ('line', log) items and a last ('end', run) item. Raises
+    requests.RequestException if the stream can't be used.
+    """
+    while True:
+        with requests.get(f"{url}/api/run/{run_id}/logs/stream", params={'after_id': after_id},
+                          stream=True, timeout=(5, 60)) as response:
+            response.raise_for_status()
+            event, data = None, None
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith('event:'):
+                    event = line[6:].strip()
+                elif line.startswith('data:'):
+                    data = json.loads(line[5:].strip())
+                elif line == '' and data is not None:
+                    if event == 'end':
+                        yield 'end', data
+                        return
+                    yield 'line', data
+                    after_id = data['id']
+                    event, data = None, None
+        # Stream closed without an end event (e.g. we fell behind) - reconnect from the last line
+
+
+def stream_logs_db(run_id, after_id):
+    """Yield a run's log lines by polling the database, then its final state (same items as stream_logs_sse)"""
+    while True:
+        finished = get_running_run(run_id) is None
+        logs, has_more = get_logs_page(run_id, after_id=after_id)
+        for log in logs:
+            yield 'line', log
+            after_id = log['id']
+        if finished and not has_more:
+            break
+        if not has_more:
+            time.sleep(1)
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT result, finish_at FROM job_runs WHERE id = ?", (run_id,))
+        yield 'end', dict(cursor.fetchone())
+
+
+def follow_logs(args):
+    """Print a run's output as it is produced until the run finishes"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM job_runs WHERE id = ?", (args.run_id,))
+        if not cursor.fetchone():
+            print(f"Run {args.run_id} not found")
+            return
+
+    last_id = 0
+    run = None
+    try:
+        for kind, data in stream_logs_sse(args.url.rstrip('/'), args.run_id, last_id):
+            if kind == 'end':
+                run = data
+            else:
+                print_log_line(data)
+                last_id = data['id']
+    except requests.RequestException as e:
+        # Web UI not reachable - fall back to reading the database directly
+        print(f"Live stream unavailable ({e}), polling the database", file=sys.stderr)
+        for kind, data in stream_logs_db(args.run_id, last_id):
+            if kind == 'end':
+                run = data
+            else:
+                print_log_line(data)
+
+    print(f"Run {args.run_id} finished: {run.get('result') or '-'}")
+
+
 def view_logs(args):
     """View logs for a job run"""
+    if args.follow:
+        if not args.run_id:
+            print("--follow requires --run-id")
+            return
+        follow_logs(args)
+        return
+
     with get_db() as conn:
         cursor = conn.cursor()
 
@@ -176,6 +275,11 @@ def main():
     add_parser.add_argument('--on-start', help='URL to call when job starts')
     add_parser.add_argument('--on-success', help='URL to call when job succeeds')
     add_parser.add_argument('--on-fail', help='URL to call when job fails')
+    add_parser.add_argument('--exec-mode', choices=EXEC_MODES, default='shell', help='Run through the shell or exec argv directly (default: shell)')
+    add_parser.add_argument('--cwd', help='Working directory for the job')
+    add_parser.add_argument('--env', action='append', metavar='KEY=VALUE', help='Environment variable for the job (repeatable)')
+    add_parser.add_argument('--overlap-policy', choices=OVERLAP_POLICIES, default='skip', help='What to do if the job is due while still running (default: skip)')
+    add_parser.add_argument('--max-parallel', type=int, default=1, help='Maximum concurrent runs with --overlap-policy parallel (default: 1)')
 
     # List jobs
     list_parser = subparsers.add_parser('list', help='List all jobs')
@@ -197,8 +301,13 @@ def main():
     logs_parser.add_argument('--job-id', type=int, help='Job ID (show recent runs)')
     logs_parser.add_argument('--run-id', type=int, help='Run ID (show logs for specific run)')
     logs_parser.add_argument('--limit', type=int, default=10, help='Number of recent runs to show')
+    logs_parser.add_argument('--follow', '-f', action='store_true', help='Follow a run\'s output live until it finishes (needs --run-id)')
+    logs_parser.add_argument('--url', default=os.environ.get('CRONISHE_URL', 'http://localhost:48080'),
+                             help='Web UI URL to stream logs from (default: $CRONISHE_URL or http://localhost:48080)')
 
     args = parser.parse_args()
+    if args.command == 'add' and any('=' not in item for item in args.env or []):
+        add_parser.error("--env expects KEY=VALUE")
 
     # Initialize database
     init_database()
@@ -1,13 +1,106 @@
 import os
+import time
+import fnmatch
+import threading
 import requests
 import json
-from bottle import Bottle, template, static_file, request, response, TEMPLATE_PATH
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict
+from bottle import Bottle, BaseTemplate, template, request, response, abort, TEMPLATE_PATH
+
+import serving
+import static_assets
+from compression import GzipMiddleware
+from instance_health import BreakerAdapter, InstanceHealth
 
 app = Bottle()
 
 # Template directory
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
 TEMPLATE_PATH.insert(0, TEMPLATE_DIR)
+BaseTemplate.defaults['static_url'] = static_assets.static_url
+
+# Chunk size used when passing instance responses through to the browser
+PROXY_CHUNK_SIZE = 64 * 1024
+
+# Seconds the dashboard waits for all instances before rendering; later ones are loaded by the browser
+FETCH_DEADLINE = float(os.getenv('MANAGER_FETCH_DEADLINE', '2'))
+
+# Seconds each instance gets to return its job list
+FETCH_TIMEOUT = float(os.getenv('MANAGER_FETCH_TIMEOUT', '5'))
+
+# Instances fetched at the same time
+FETCH_THREADS = int(os.getenv('MANAGER_FETCH_THREADS', '16'))
+
+# Seconds a job list snapshot is served before it is revalidated in the background
+SNAPSHOT_TTL = float(os.getenv('MANAGER_SNAPSHOT_TTL', '10'))
+
+# Keep-alive connections kept open per instance
+POOL_SIZE = int(os.getenv('MANAGER_POOL_SIZE', '10'))
+
+# Retries of failed connections and 502/503/504 responses (idempotent requests only)
+RETRIES = int(os.getenv('MANAGER_RETRIES', '2'))
+
+# Seconds between background health checks of each instance (also how soon a recovered one is noticed)
+HEALTH_INTERVAL = float(os.getenv('MANAGER_HEALTH_INTERVAL', '5'))
+
+# Seconds a health check may take
+HEALTH_TIMEOUT = float(os.getenv('MANAGER_HEALTH_TIMEOUT', '2'))
+
+# Consecutive connection failures or timeouts after which requests to an instance fail fast
+BREAKER_THRESHOLD = int(os.getenv('MANAGER_BREAKER_THRESHOLD', '3'))
+
+# Jobs sent to an instance per bulk request (at most 500); each batch is applied in one transaction there
+BULK_BATCH_SIZE = int(os.getenv('MANAGER_BULK_BATCH_SIZE', '100'))
+
+# Instances a bulk action is applied to at the same time (each gets one batch at a time)
+BULK_THREADS = int(os.getenv('MANAGER_BULK_THREADS', '8'))
+
+BULK_ACTIONS = ('enable', 'disable', 'run', 'stop')
+
+_fetch_pool = ThreadPoolExecutor(max_workers=FETCH_THREADS, thread_name_prefix='fetch')
+_fetch_lock = threading.Lock()
+_bulk_pool = ThreadPoolExecutor(max_workers=BULK_THREADS, thread_name_prefix='bulk')
+_health_pool = ThreadPoolExecutor(max_workers=FETCH_THREADS, thread_name_prefix='health')
+
+# Instance URL -> its fetch in progress, shared by the refresher, page renders and fragment requests
+_fetches: Dict[str, Future] = {}
+
+
+class Snapshot:
+    """The last known job list of an instance"""
+
+    def __init__(self):
+        self.jobs = None          # from the last successful fetch (None: never fetched)
+        self.etag = None          # ETag of that response, sent back to revalidate
+        self.sync_version = 0     # instance state version the jobs are current to (None: no delta sync)
+        self.fetched_at = 0.0     # time of the last successful fetch or revalidation
+        self.checked_at = 0.0     # time of the last attempt
+        self.error = False        # the last attempt failed
+        self.generation = 0       # bumped by invalidate(); fetches started before are superseded
+        self.invalidated = False  # changed through the manager since it was fetched
+        self.version = 0          # bumped whenever jobs or error change
+        self.rendered = None      # (view key, HTML) of the last rendering of the instance's section
+
+
+# Instance URL -> Snapshot
+_snapshots: Dict[str, Snapshot] = {}
+
+_refresher = None
+_health_checker = None
+
+_sessions_lock = threading.Lock()
+
+# Instance URL -> its pooled keep-alive session
+_sessions: Dict[str, requests.Session] = {}
+
+# Instance URL -> its health record and circuit breaker
+_health: Dict[str, InstanceHealth] = {}
+
+# Health checks bypass the circuit breakers (they are what closes them) and don't retry
+_probe_session = requests.Session()
 
 
 def get_instances():
@@ -42,34 +135,384 @@ def get_instances():
     return instances
 
 
-def fetch_jobs(instance_url, timeout=5):
-    """Fetch jobs from a Cronishe instance"""
+def make_session(health=None):
+    """
+    A requests session keeping up to POOL_SIZE connections open, retrying idempotent requests.
+
+    With health, requests fail fast while its circuit is open and their outcomes are recorded in it.
+    """
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # not POST: a retried run/toggle could apply twice
+        raise_on_status=False,
+    )
+    pool = {'pool_connections': 1, 'pool_maxsize': POOL_SIZE, 'max_retries': retry}
+    adapter = BreakerAdapter(health, **pool) if health is not None else HTTPAdapter(**pool)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session(instance_url):
+    """The pooled session for an instance (configured instances only get their own)"""
+    key = instance_url if instance_url in {instance['url'] for instance in get_instances()} else ''
+    health = get_health(key) if key else None
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = make_session(health)
+        return session
+
+
+def get_health(instance_url):
+    """The instance's health record (created on first use)"""
+    with _sessions_lock:
+        health = _health.get(instance_url)
+        if health is None:
+            health = _health[instance_url] = InstanceHealth(BREAKER_THRESHOLD)
+        return health
+
+
+def get_snapshot(instance_url):
+    """The instance's snapshot (created empty on first use); only access fields under _fetch_lock"""
+    with _fetch_lock:
+        return _snapshots.setdefault(instance_url, Snapshot())
+
+
+def fetch_jobs(instance_url, timeout=FETCH_TIMEOUT):
+    """
+    Fetch an instance's jobs into its snapshot and return them (None on error).
+
+    Asks for the jobs changed since the snapshot's version (/api/jobs?since=)
+    and merges them in, so a refresh only transfers what changed. Instances
+    without delta sync return the full list, revalidated with the snapshot's
+    ETag - an unchanged list costs them a 304 instead.
+    """
+    snapshot = get_snapshot(instance_url)
+    with _fetch_lock:
+        generation = snapshot.generation
+        jobs = snapshot.jobs
+        since = snapshot.sync_version if jobs is not None and snapshot.sync_version is not None else 0
+        headers = {'If-None-Match': snapshot.etag} if jobs is not None and snapshot.etag else {}
+
     try:
-        response = requests.get(f"{instance_url}/api/jobs", timeout=timeout)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        response = get_session(instance_url).get(f"{instance_url}/api/jobs", params={'since': since},
+                                                 headers=headers, timeout=timeout)
+        changed = response.status_code != 304
+        if changed:
+            response.raise_for_status()
+            data = response.json()
+            if isinstance(data, list):
+                # An instance that ignores since
+                jobs, sync_version = data, None
+            else:
+                changed = data['full'] or data['jobs'] or data['deleted']
+                if data['full']:
+                    jobs = data['jobs']
+                elif changed:
+                    jobs = merge_jobs(jobs, data['jobs'], data['deleted'])
+                sync_version = data['version']
+    except (requests.RequestException, ValueError, KeyError, TypeError) as e:
         print(f"Error fetching jobs from {instance_url}: {e}")
+        with _fetch_lock:
+            snapshot.checked_at = time.time()
+            if not snapshot.error:
+                snapshot.error = True
+                snapshot.version += 1
+            if snapshot.generation == generation:
+                snapshot.invalidated = False
         return None
 
+    with _fetch_lock:
+        now = time.time()
+        if response.status_code != 304:
+            snapshot.sync_version = sync_version
+            snapshot.etag = response.headers.get('ETag')
+        if changed or snapshot.error:
+            snapshot.jobs = jobs
+            snapshot.version += 1
+        snapshot.fetched_at = snapshot.checked_at = now
+        snapshot.error = False
+        # A change made through the manager while this was in flight may not be in it
+        snapshot.invalidated = snapshot.generation != generation
+    return jobs
+
+
+def merge_jobs(jobs, changed, deleted):
+    """A job list (ordered by ID) with changed jobs replaced or added and deleted ones removed"""
+    by_id = {job['id']: job for job in jobs}
+    for job_id in deleted:
+        by_id.pop(job_id, None)
+    for job in changed:
+        by_id[job['id']] = job
+    return [by_id[job_id] for job_id in sorted(by_id)]
+
+
+def start_fetch(instance_url, restart=False):
+    """
+    Start fetching an instance's jobs in the background, or join the fetch already running.
+
+    With restart, a new fetch is started even if one is running.
+    """
+    with _fetch_lock:
+        future = _fetches.get(instance_url)
+        if restart or future is None or future.done():
+            future = _fetch_pool.submit(fetch_jobs, instance_url)
+            _fetches[instance_url] = future
+        return future
+
+
+def invalidate(instance_url):
+    """Refetch an instance's jobs right away after a change made through the manager"""
+    if instance_url not in {instance['url'] for instance in get_instances()}:
+        return
+    snapshot = get_snapshot(instance_url)
+    with _fetch_lock:
+        snapshot.generation += 1
+        snapshot.invalidated = True
+    start_fetch(instance_url, restart=True)
+
+
+def needs_wait(instance_url):
+    """Whether a page should wait for the instance rather than serve its snapshot"""
+    if get_health(instance_url).is_open:
+        return False
+    snapshot = get_snapshot(instance_url)
+    with _fetch_lock:
+        if snapshot.invalidated:
+            return True
+        if snapshot.error:
+            return False
+        if snapshot.jobs is None:
+            return True
+        # The refresher is behind (slow instance): serve it only within twice the TTL
+        return time.time() - snapshot.fetched_at > 2 * SNAPSHOT_TTL
+
+
+def refresh_loop():
+    """Background thread: revalidate every instance's snapshot once it is older than SNAPSHOT_TTL"""
+    while True:
+        now = time.time()
+        for instance in get_instances():
+            if get_health(instance['url']).is_open:
+                continue  # refetched by the health checker once it is back
+            snapshot = get_snapshot(instance['url'])
+            with _fetch_lock:
+                due = now - snapshot.checked_at >= SNAPSHOT_TTL
+            if due:
+                start_fetch(instance['url'])
+        time.sleep(min(1.0, SNAPSHOT_TTL / 2))
+
+
+def check_instance(instance_url):
+    """
+    Health-check an instance (GET /api/health), bypassing its circuit breaker.
+
+    Records the outcome and the scheduler's liveness. When this closes the
+    circuit, the instance's jobs are refetched right away.
+    """
+    health = get_health(instance_url)
+    start = time.perf_counter()
+    try:
+        resp = _probe_session.get(f"{instance_url}/api/health", timeout=HEALTH_TIMEOUT)
+    except requests.RequestException as e:
+        if health.record_failure(str(e)):
+            print(f"Instance {instance_url} is down, failing fast until it recovers: {e}")
+        health.last_check_at = time.time()
+        return
+
+    latency = time.perf_counter() - start
+    scheduler = None
+    if resp.status_code == 200:
+        try:
+            scheduler = resp.json().get('scheduler')
+        except ValueError:
+            pass
+    # Other responses below 500 (e.g. 404 from an instance without
+    # /api/health) show it is reachable, with the scheduler unknown
+    ok = resp.status_code < 500
+    health.scheduler = scheduler
+    health.last_check_at = time.time()
+    if health.record_response(latency, ok, None if ok else f"HTTP {resp.status_code}"):
+        print(f"Instance {instance_url} is back up")
+        start_fetch(instance_url, restart=True)
+
+
+def health_loop():
+    """Background thread: health-check every instance every HEALTH_INTERVAL seconds"""
+    while True:
+        started = time.time()
+        checks = [_health_pool.submit(check_instance, instance['url']) for instance in get_instances()]
+        wait(checks)
+        time.sleep(max(0.0, HEALTH_INTERVAL - (time.time() - started)))
+
+
+def start_refresher():
+    """Start the snapshot refresher and health checker threads (once)"""
+    global _refresher, _health_checker
+    with _fetch_lock:
+        if _refresher is not None:
+            return
+        _refresher = threading.Thread(target=refresh_loop, name='refresher', daemon=True)
+        _refresher.start()
+        _health_checker = threading.Thread(target=health_loop, name='health', daemon=True)
+        _health_checker.start()
+
+
+def health_views():
+    """Template data for the health panel: one row per instance"""
+    now = time.time()
+    views = []
+    for instance in get_instances():
+        summary = get_health(instance['url']).summary()
+        scheduler = summary['scheduler']
+        if summary['circuit'] == 'open':
+            state = 'down'
+        elif summary['last_ok_at'] is None:
+            state = 'unknown'
+        elif scheduler is not None and not scheduler.get('ticking'):
+            state = 'degraded'
+        else:
+            state = 'up'
+        views.append(dict(
+            summary, name=instance['name'], url=instance['url'], state=state,
+            down_for=format_age(now - summary['open_since']) if summary['open_since'] else None,
+            checked_ago=format_age(now - summary['last_check_at']) if summary['last_check_at'] else None,
+        ))
+    return views
+
+
+def format_age(seconds):
+    """Short human-readable age, e.g. '45s' or '3m'"""
+    if seconds < 60:
+        return f"{int(seconds)}s"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m"
+    return f"{int(seconds // 3600)}h"
+
+
+def instance_view(index, instance):
+    """
+    Template data for one instance section, from its snapshot.
+
+    Instances that still need to be waited for (see needs_wait) are marked
+    pending: they show the last jobs fetched (if any) until the browser
+    loads the fresh section.
+    """
+    view = {'index': index, 'name': instance['name'], 'url': instance['url'],
+            'jobs': None, 'error': False, 'pending': needs_wait(instance['url']), 'age': None, 'down_for': None}
+    health = get_health(instance['url'])
+    snapshot = get_snapshot(instance['url'])
+    with _fetch_lock:
+        view['version'] = snapshot.version
+        open_since = health.open_since
+        if open_since is not None:
+            # Known to be down: say so rather than show its last jobs as current
+            view['error'] = True
+            view['down_for'] = format_age(time.time() - open_since)
+        elif view['pending']:
+            view['jobs'] = snapshot.jobs
+            view['age'] = format_age(time.time() - snapshot.fetched_at)
+        elif snapshot.error:
+            view['error'] = True
+        else:
+            view['jobs'] = snapshot.jobs
+    return view
+
+
+def render_instance(view):
+    """
+    Render an instance's section of the main page.
+
+    Rendering a large job list dominates the page time, so the HTML is kept
+    with the snapshot and reused until the snapshot changes. Pending and
+    down sections (with a changing age) are rendered every time.
+    """
+    if view['pending'] or view['down_for']:
+        return template('manager_instance', instance=view)
+
+    key = (view['index'], view['name'], view['version'])
+    snapshot = get_snapshot(view['url'])
+    with _fetch_lock:
+        rendered = snapshot.rendered
+    if rendered is not None and rendered[0] == key:
+        return rendered[1]
+
+    html = template('manager_instance', instance=view)
+    with _fetch_lock:
+        # Only keep it if the snapshot hasn't changed meanwhile
+        if snapshot.version == view['version']:
+            snapshot.rendered = (key, html)
+    return html
+
 
 @app.route('/')
 def index():
-    """Main page - list all instances and their jobs"""
+    """Main page - list all instances and their jobs
+
+    Served from the instances' snapshots, which the refresher keeps current.
+    Only instances without a usable snapshot (first load, or changed through
+    the manager) are waited for, and at most FETCH_DEADLINE seconds.
+    """
+    start_refresher()
     instances = get_instances()
 
-    # Fetch jobs for each instance
-    instances_data = []
-    for instance in instances:
-        jobs = fetch_jobs(instance['url'])
-        instances_data.append({
-            'name': instance['name'],
-            'url': instance['url'],
-            'jobs': jobs if jobs is not None else [],
-            'error': jobs is None
-        })
+    waiting = [start_fetch(instance['url']) for instance in instances if needs_wait(instance['url'])]
+    if waiting:
+        wait(waiting, timeout=FETCH_DEADLINE)
+
+    sections = [render_instance(instance_view(i, instance)) for i, instance in enumerate(instances)]
+    health = template('manager_health', instances=health_views())
+    return template('manager_index', sections=sections, health=health, health_interval=HEALTH_INTERVAL)
+
+
+@app.route('/health')
+def health_panel():
+    """The health panel of the main page, refreshed by the browser"""
+    start_refresher()
+    response.set_header('Cache-Control', 'no-store')
+    return template('manager_health', instances=health_views())
+
+
+@app.route('/api/health')
+def api_health():
+    """Health of every instance as JSON: circuit state, latency, error rate and scheduler liveness"""
+    start_refresher()
+    response.content_type = 'application/json'
+    response.set_header('Cache-Control', 'no-store')
+    return json.dumps({'instances': health_views()})
+
 
-    return template('manager_index', instances=instances_data)
+@app.route('/instance/<index:int>')
+def instance_fragment(index):
+    """One instance's section of the main page, for instances that were late when it was rendered"""
+    start_refresher()
+    instances = get_instances()
+    if index >= len(instances):
+        abort(404, 'Unknown instance')
+    instance = instances[index]
+
+    if needs_wait(instance['url']):
+        wait([start_fetch(instance['url'])], timeout=FETCH_TIMEOUT)
+    view = instance_view(index, instance)
+    if view['pending']:
+        # Out of time: report it as unreachable rather than keep the browser waiting
+        view.update(jobs=None, error=True, pending=False)
+        return template('manager_instance', instance=view)
+    return render_instance(view)
+
+
+def stream_response(resp):
+    """Pass a streamed instance response through chunk by chunk instead of buffering it"""
+    def chunks():
+        try:
+            yield from resp.iter_content(PROXY_CHUNK_SIZE)
+        finally:
+            resp.close()
+    return chunks()
 
 
 @app.route('/proxy/toggle', method='POST')
@@ -87,8 +530,9 @@ def proxy_toggle():
         job_id = data['job_id']
 
         # Forward toggle request to instance
-        resp = requests.post(f"{instance_url}/api/job/{job_id}/toggle", timeout=10)
+        resp = get_session(instance_url).post(f"{instance_url}/api/job/{job_id}/toggle", timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -115,8 +559,9 @@ def proxy_delete():
         job_id = data['job_id']
 
         # Forward delete request to instance
-        resp = requests.delete(f"{instance_url}/api/job/{job_id}", timeout=10)
+        resp = get_session(instance_url).delete(f"{instance_url}/api/job/{job_id}", timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -143,8 +588,9 @@ def proxy_create():
         job_data = data['job_data']
 
         # Forward create request to instance
-        resp = requests.post(f"{instance_url}/api/job", json=job_data, timeout=10)
+        resp = get_session(instance_url).post(f"{instance_url}/api/job", json=job_data, timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -172,8 +618,9 @@ def proxy_update():
         job_data = data['job_data']
 
         # Forward update request to instance
-        resp = requests.put(f"{instance_url}/api/job/{job_id}", json=job_data, timeout=10)
+        resp = get_session(instance_url).put(f"{instance_url}/api/job/{job_id}", json=job_data, timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -200,10 +647,14 @@ def proxy_runs():
         job_id = data['job_id']
 
         # Forward runs request to instance
-        resp = requests.get(f"{instance_url}/api/job/{job_id}/runs", timeout=10)
-        resp.raise_for_status()
+        resp = get_session(instance_url).get(f"{instance_url}/api/job/{job_id}/runs", timeout=10, stream=True)
+        try:
+            resp.raise_for_status()
+        except requests.RequestException:
+            resp.close()
+            raise
 
-        return resp.text
+        return stream_response(resp)
 
     except requests.RequestException as e:
         response.status = 500
@@ -228,10 +679,14 @@ def proxy_logs():
         run_id = data['run_id']
 
         # Forward logs request to instance
-        resp = requests.get(f"{instance_url}/api/run/{run_id}/logs", timeout=10)
-        resp.raise_for_status()
+        resp = get_session(instance_url).get(f"{instance_url}/api/run/{run_id}/logs", timeout=10, stream=True)
+        try:
+            resp.raise_for_status()
+        except requests.RequestException:
+            resp.close()
+            raise
 
-        return resp.text
+        return stream_response(resp)
 
     except requests.RequestException as e:
         response.status = 500
@@ -256,8 +711,9 @@ def proxy_run_now():
         job_id = data['job_id']
 
         # Forward run request to instance
-        resp = requests.post(f"{instance_url}/api/job/{job_id}/run", timeout=10)
+        resp = get_session(instance_url).post(f"{instance_url}/api/job/{job_id}/run", timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -284,8 +740,9 @@ def proxy_stop():
         run_id = data['run_id']
 
         # Forward stop request to instance
-        resp = requests.post(f"{instance_url}/api/run/{run_id}/stop", timeout=10)
+        resp = get_session(instance_url).post(f"{instance_url}/api/run/{run_id}/stop", timeout=10)
         resp.raise_for_status()
+        invalidate(instance_url)
 
         return resp.text
 
@@ -297,13 +754,123 @@ def proxy_stop():
         return json.dumps({'error': str(e)})
 
 
+@app.route('/proxy/signal', method='POST')
+def proxy_signal():
+    """Proxy signal run request to target instance"""
+    response.content_type = 'application/json'
+
+    try:
+        data = request.json
+        if not data or 'instance_url' not in data or 'run_id' not in data or 'signal' not in data:
+            response.status = 400
+            return json.dumps({'error': 'Missing instance_url, run_id or signal'})
+
+        instance_url = data['instance_url']
+        run_id = data['run_id']
+
+        # Forward signal request to instance
+        resp = get_session(instance_url).post(f"{instance_url}/api/run/{run_id}/signal",
+                                              json={'signal': data['signal']}, timeout=10)
+        resp.raise_for_status()
+
+        return resp.text
+
+    except requests.RequestException as e:
+        response.status = 500
+        return json.dumps({'error': f'Failed to signal run: {str(e)}'})
+    except Exception as e:
+        response.status = 500
+        return json.dumps({'error': str(e)})
+
+
+def match_jobs(jobs, name_pattern, tag):
+    """The jobs whose name matches the glob name_pattern (case-insensitive) and that have tag; empty ones match all"""
+    pattern = name_pattern.lower()
+    return [job for job in jobs
+            if (not pattern or fnmatch.fnmatchcase(job['name'].lower(), pattern))
+            and (not tag or tag in (job.get('tags') or []))]
+
+
+def apply_bulk(instance_url, action, job_ids):
+    """Apply action to job_ids on an instance, in batches of BULK_BATCH_SIZE sent one after another; return per-job results"""
+    results = []
+    for start in range(0, len(job_ids), BULK_BATCH_SIZE):
+        batch = job_ids[start:start + BULK_BATCH_SIZE]
+        try:
+            resp = get_session(instance_url).post(f"{instance_url}/api/jobs/bulk-{action}",
+                                                  json={'job_ids': batch}, timeout=30)
+            resp.raise_for_status()
+            results.extend(resp.json()['results'])
+        except (requests.RequestException, ValueError, KeyError) as e:
+            results.extend({'job_id': job_id, 'success': False, 'error': f'Request failed: {e}'} for job_id in batch)
+    return results
+
+
+@app.route('/bulk', method='POST')
+def bulk():
+    """Enable, disable, run or stop the jobs matching a name pattern and/or tag on every instance
+
+    Body: {"action": "enable" | "disable" | "run" | "stop", "name": glob
+    pattern, "tag": tag, "preview": true to only list the matching jobs}.
+    The job lists are refetched first, so the selection is current. Instances
+    are worked on concurrently (BULK_THREADS at a time). Returns {"results":
+    [...]} with one entry per job (instance, job_id, name, success, error),
+    and one with a null job_id for each instance that couldn't be reached.
+    """
+    response.content_type = 'application/json'
+
+    data = request.json or {}
+    action = data.get('action')
+    name_pattern = (data.get('name') or '').strip()
+    tag = (data.get('tag') or '').strip()
+    if action not in BULK_ACTIONS:
+        response.status = 400
+        return json.dumps({'error': f"action must be one of: {', '.join(BULK_ACTIONS)}"})
+    if not name_pattern and not tag:
+        response.status = 400
+        return json.dumps({'error': 'Give a name pattern or a tag (use "*" for all jobs)'})
+
+    instances = get_instances()
+    fetches = [start_fetch(instance['url'], restart=True) for instance in instances]
+    wait(fetches, timeout=FETCH_TIMEOUT)
+
+    results = []
+    applying = []
+    for index, (instance, fetch) in enumerate(zip(instances, fetches)):
+        about = {'instance': instance['name'], 'instance_url': instance['url'], 'instance_index': index}
+        jobs = fetch.result() if fetch.done() else None
+        if jobs is None:
+            results.append(dict(about, job_id=None, success=False, error='Unable to fetch jobs'))
+            continue
+        matches = match_jobs(jobs, name_pattern, tag)
+        if not matches:
+            continue
+        if data.get('preview'):
+            results.extend(dict(about, job_id=job['id'], name=job['name'], success=True) for job in matches)
+        else:
+            future = _bulk_pool.submit(apply_bulk, instance['url'], action, [job['id'] for job in matches])
+            applying.append((about, {job['id']: job['name'] for job in matches}, future))
+
+    for about, names, future in applying:
+        for result in future.result():
+            result = dict(about, **result)
+            result['name'] = result.get('name') or names.get(result['job_id'])
+            results.append(result)
+        invalidate(about['instance_url'])
+
+    return json.dumps({'results': results})
+
+
 @app.route('/static/<filename>')
 def server_static(filename):
-    """Serve static files"""
-    return static_file(filename, root=os.path.join(os.path.dirname(__file__), 'static'))
+    """Serve static files (fingerprinted URLs are cached for a year)"""
+    return static_assets.serve(filename)
 
 
 if __name__ == '__main__':
-    # Run web server
+    static_assets.precompress()
+    serving.precompile_templates(TEMPLATE_DIR)
+
+    # Run web server (responses gzip-compressed for clients that accept it)
     port = int(os.getenv('MANAGER_PORT', 48090))
-    app.run(host='0.0.0.0', port=port, debug=True)
+    serving.serve(GzipMiddleware(app), host='0.0.0.0', port=port)
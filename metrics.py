@@ -0,0 +1,217 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are plain Python objects guarded by a lock
+each, cheap enough to update from the scheduler's hot paths (one lock and a
+dict lookup per update; histograms add a bisect). Gauges can also be given
+a callback that is evaluated only when the metrics are scraped.
+
+start_server() serves everything registered here on /metrics from a
+background thread.
+"""
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Bucket bounds (seconds) for latency histograms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# All metrics, in registration order
+REGISTRY: List['Metric'] = []
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+class Metric:
+    """Base class: a named metric with optional labels, registered on creation"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self) -> List[Tuple[str, Sequence, float]]:
+        """(suffix, label values, value) for every sample of this metric"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for suffix, labels, value in self.samples():
+            names = self.labelnames + (('le',) if len(labels) > len(self.labelnames) else ())
+            lines.append(f'{self.name}{suffix}{_format_labels(names, labels)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count, per combination of label values"""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[tuple, float] = {} if labelnames else {(): 0}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [('_total' if not self.name.endswith('_total') else '', labels, value)
+                    for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down.
+
+    With a callback, the value is computed at scrape time: the callback
+    returns a number, or {label values tuple: number} for labelled gauges.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 callback: Optional[Callable] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self):
+        if self.callback is not None:
+            values = self.callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [('', labels, value) for labels, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    """Distribution of observed values in fixed buckets, per combination of label values"""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (last one: +Inf), sum]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """Observe the duration of a with-block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self):
+        with self._lock:
+            values = {labels: (list(counts), total) for labels, (counts, total) in self._values.items()}
+        samples = []
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(('_bucket', labels + (_format_value(float(bound)),), cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+def timed(histogram: Histogram, *labels):
+    """Decorator observing every call's duration in histogram"""
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *labels)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorate
+
+
+def render() -> str:
+    """All registered metrics in the text exposition format"""
+    parts = []
+    for metric in REGISTRY:
+        try:
+            parts.append(metric.render())
+        except Exception as e:
+            # A failing callback must not take the other metrics down with it
+            parts.append(f'# {metric.name} unavailable: {_escape(e)}')
+    return '\n'.join(parts) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the scheduler's own log
+        pass
+
+
+def start_server(port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+    """Serve /metrics on host:port from a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name='metrics', daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,163 @@
+"""
+In-memory registry of live job runs for the scheduler process.
+
+Every run the scheduler starts (regular, retry, DAG node or queued) first
+reserves a slot here. The check against the job's overlap policy and the
+reservation happen under a single lock, so the retry loop and the regular
+minute tick can never both start the same job, and "is this job running?"
+is an O(1) dictionary lookup instead of a COUNT query over job_runs.
+"""
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+# Replaced runs (per allowed run of a job) that may still be shutting down
+# before the 'replace' policy skips instead - a run that ignores SIGTERM
+# must not let every new trigger pile up another process
+MAX_STOPPING = 2
+
+
+class RunSlot:
+    """A reserved execution slot for one run of a job"""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.run_id = None
+        self.process = None
+        # Set when the run is being replaced/stopped; the runner records it as aborted
+        self.stopped = False
+        # Why it was stopped: 'replaced' (by a newer run) or 'user'
+        self.stop_reason = None
+        # When the run heartbeat found the process exited (time.monotonic()), for runs still capturing output
+        self.exited_at = None
+
+    def __repr__(self):
+        return f"RunSlot(job_id={self.job_id}, run_id={self.run_id}, stopped={self.stopped})"
+
+
+class RunRegistry:
+    """Thread-safe registry of running slots per job, plus at most one queued run per job"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots: Dict[int, List[RunSlot]] = {}
+        self._queued: Dict[int, Dict] = {}
+
+    @staticmethod
+    def _limit(job: Dict) -> int:
+        """Number of runs of this job allowed at the same time"""
+        if job.get('overlap_policy') == 'parallel':
+            return max(1, job.get('max_parallel') or 1)
+        return 1
+
+    def acquire(self, job: Dict, allow_queue: bool = True) -> Tuple[str, Optional[RunSlot], List[RunSlot]]:
+        """
+        Try to reserve a slot for a new run of job according to its overlap policy.
+
+        Returns (decision, slot, replaced):
+            'start'   - slot reserved, run it
+            'replace' - slot reserved, the caller must stop the `replaced` slots
+            'queued'  - job will start when a running slot is released
+            'skip'    - not started (already running, a run is already queued, or
+                        too many replaced runs are still shutting down)
+        """
+        job_id = job['id']
+        policy = job.get('overlap_policy') or 'skip'
+
+        with self._lock:
+            slots = self._slots.setdefault(job_id, [])
+            # Stopped runs may take a while to exit; they don't count towards the limit
+            active = [s for s in slots if not s.stopped]
+            limit = self._limit(job)
+
+            if len(active) < limit:
+                slot = RunSlot(job_id)
+                slots.append(slot)
+                return 'start', slot, []
+
+            if policy == 'replace' and len(slots) - len(active) < limit * MAX_STOPPING:
+                replaced = active
+                for s in replaced:
+                    s.stopped = True
+                    s.stop_reason = 'replaced'
+                slot = RunSlot(job_id)
+                slots.append(slot)
+                return 'replace', slot, replaced
+
+            if policy == 'queue' and allow_queue and job_id not in self._queued:
+                self._queued[job_id] = job
+                return 'queued', None, []
+
+            return 'skip', None, []
+
+    def adopt(self, job_id: int) -> RunSlot:
+        """Reserve a slot for a run that is already going (reattached after a restart), ignoring limits"""
+        with self._lock:
+            slot = RunSlot(job_id)
+            self._slots.setdefault(job_id, []).append(slot)
+            return slot
+
+    def attach(self, slot: RunSlot, run_id: int, process=None):
+        """Record the run ID (and process, once spawned) for a reserved slot"""
+        with self._lock:
+            slot.run_id = run_id
+            slot.process = process
+
+    def release(self, slot: RunSlot) -> Tuple[Optional[Dict], Optional[RunSlot]]:
+        """
+        Free a slot when its run has finished.
+
+        If a run of the same job was queued and there is now room, a new slot
+        is reserved for it and (job, slot) is returned so the caller can start it.
+        """
+        with self._lock:
+            slots = self._slots.get(slot.job_id, [])
+            if slot in slots:
+                slots.remove(slot)
+
+            queued_job = self._queued.get(slot.job_id)
+            active = [s for s in slots if not s.stopped]
+            if queued_job is not None and len(active) < self._limit(queued_job):
+                del self._queued[slot.job_id]
+                next_slot = RunSlot(slot.job_id)
+                slots.append(next_slot)
+                return queued_job, next_slot
+
+            if not slots:
+                self._slots.pop(slot.job_id, None)
+            return None, None
+
+    def is_running(self, job_id: int) -> bool:
+        """Check whether any run of the job is live"""
+        with self._lock:
+            return bool(self._slots.get(job_id))
+
+    def find_run(self, run_id: int) -> Optional[RunSlot]:
+        """Find the live slot for a run ID"""
+        with self._lock:
+            for slots in self._slots.values():
+                for slot in slots:
+                    if slot.run_id == run_id:
+                        return slot
+        return None
+
+    def stop_run(self, run_id: int, reason: str) -> Optional[RunSlot]:
+        """Mark a run's slot stopped; returns it (None if the run isn't live here or was stopped already)"""
+        with self._lock:
+            for slots in self._slots.values():
+                for slot in slots:
+                    if slot.run_id == run_id and not slot.stopped:
+                        slot.stopped = True
+                        slot.stop_reason = reason
+                        return slot
+        return None
+
+    def running_slots(self) -> List[RunSlot]:
+        """Snapshot of all live slots"""
+        with self._lock:
+            return [slot for slots in self._slots.values() for slot in slots]
+
+    def queued_count(self) -> int:
+        """Number of jobs with a run waiting for a free slot"""
+        with self._lock:
+            return len(self._queued)
@@ -1,26 +1,68 @@
+import os
+import json
+import shlex
+import signal
+import socket
+import select
 import time
 import subprocess
 import threading
+import queue
 import requests
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 import sys
 from zoneinfo import ZoneInfo
 
+import cluster
+import forkserver
+import metrics
+import supervisor
+import workers
+from job_process import build_popen_args, stop_process
+from run_registry import RunRegistry, RunSlot
 from database import (
+    DB_PATH,
     init_database,
     get_db,
     create_job_run,
     finish_job_run,
     update_job_last_run,
     add_log_line,
-    is_job_running,
+    add_log_lines,
     schedule_retry,
     get_pending_retries,
     remove_retry,
     clear_retries_for_job,
-    update_run_pid
+    update_run_pid,
+    set_run_worker,
+    record_run_resources,
+    get_dependency_graph,
+    create_dag_run,
+    get_succeeded_jobs,
+    finish_dag_run,
+    abort_run,
+    abort_unfinished_dag_runs,
+    count_retries,
+    register_scheduler_node,
+    heartbeat_scheduler_node,
+    get_live_scheduler_nodes,
+    claim_job_runs,
+    prune_job_claims,
+    get_remote_running_jobs,
+    get_running_run,
+    abort_runs,
+    get_pending_commands,
+    claim_command,
+    finish_command,
+    prune_commands,
+    heartbeat_runs,
+    reap_orphaned_runs,
+    SCHEDULER_HEARTBEAT_SECONDS,
+    RUN_HEARTBEAT_SECONDS,
+    RUN_HEARTBEAT_TIMEOUT_SECONDS,
+    COMMAND_WAKE_DIR
 )
 
 # Configure logging
@@ -33,6 +75,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Modules imported once by the warm forkserver used for exec_mode 'python' jobs
+FORKSERVER_PRELOAD = [m.strip() for m in os.environ.get('FORKSERVER_PRELOAD', '').split(',') if m.strip()]
+
+_forkserver = None
+_forkserver_lock = threading.Lock()
+
+# Maximum number of jobs running at the same time within one DAG run
+DAG_MAX_PARALLEL = max(1, int(os.environ.get('DAG_MAX_PARALLEL', '4')))
+
+# Authoritative record of the runs this scheduler process has live
+registry = RunRegistry()
+
+# Run jobs under a detached supervisor so they survive scheduler restarts
+# (Unix only; SUPERVISE_JOBS=0 turns it off to save an interpreter start per run)
+SUPERVISE_JOBS = os.environ.get('SUPERVISE_JOBS', '1') != '0' and supervisor.is_supported()
+
+# Output lines stored per transaction, and the longest a captured line waits before it is stored
+LOG_BATCH_LINES = int(os.environ.get('LOG_BATCH_LINES', '500'))
+LOG_FLUSH_SECONDS = float(os.environ.get('LOG_FLUSH_SECONDS', '0.1'))
+
+# Where supervised runs spool their output (defaults to a directory next to the database)
+# (absolute, as supervisors and reattached runs must find it whatever the working directory)
+SPOOL_DIR = os.path.abspath(os.environ.get('SPOOL_DIR') or os.path.join(os.path.dirname(DB_PATH), 'spool'))
+
+# Port of the Prometheus metrics endpoint (0 disables it)
+METRICS_PORT = int(os.environ.get('METRICS_PORT', '48070'))
+
+# Port and/or Unix socket path of the API remote workers connect to (see workers.py; 0 and unset disable it)
+WORKER_PORT = int(os.environ.get('WORKER_PORT', '0'))
+WORKER_SOCKET = os.environ.get('WORKER_SOCKET') or None
+
+# Seconds between checks for run/stop/signal commands from the web UI while
+# commands are coming in; without any, the interval doubles up to
+# COMMAND_IDLE_POLL_SECONDS. Web UIs on the same host wake the scheduler
+# right away (see database.COMMAND_WAKE_DIR).
+COMMAND_POLL_SECONDS = float(os.environ.get('COMMAND_POLL_SECONDS', '0.05'))
+COMMAND_IDLE_POLL_SECONDS = float(os.environ.get('COMMAND_IDLE_POLL_SECONDS', '1'))
+
+# Identifies this scheduler process in scheduler_nodes (must be unique within a cluster)
+NODE_ID = os.environ.get('SCHEDULER_NODE_ID') or socket.gethostname()
+
+# Share the jobs with the other scheduler nodes using the same database (see cluster.py)
+CLUSTER_MODE = os.environ.get('SCHEDULER_CLUSTER', '0') == '1'
+
+# Labels of this node: in cluster mode, jobs with a node_label only run on nodes that have it
+NODE_LABELS = cluster.parse_labels(os.environ.get('SCHEDULER_LABELS'))
+
+# How job processes are started, as reported in the metrics
+PROCESS_MODES = ('supervised', 'forkserver', 'exec', 'remote')
+
+
+def process_mode(process) -> str:
+    """Which of PROCESS_MODES started a job process"""
+    if isinstance(process, supervisor.SupervisedProcess):
+        return 'supervised'
+    if isinstance(process, forkserver.ForkedProcess):
+        return 'forkserver'
+    if isinstance(process, workers.RemoteProcess):
+        return 'remote'
+    return 'exec'
+
+
+def count_child_processes() -> Dict[tuple, int]:
+    """Live job processes per start mode"""
+    counts = {(mode,): 0 for mode in PROCESS_MODES}
+    for slot in registry.running_slots():
+        if slot.process is not None:
+            counts[(process_mode(slot.process),)] += 1
+    return counts
+
+
+TICK_SECONDS = metrics.Histogram(
+    'cronishe_scheduler_tick_duration_seconds', 'Time spent per scheduler tick (retries, due check and launches)')
+SCHEDULE_LAG_SECONDS = metrics.Histogram(
+    'cronishe_schedule_lag_seconds', 'Delay between the time a run was due and its start',
+    ['frequency_type'], buckets=(0.1, 0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600))
+JOBS_DUE = metrics.Gauge('cronishe_jobs_due', 'Jobs found due in the last scheduler tick')
+metrics.Gauge('cronishe_runs_running', 'Runs live in this scheduler', callback=lambda: len(registry.running_slots()))
+metrics.Gauge('cronishe_runs_queued', 'Jobs with a run queued behind a running one', callback=registry.queued_count)
+metrics.Gauge('cronishe_retry_queue_depth', 'Retries waiting in the retry queue', callback=count_retries)
+metrics.Gauge('cronishe_child_processes', 'Live job processes by start mode', ['mode'], callback=count_child_processes)
+metrics.Gauge('cronishe_workers', 'Remote workers registered with this scheduler', callback=lambda: len(workers.pool.summary()))
+PROCESSES_STARTED = metrics.Counter('cronishe_processes_started', 'Job processes started', ['mode'])
+RUNS_FINISHED = metrics.Counter('cronishe_runs_finished', 'Runs finished, by result', ['result'])
+LOG_LINES = metrics.Counter('cronishe_log_lines_ingested', 'Log lines captured from job output')
+LOG_BYTES = metrics.Counter('cronishe_log_bytes_ingested', 'Bytes of job output captured (UTF-8)')
+WEBHOOK_SECONDS = metrics.Histogram(
+    'cronishe_webhook_duration_seconds', 'Latency of webhook requests (each attempt)', ['event'])
+WEBHOOK_ATTEMPT_FAILURES = metrics.Counter(
+    'cronishe_webhook_attempt_failures', 'Webhook attempts that failed (and were retried or given up)', ['event'])
+WEBHOOK_FAILURES = metrics.Counter('cronishe_webhook_failures', 'Webhooks that failed after all attempts', ['event'])
+
 
 def calculate_retry_delay(job: Dict, attempt_number: int) -> int:
     """
@@ -83,11 +217,13 @@ def call_webhook(url: Optional[str], job_name: str, context: str):
 
     for attempt in range(max_attempts):
         try:
-            response = requests.get(url, timeout=10)
+            with WEBHOOK_SECONDS.time(context):
+                response = requests.get(url, timeout=10)
             response.raise_for_status()  # Raise exception for 4xx/5xx status codes
             logger.info(f"Webhook {context} called for job '{job_name}': {url} (status: {response.status_code}, attempt: {attempt + 1})")
             return  # Success, exit function
         except Exception as e:
+            WEBHOOK_ATTEMPT_FAILURES.inc(context)
             if attempt < max_attempts - 1:
                 # Not the last attempt, wait and retry
                 wait_time = wait_times[attempt]
@@ -96,9 +232,75 @@ def call_webhook(url: Optional[str], job_name: str, context: str):
             else:
                 # Last attempt failed, log error
                 logger.error(f"Webhook {context} for job '{job_name}' failed after {max_attempts} attempts: {e}")
+                WEBHOOK_FAILURES.inc(context)
+
+
+def get_forkserver() -> forkserver.ForkServer:
+    """Return the shared forkserver, creating it on first use"""
+    global _forkserver
+    with _forkserver_lock:
+        if _forkserver is None:
+            _forkserver = forkserver.ForkServer(FORKSERVER_PRELOAD)
+        return _forkserver
+
+
+def spool_base(run_id: int) -> str:
+    """Path prefix of a supervised run's spool files"""
+    return os.path.join(SPOOL_DIR, str(run_id))
+
+
+def start_process(job: Dict, run_id: Optional[int] = None):
+    """
+    Start a job's process with stdout and stderr captured.
+
+    While remote workers are registered, the run is sent to the least loaded
+    one that can run the job (see workers.py), which returns a RemoteProcess.
+    exec_mode 'python' jobs are forked from the warm forkserver when the
+    platform supports it and the path is a plain Python script invocation.
+    Otherwise, with SUPERVISE_JOBS on (the default on Unix), the job runs
+    under a detached supervisor that spools its output to a file. Everything
+    else (and any forkserver failure) uses subprocess.Popen with a pipe.
+    """
+    if workers.pool.is_active() and run_id is not None:
+        process = workers.pool.assign(job, run_id)
+        if process is not None:
+            return process
+
+    if job.get('exec_mode') == 'python' and forkserver.is_supported():
+        request = forkserver.parse_python_command(shlex.split(job['path']))
+        if request:
+            request['cwd'] = job.get('cwd')
+            request['env'] = json.loads(job['env']) if job.get('env') else None
+            try:
+                return get_forkserver().spawn(request)
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Forkserver unavailable for job '{job['name']}', falling back to exec: {e}")
+        else:
+            logger.info(f"Job '{job['name']}' is not a plain Python script invocation, using exec")
+
+    if SUPERVISE_JOBS and run_id is not None:
+        os.makedirs(SPOOL_DIR, exist_ok=True)
+        return supervisor.launch(spool_base(run_id), build_popen_args(job))
 
+    return subprocess.Popen(
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        **build_popen_args(job)
+    )
 
-def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
+
+def stop_run_process(process):
+    """Stop a run's process, local or on a remote worker"""
+    if isinstance(process, workers.RemoteProcess):
+        process.terminate()
+    else:
+        stop_process(process.pid)
+
+
+def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0,
+                dag_run_id: Optional[int] = None, slot: Optional[RunSlot] = None) -> str:
     """
     Execute a job as a subprocess with output capture.
 
@@ -106,10 +308,15 @@ def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
         job: Job dictionary with all job details
         is_retry: Whether this is a retry attempt (default: False)
         retry_attempt: The retry attempt number if is_retry=True (0 for regular run)
+        dag_run_id: DAG run this execution belongs to. DAG runs retry failed
+            nodes themselves, so no retries are queued for them.
+        slot: Registry slot reserved for this run (see reserve_slot)
+
+    Returns:
+        The run result ('success', 'fail' or 'aborted')
     """
     job_id = job['id']
     job_name = job['name']
-    job_path = job['path']
     retry_count = job.get('retry_count', 3)
 
     retry_suffix = f" (retry {retry_attempt}/{retry_count})" if is_retry else ""
@@ -119,7 +326,9 @@ def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
     start_time = datetime.now(timezone.utc)
 
     # Create job run record
-    run_id = create_job_run(job_id)
+    run_id = create_job_run(job_id, dag_run_id, retry_attempt if is_retry else 0, NODE_ID)
+    if slot is not None:
+        registry.attach(slot, run_id)
 
     # Add log line indicating if this is a retry
     if is_retry:
@@ -130,39 +339,135 @@ def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
 
     try:
         # Start the process
-        process = subprocess.Popen(
-            job_path,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            shell=True
-        )
-
-        # Save the PID to the database for stop functionality
-        update_run_pid(run_id, process.pid)
-        logger.info(f"Job '{job_name}' started with PID {process.pid}")
-
-        # Capture output line by line
-        for line in iter(process.stdout.readline, ''):
-            if line:
-                line = line.rstrip()
-                logger.info(f"[{job_name}] {line}")
-                add_log_line(run_id, line)
+        process = start_process(job, run_id)
+
+        if isinstance(process, workers.RemoteProcess):
+            set_run_worker(run_id, process.worker_id)
+            logger.info(f"Job '{job_name}' sent to worker '{process.worker_id}'")
+        else:
+            # Save the PID to the database for stop functionality (and reattaching after a restart)
+            update_run_pid(run_id, process.pid, getattr(process, 'start_time', None))
+            logger.info(f"Job '{job_name}' started with PID {process.pid}")
+        PROCESSES_STARTED.inc(process_mode(process))
+
+        if slot is not None:
+            registry.attach(slot, run_id, process)
+            # Replaced while we were spawning - stop right away
+            if slot.stopped:
+                stop_run_process(process)
+
+    except Exception as e:
+        return fail_run(job, run_id, start_time, e, is_retry, dag_run_id)
+
+    return monitor_run(job, run_id, process, start_time, is_retry, retry_attempt, dag_run_id, slot)
+
+
+def read_output_batches(process, supervised: bool):
+    """
+    Yield a local process's output as (lines, spool offset) batches of up to
+    LOG_BATCH_LINES lines, at least every LOG_FLUSH_SECONDS while it prints.
+    The offset is the spool file position after the batch (None unless supervised).
+    """
+    lines = queue.Queue()
+
+    def read():
+        try:
+            for line in iter(process.stdout.readline, ''):
+                lines.put((line.rstrip(), process.stdout.offset if supervised else None))
+        except Exception as e:
+            lines.put(e)
+        lines.put(None)
+
+    threading.Thread(target=read, name=f'output-{process.pid}', daemon=True).start()
+
+    batch = []
+    offset = None
+    flush_at = time.monotonic() + LOG_FLUSH_SECONDS
+    while True:
+        try:
+            item = lines.get(timeout=max(0.0, flush_at - time.monotonic()) if batch else None)
+        except queue.Empty:
+            item = ()
+        if isinstance(item, Exception):
+            raise item
+        if item is None:
+            break
+        if item:
+            if not batch:
+                flush_at = time.monotonic() + LOG_FLUSH_SECONDS
+            batch.append(item[0])
+            offset = item[1]
+        if batch and (len(batch) >= LOG_BATCH_LINES or time.monotonic() >= flush_at):
+            yield batch, offset
+            batch = []
+    if batch:
+        yield batch, offset
+
+
+def monitor_run(job: Dict, run_id: int, process, start_time: datetime, is_retry: bool = False,
+                retry_attempt: int = 0, dag_run_id: Optional[int] = None,
+                slot: Optional[RunSlot] = None) -> str:
+    """
+    Capture a started run's output until it exits, then record the result,
+    call webhooks and schedule retries. Used for new runs and for runs
+    reattached after a scheduler restart.
+
+    Returns:
+        The run result ('success', 'fail' or 'aborted')
+    """
+    job_id = job['id']
+    job_name = job['name']
+    retry_count = job.get('retry_count', 3)
+    supervised = isinstance(process, supervisor.SupervisedProcess)
+    remote = isinstance(process, workers.RemoteProcess)
+
+    try:
+        if remote:
+            # Output arrives from the worker in batches, each stored in one transaction
+            for lines in process.output_batches():
+                for line in lines:
+                    logger.info(f"[{job_name}] {line}")
+                add_log_lines(run_id, lines)
+                LOG_LINES.inc(amount=len(lines))
+                LOG_BYTES.inc(amount=sum(len(line.encode()) for line in lines))
+        else:
+            # Output is read line by line and stored in batches, each in one transaction
+            for lines, offset in read_output_batches(process, supervised):
+                for line in lines:
+                    logger.info(f"[{job_name}] {line}")
+                add_log_lines(run_id, lines, offset)
+                LOG_LINES.inc(amount=len(lines))
+                LOG_BYTES.inc(amount=sum(len(line.encode()) for line in lines))
 
         # Wait for process to complete
         process.wait()
 
+        if remote and process.resources:
+            record_run_resources(run_id, process.resources.get('cpu_seconds'), process.resources.get('max_rss_kb'))
+
         # Calculate duration in seconds
         end_time = datetime.now(timezone.utc)
         duration = int((end_time - start_time).total_seconds())
 
+        # Stopped by the user, or replaced by a newer run (overlap_policy 'replace'): record as aborted, no retries
+        if slot is not None and slot.stopped:
+            if slot.stop_reason == 'user':
+                add_log_line(run_id, "Job stopped by user")
+                logger.info(f"Job '{job_name}' run {run_id} was stopped by the user")
+            else:
+                add_log_line(run_id, "Job stopped - replaced by a newer run")
+                logger.info(f"Job '{job_name}' run {run_id} was replaced by a newer run")
+            abort_run(run_id, duration)
+            RUNS_FINISHED.inc('aborted')
+            return 'aborted'
+
         # Determine result based on exit code
         result = 'success' if process.returncode == 0 else 'fail'
 
         # Update job run
         finish_job_run(run_id, result, duration)
         update_job_last_run(job_id, result)
+        RUNS_FINISHED.inc(result)
 
         logger.info(f"Job '{job_name}' finished with result: {result} (exit code: {process.returncode}, duration: {duration}s)")
 
@@ -176,16 +481,9 @@ def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
             call_webhook(job['on_fail'], job_name, 'on_fail')
 
             # Schedule retries if this was the initial run and retry_count > 0
-            if not is_retry and retry_count > 0:
-                # Clear any existing retries for this job first
-                clear_retries_for_job(job_id)
-
-                # Schedule retries
-                for attempt in range(1, retry_count + 1):
-                    delay_minutes = calculate_retry_delay(job, attempt)
-                    retry_time = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=delay_minutes)
-                    schedule_retry(job_id, run_id, attempt, retry_time)
-                    logger.info(f"Scheduled retry {attempt}/{retry_count} for job '{job_name}' in {delay_minutes} minute(s) at {retry_time}")
+            # (DAG runs retry their nodes themselves)
+            if dag_run_id is None and not is_retry and retry_count > 0:
+                schedule_retries(job, run_id)
 
             elif is_retry and retry_attempt < retry_count:
                 # This was a retry that failed, but there are more retries left
@@ -195,25 +493,279 @@ def execute_job(job: Dict, is_retry: bool = False, retry_attempt: int = 0):
                 # This was the last retry and it failed
                 logger.error(f"Job '{job_name}' failed after {retry_count} retry attempts")
 
+        return result
+
     except Exception as e:
-        # Calculate duration even for failed jobs
-        end_time = datetime.now(timezone.utc)
-        duration = int((end_time - start_time).total_seconds())
+        return fail_run(job, run_id, start_time, e, is_retry, dag_run_id)
 
-        logger.error(f"Error executing job '{job_name}': {e}")
-        add_log_line(run_id, f"ERROR: {str(e)}")
-        finish_job_run(run_id, 'fail', duration)
-        update_job_last_run(job_id, 'fail')
-        call_webhook(job['on_fail'], job_name, 'on_fail')
+    finally:
+        if supervised:
+            supervisor.remove_spool(process.spool_base)
 
-        # Same retry logic as above for exception case
-        if not is_retry and job.get('retry_count', 3) > 0:
-            clear_retries_for_job(job_id)
-            for attempt in range(1, retry_count + 1):
-                delay_minutes = calculate_retry_delay(job, attempt)
-                retry_time = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=delay_minutes)
-                schedule_retry(job_id, run_id, attempt, retry_time)
-                logger.info(f"Scheduled retry {attempt}/{retry_count} for job '{job_name}' in {delay_minutes} minute(s) at {retry_time}")
+
+def schedule_retries(job: Dict, run_id: int):
+    """Queue all retry attempts for a failed run, replacing any pending ones"""
+    retry_count = job.get('retry_count', 3)
+
+    # Clear any existing retries for this job first
+    clear_retries_for_job(job['id'])
+
+    for attempt in range(1, retry_count + 1):
+        delay_minutes = calculate_retry_delay(job, attempt)
+        retry_time = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=delay_minutes)
+        schedule_retry(job['id'], run_id, attempt, retry_time)
+        logger.info(f"Scheduled retry {attempt}/{retry_count} for job '{job['name']}' in {delay_minutes} minute(s) at {retry_time}")
+
+
+def fail_run(job: Dict, run_id: int, start_time: datetime, error: Exception,
+             is_retry: bool = False, dag_run_id: Optional[int] = None) -> str:
+    """Record a run that couldn't be started or monitored as failed"""
+    # Calculate duration even for failed jobs
+    end_time = datetime.now(timezone.utc)
+    duration = int((end_time - start_time).total_seconds())
+
+    logger.error(f"Error executing job '{job['name']}': {error}")
+    add_log_line(run_id, f"ERROR: {str(error)}")
+    finish_job_run(run_id, 'fail', duration)
+    update_job_last_run(job['id'], 'fail')
+    RUNS_FINISHED.inc('fail')
+    call_webhook(job['on_fail'], job['name'], 'on_fail')
+
+    # Same retry logic as for a non-zero exit code
+    if dag_run_id is None and not is_retry and job.get('retry_count', 3) > 0:
+        schedule_retries(job, run_id)
+
+    return 'fail'
+
+
+def get_downstream_map(graph: Dict[int, List[int]]) -> Dict[int, List[int]]:
+    """Invert a {job_id: [upstream IDs]} graph into {job_id: [downstream IDs]}"""
+    downstream = {}
+    for job_id, upstream_ids in graph.items():
+        for upstream_id in upstream_ids:
+            downstream.setdefault(upstream_id, []).append(job_id)
+    return downstream
+
+
+def execute_dag(root_job: Dict, graph: Dict[int, List[int]], root_slot: RunSlot):
+    """
+    Execute root_job and every job downstream of it as one DAG run.
+
+    A job becomes ready as soon as all of its upstream jobs inside this DAG
+    have succeeded, and ready jobs start immediately in parallel (up to
+    DAG_MAX_PARALLEL). A job that also depends on jobs outside this DAG
+    (fan-in from independently scheduled upstreams) only runs if each of
+    those has succeeded since the job last ran; otherwise it is skipped and
+    runs in the DAG of the last upstream to succeed. A failed job is
+    retried (up to its retry_count, after the usual retry delays) and only
+    once it has failed for good is everything downstream of it skipped.
+    The whole execution is recorded as a single dag_runs row and each job
+    run is linked to it via job_runs.dag_run_id.
+
+    root_slot is the registry slot already reserved for root_job; the other
+    jobs reserve their own slots and are skipped if their overlap policy
+    doesn't allow another run right now. A job waiting for its retry holds
+    neither a slot nor a DAG_MAX_PARALLEL place: a timer puts it back among
+    the ready jobs, and a retry that can't get a slot tries again a minute
+    later.
+    """
+    root_id = root_job['id']
+    downstream = get_downstream_map(graph)
+
+    # Collect the root and all of its descendants
+    nodes = {root_id}
+    stack = [root_id]
+    while stack:
+        for child_id in downstream.get(stack.pop(), []):
+            if child_id not in nodes:
+                nodes.add(child_id)
+                stack.append(child_id)
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(nodes))
+        cursor.execute(f"SELECT * FROM jobs WHERE id IN ({placeholders})", list(nodes))
+        jobs = {row['id']: dict(row) for row in cursor.fetchall()}
+    jobs[root_id] = root_job
+
+    # Number of upstream jobs (within this DAG) each node is still waiting for
+    waiting = {node: len([u for u in graph.get(node, []) if u in nodes]) for node in nodes}
+
+    dag_run_id = create_dag_run(root_id, len(nodes), NODE_ID)
+    start_time = datetime.now(timezone.utc)
+    logger.info(f"Starting DAG run {dag_run_id} from job '{root_job['name']}' (ID: {root_id}) with {len(nodes)} job(s)")
+
+    outcome = {}
+    ready = [root_id]
+    running = 0
+    # Retry attempt each failed node is waiting for or about to make
+    attempts = {}
+    cond = threading.Condition()
+
+    def skip(node_id: int, reason: str):
+        """Mark a node and all of its undecided descendants as skipped (caller holds cond)"""
+        pending = [node_id]
+        while pending:
+            current = pending.pop()
+            if current in outcome:
+                continue
+            outcome[current] = 'skipped'
+            name = jobs[current]['name'] if current in jobs else f"#{current}"
+            logger.info(f"DAG run {dag_run_id}: skipping job '{name}' ({reason})")
+            pending.extend(downstream.get(current, []))
+
+    def requeue(node_id: int):
+        """Timer callback: make a node waiting for its retry ready again"""
+        with cond:
+            ready.append(node_id)
+            cond.notify()
+
+    def retry_later(node_id: int, delay_minutes: float):
+        timer = threading.Timer(delay_minutes * 60, requeue, args=(node_id,))
+        timer.daemon = True
+        timer.start()
+
+    def run_node(node_id: int, slot: RunSlot):
+        nonlocal running
+        job = jobs[node_id]
+        attempt = attempts.get(node_id, 0)
+        result = 'fail'
+        try:
+            result = execute_job(job, attempt > 0, attempt, dag_run_id, slot)
+        finally:
+            release_slot(slot)
+            with cond:
+                running -= 1
+                retry_count = job.get('retry_count', 3)
+                if result == 'fail' and attempt < retry_count:
+                    attempts[node_id] = attempt + 1
+                    delay_minutes = calculate_retry_delay(job, attempt + 1)
+                    logger.info(f"DAG run {dag_run_id}: retrying job '{job['name']}' "
+                                f"({attempt + 1}/{retry_count}) in {delay_minutes} minute(s)")
+                    retry_later(node_id, delay_minutes)
+                else:
+                    outcome[node_id] = result
+                    for child_id in downstream.get(node_id, []):
+                        if child_id in outcome:
+                            continue
+                        if result == 'success':
+                            waiting[child_id] -= 1
+                            if waiting[child_id] == 0:
+                                ready.append(child_id)
+                        else:
+                            skip(child_id, f"upstream job '{job['name']}' failed")
+                cond.notify()
+
+    with cond:
+        while len(outcome) < len(nodes):
+            while ready and running < DAG_MAX_PARALLEL:
+                node_id = ready.pop(0)
+                job = jobs.get(node_id)
+                retry = node_id in attempts
+                if not retry and (job is None or not job['active']):
+                    if node_id == root_id:
+                        release_slot(root_slot)
+                    skip(node_id, "job is inactive or was deleted")
+                    continue
+                if not retry and node_id != root_id:
+                    outside = [u for u in graph.get(node_id, []) if u not in nodes]
+                    pending = sorted(set(outside) - set(get_succeeded_jobs(outside, job['last_run'])))
+                    if pending:
+                        skip(node_id, "waiting for upstream job(s) "
+                                      f"{', '.join(f'ID {u}' for u in pending)} to succeed since its last run")
+                        continue
+                if node_id == root_id and not retry:
+                    slot = root_slot
+                else:
+                    _, slot = reserve_slot(job, allow_queue=False)
+                    if slot is None and retry:
+                        logger.info(f"DAG run {dag_run_id}: job '{job['name']}' is already running, "
+                                    f"retry {attempts[node_id]} tries again in a minute")
+                        retry_later(node_id, 1)
+                        continue
+                    if slot is None:
+                        skip(node_id, "job is already running")
+                        continue
+                running += 1
+                thread = threading.Thread(target=run_node, args=(node_id, slot))
+                thread.daemon = True
+                thread.start()
+            if len(outcome) < len(nodes):
+                cond.wait()
+
+    nodes_failed = sum(1 for result in outcome.values() if result == 'fail')
+    nodes_skipped = sum(1 for result in outcome.values() if result == 'skipped')
+    result = 'fail' if nodes_failed else 'success'
+    duration = int((datetime.now(timezone.utc) - start_time).total_seconds())
+    finish_dag_run(dag_run_id, result, duration, nodes_failed, nodes_skipped)
+
+    logger.info(f"DAG run {dag_run_id} finished with result: {result} ({nodes_failed} failed, {nodes_skipped} skipped, duration: {duration}s)")
+
+
+def reserve_slot(job: Dict, allow_queue: bool = True) -> Tuple[str, Optional[RunSlot]]:
+    """
+    Reserve a registry slot for a new run of job according to its overlap policy.
+
+    Returns the registry's decision ('start', 'replace', 'queued' or 'skip',
+    see RunRegistry.acquire) and the slot, None if the run was skipped or
+    queued. With the 'replace' policy the runs being replaced are stopped here.
+    """
+    decision, slot, replaced = registry.acquire(job, allow_queue)
+
+    if decision == 'skip':
+        logger.info(f"Job '{job['name']}' (ID: {job['id']}) is already running, skipping")
+    elif decision == 'queued':
+        logger.info(f"Job '{job['name']}' (ID: {job['id']}) is already running, queued to start when it finishes")
+    elif decision == 'replace':
+        for old in replaced:
+            logger.info(f"Job '{job['name']}' (ID: {job['id']}) is already running, replacing run {old.run_id}")
+            if old.process is not None:
+                stop_run_process(old.process)
+
+    return decision, slot
+
+
+def release_slot(slot: RunSlot):
+    """Release a finished run's slot and start the job's queued run, if any"""
+    queued_job, next_slot = registry.release(slot)
+    if queued_job is not None:
+        logger.info(f"Starting queued run of job '{queued_job['name']}' (ID: {queued_job['id']})")
+        start_in_slot(queued_job, next_slot)
+
+
+def _run_in_slot(slot: RunSlot, target, *args):
+    """Thread body: run target and always release the slot afterwards"""
+    try:
+        target(*args)
+    finally:
+        release_slot(slot)
+
+
+def start_in_slot(job: Dict, slot: RunSlot, graph: Optional[Dict[int, List[int]]] = None):
+    """Start a job in a background thread using an already reserved slot"""
+    if graph is None:
+        graph = get_dependency_graph()
+
+    if any(job['id'] in upstream_ids for upstream_ids in graph.values()):
+        # DAG nodes release their own slots (including the root's)
+        thread = threading.Thread(target=execute_dag, args=(job, graph, slot))
+    else:
+        thread = threading.Thread(target=_run_in_slot, args=(slot, execute_job, job, False, 0, None, slot))
+    thread.daemon = True
+    thread.start()
+
+
+def launch_job(job: Dict, graph: Optional[Dict[int, List[int]]] = None) -> str:
+    """
+    Start a job in a background thread - as a DAG run if other jobs depend on it.
+
+    The job's overlap policy decides what happens if it is already running.
+    Returns the decision of reserve_slot; a run was started for 'start' and 'replace'.
+    """
+    decision, slot = reserve_slot(job)
+    if slot is not None:
+        start_in_slot(job, slot, graph)
+    return decision
 
 
 def should_run_job(job: Dict, current_time: datetime) -> bool:
@@ -246,7 +798,7 @@ def should_run_job(job: Dict, current_time: datetime) -> bool:
         # Calculate time difference (both are naive UTC)
         minutes_since_last_run = (current_time - last_run_time).total_seconds() / 60
 
-        logger.info(f"Job '{job_name}' (ID: {job_id}): last_run={last_run}, current_time={current_time}, diff={minutes_since_last_run:.1f} min, interval={every_min} min")
+        logger.debug(f"Job '{job_name}' (ID: {job_id}): last_run={last_run}, current_time={current_time}, diff={minutes_since_last_run:.1f} min, interval={every_min} min")
 
         # Handle bad timestamps (last_run in the future) - likely from old code
         if minutes_since_last_run < 0:
@@ -312,22 +864,89 @@ def should_run_job(job: Dict, current_time: datetime) -> bool:
     return False
 
 
-def abort_running_jobs():
-    """Mark all currently running jobs as aborted on scheduler startup"""
+def reattach_process(run: Dict) -> Optional[supervisor.SupervisedProcess]:
+    """
+    Get a handle for a run left over from a previous scheduler session.
+
+    Returns None unless the run was supervised and its supervisor is still
+    alive (same PID and process start time) or has recorded an exit code.
+    """
+    base = spool_base(run['id'])
+    if not run['pid'] or not os.path.exists(base + '.log'):
+        return None
+    if supervisor.read_exit_code(base + '.exit') is None and not supervisor.is_alive(run['pid'], run['pid_start_time']):
+        return None
+    return supervisor.SupervisedProcess(run['pid'], base, run['pid_start_time'], run['spool_offset'] or 0)
+
+
+def resume_run(job: Dict, run: Dict, process: supervisor.SupervisedProcess, slot: RunSlot) -> str:
+    """Continue capturing a reattached run and record its result like a normal run"""
+    start_time = datetime.fromisoformat(str(run['start_at'])).replace(tzinfo=timezone.utc)
+    retry_attempt = run['retry_attempt'] or 0
+    add_log_line(run['id'], "Scheduler restarted - reattached to running job")
+    return monitor_run(job, run['id'], process, start_time, retry_attempt > 0, retry_attempt,
+                       run['dag_run_id'], slot)
+
+
+def recover_running_jobs():
+    """
+    Handle runs left unfinished by the previous scheduler session on startup.
+
+    Supervised runs that are still alive (or finished while the scheduler
+    was down) are reattached and their output capture resumes where it left
+    off. All other unfinished runs are marked as aborted. In cluster mode
+    only this node's runs are looked at; the other nodes' runs are theirs.
+    """
     with get_db() as conn:
         cursor = conn.cursor()
 
         # Find all job runs that are still running (no finish_at)
-        cursor.execute("""
-            SELECT id, job_id FROM job_runs
-            WHERE finish_at IS NULL
-        """)
-        running_jobs = cursor.fetchall()
+        if CLUSTER_MODE:
+            cursor.execute("SELECT * FROM job_runs WHERE finish_at IS NULL AND node_id = ?", (NODE_ID,))
+        else:
+            cursor.execute("""
+                SELECT * FROM job_runs
+                WHERE finish_at IS NULL
+            """)
+        running_jobs = [dict(row) for row in cursor.fetchall()]
+
+        cursor.execute("SELECT * FROM jobs")
+        jobs = {row['id']: dict(row) for row in cursor.fetchall()}
+
+    if not running_jobs:
+        logger.info("No running jobs from previous session")
+        return
+
+    dead_runs = []
+    reattached = []
+    for run in running_jobs:
+        process = reattach_process(run)
+        job = jobs.get(run['job_id'])
+        if process is None or job is None:
+            if process is not None:
+                # Job was deleted while the scheduler was down
+                stop_process(process.pid)
+            dead_runs.append(run)
+            continue
+
+        logger.info(f"Reattaching to run ID {run['id']} of job '{job['name']}' (ID: {job['id']}, PID {run['pid']})")
+        slot = registry.adopt(job['id'])
+        registry.attach(slot, run['id'], process)
+        thread = threading.Thread(target=_run_in_slot, args=(slot, resume_run, job, run, process, slot))
+        thread.daemon = True
+        thread.start()
+        reattached.append(run['id'])
+
+    # Their last heartbeat is from before the restart
+    heartbeat_runs(reattached)
+
+    if dead_runs:
+        logger.info(f"Found {len(dead_runs)} running job(s) from previous session that are gone, marking as aborted")
 
-        if running_jobs:
-            logger.info(f"Found {len(running_jobs)} running job(s) from previous session, marking as aborted")
+        with get_db() as conn:
+            cursor = conn.cursor()
 
-            for run in running_jobs:
+            for run in dead_runs:
                 run_id = run['id']
                 job_id = run['job_id']
 
@@ -344,19 +963,47 @@ def abort_running_jobs():
                     VALUES (?, ?, ?)
                 """, (run_id, datetime.now(timezone.utc).replace(tzinfo=None), "Job aborted - scheduler restarted"))
 
+                supervisor.remove_spool(spool_base(run_id))
                 logger.info(f"Marked run ID {run_id} (job ID {job_id}) as aborted")
 
             conn.commit()
-        else:
-            logger.info("No running jobs from previous session")
+
+    # DAG runs can't be resumed (their coordinating thread is gone)
+    abort_unfinished_dag_runs(NODE_ID if CLUSTER_MODE else None)
+
+
+def get_due_time(job: Dict, current_time: datetime) -> Optional[datetime]:
+    """When a job found due at current_time (naive UTC, whole minute) was due, if known"""
+    if job['frequency_type'] == 'at':
+        return current_time
+    if job['last_run'] and job['frequency_every_min']:
+        due = datetime.fromisoformat(job['last_run']) + timedelta(minutes=job['frequency_every_min'])
+        return due if due <= current_time else None
+    return None  # never run before
+
+
+def launch_due_jobs(jobs: List[Dict], current_time: datetime, graph: Optional[Dict[int, List[int]]] = None):
+    """Launch the jobs found due at current_time, recording how late each started"""
+    JOBS_DUE.set(len(jobs))
+    for job in jobs:
+        # The registry applies the job's overlap policy if it is already running
+        if launch_job(job, graph) in ('start', 'replace'):
+            due = get_due_time(job, current_time)
+            if due is not None:
+                lag = (datetime.now(timezone.utc).replace(tzinfo=None) - due).total_seconds()
+                SCHEDULE_LAG_SECONDS.observe(max(lag, 0.0), job['frequency_type'])
 
 
-def get_jobs_to_run() -> List[Dict]:
-    """Get all jobs that should be executed now"""
+def get_jobs_to_run(current_time: Optional[datetime] = None) -> List[Dict]:
+    """Get all jobs that should be executed at current_time (naive UTC, default: this minute)"""
     # Use naive UTC time for comparisons with database timestamps
-    current_time = datetime.now(ZoneInfo('UTC')).replace(second=0, microsecond=0, tzinfo=None)
+    if current_time is None:
+        current_time = datetime.now(ZoneInfo('UTC')).replace(second=0, microsecond=0, tzinfo=None)
     jobs_to_run = []
 
+    # Jobs with upstream dependencies run as part of their upstream's DAG, not on their own schedule
+    graph = get_dependency_graph()
+
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM jobs WHERE active = 1")
@@ -366,6 +1013,9 @@ def get_jobs_to_run() -> List[Dict]:
 
         for job in jobs:
             job_dict = dict(job)
+            if job_dict['id'] in graph:
+                logger.debug(f"Job '{job_dict['name']}' (ID: {job_dict['id']}) runs after its upstream jobs, skipping")
+                continue
             if should_run_job(job_dict, current_time):
                 jobs_to_run.append(job_dict)
 
@@ -377,20 +1027,340 @@ def get_jobs_to_run() -> List[Dict]:
     return jobs_to_run
 
 
+def get_membership() -> Optional[cluster.Membership]:
+    """The live scheduler nodes in cluster mode (None when this scheduler runs all jobs itself)"""
+    if not CLUSTER_MODE:
+        return None
+    return cluster.Membership(get_live_scheduler_nodes())
+
+
+def owns_job(job: Dict, membership: Optional[cluster.Membership]) -> bool:
+    """Whether this node is the one to run job (always, outside cluster mode)"""
+    return membership is None or membership.owner(job) == NODE_ID
+
+
+def claim_due_jobs(jobs: List[Dict], current_time: datetime,
+                   membership: Optional[cluster.Membership]) -> List[Dict]:
+    """
+    In cluster mode, keep only the due jobs this node owns and could claim
+    the run at current_time for. Jobs still running on another live node are
+    left to it, unless their overlap policy allows parallel runs.
+    """
+    if membership is None:
+        return jobs
+
+    remote_running = set(get_remote_running_jobs(NODE_ID))
+    owned = []
+    for job in jobs:
+        owner = membership.owner(job)
+        if owner is None:
+            logger.warning(f"Job '{job['name']}' (ID: {job['id']}) is due, but no live scheduler node has label '{job['node_label']}'")
+            continue
+        if owner != NODE_ID:
+            continue
+        if job['id'] in remote_running and job.get('overlap_policy') != 'parallel':
+            logger.info(f"Job '{job['name']}' (ID: {job['id']}) is still running on another scheduler node, skipping")
+            continue
+        owned.append(job)
+
+    claimed = set(claim_job_runs([job['id'] for job in owned], current_time, NODE_ID)) if owned else set()
+    for job in owned:
+        if job['id'] not in claimed:
+            logger.info(f"Job '{job['name']}' (ID: {job['id']}) was claimed by another scheduler node")
+
+    if jobs:
+        logger.info(f"Claimed {len(claimed)} of {len(jobs)} due job(s) for node '{NODE_ID}'")
+    return [job for job in owned if job['id'] in claimed]
+
+
+class CommandError(Exception):
+    """A command that can't be carried out; code says why ('not_found', 'conflict' or 'unsupported')"""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def run_command(command: Dict, job: Optional[Dict]) -> str:
+    """Carry out a command from the web UI against this scheduler's runs; returns a message for the caller"""
+    action = command['action']
+
+    if action == 'run':
+        if job is None:
+            raise CommandError('not_found', 'Job not found')
+        # The job's overlap policy decides, as for a scheduled run
+        logger.info(f"Run of job '{job['name']}' (ID: {job['id']}) requested")
+        decision = launch_job(job)
+        if decision == 'skip':
+            raise CommandError('conflict', 'Job is already running')
+        if decision == 'queued':
+            return 'Job is already running, queued to start when it finishes'
+        if decision == 'replace':
+            return 'Job started, replacing the running run'
+        return 'Job started'
+
+    run_id = command['run_id']
+    if action == 'stop':
+        slot = registry.stop_run(run_id, 'user')
+        if slot is not None:
+            # Still spawning: execute_job stops the process as soon as it exists
+            if slot.process is not None:
+                stop_run_process(slot.process)
+            logger.info(f"Stopping run {run_id} on request")
+            return 'Job stopped'
+        if registry.find_run(run_id) is not None:
+            # Being stopped already
+            return 'Job stopped'
+        run = get_running_run(run_id)
+        if run is None:
+            raise CommandError('not_found', 'Run not found or not running')
+        # Unfinished in the database, but no process of this scheduler runs it - just close the record
+        start_at = datetime.fromisoformat(run['start_at'])
+        duration = int((datetime.now(timezone.utc).replace(tzinfo=None) - start_at).total_seconds())
+        abort_runs({run_id: duration}, "Job stopped by user")
+        logger.info(f"Run {run_id} had no live process, marked as aborted")
+        return 'Job stopped'
+
+    if action == 'signal':
+        slot = registry.find_run(run_id)
+        if slot is None:
+            raise CommandError('not_found', 'Run not found or not running')
+        if slot.process is None:
+            raise CommandError('conflict', 'Run is still starting')
+        if isinstance(slot.process, workers.RemoteProcess):
+            raise CommandError('unsupported', "Signals can't be sent to runs on remote workers")
+        if os.name == 'nt':
+            raise CommandError('unsupported', "Signals aren't supported on Windows")
+        stop_process(slot.process.pid, getattr(signal, command['signal']))
+        logger.info(f"Sent {command['signal']} to run {run_id} on request")
+        return f"{command['signal']} sent"
+
+    raise CommandError('unsupported', f"Unknown command '{action}'")
+
+
+def handle_command(command: Dict, membership: Optional[cluster.Membership]):
+    """Take a pending command (unless another scheduler node owns its job) and record its outcome"""
+    job = None
+    if command['job_id'] is not None:
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT * FROM jobs WHERE id = ?", (command['job_id'],))
+            row = cursor.fetchone()
+            job = dict(row) if row else None
+        # Run commands for any node go to the scheduler node the job belongs to
+        if command['node_id'] is None and job is not None and not owns_job(job, membership):
+            return
+
+    if not claim_command(command['id'], NODE_ID):
+        return
+    try:
+        finish_command(command['id'], True, {'message': run_command(command, job)})
+    except CommandError as e:
+        finish_command(command['id'], False, {'error': str(e), 'code': e.code})
+    except Exception as e:
+        logger.error(f"Error carrying out command {command['id']} ({command['action']}): {e}")
+        finish_command(command['id'], False, {'error': str(e)})
+
+
+def open_wake_socket() -> Optional[socket.socket]:
+    """Bind this scheduler's wake-up socket in COMMAND_WAKE_DIR (None where unavailable)"""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    path = os.path.join(COMMAND_WAKE_DIR, f"{NODE_ID.replace(os.sep, '_')}.sock")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        os.makedirs(COMMAND_WAKE_DIR, exist_ok=True)
+        if os.path.exists(path):
+            os.unlink(path)
+        sock.bind(path)
+    except OSError as e:
+        sock.close()
+        logger.warning(f"Can't listen for command wake-ups at {path}, polling only: {e}")
+        return None
+    sock.setblocking(False)
+    return sock
+
+
+def command_loop():
+    """Background thread: carry out the run, stop and signal commands queued in the commands table"""
+    wake = open_wake_socket()
+    delay = COMMAND_POLL_SECONDS
+    while True:
+        try:
+            commands = get_pending_commands(NODE_ID)
+            if commands:
+                membership = get_membership()
+                for command in commands:
+                    handle_command(command, membership)
+                delay = COMMAND_POLL_SECONDS
+            else:
+                delay = min(delay * 2, COMMAND_IDLE_POLL_SECONDS)
+        except Exception as e:
+            logger.error(f"Error reading commands: {e}")
+
+        if wake is None:
+            time.sleep(delay)
+            continue
+        ready, _, _ = select.select([wake], [], [], delay)
+        if ready:
+            try:
+                while wake.recv(64):
+                    pass
+            except BlockingIOError:
+                pass
+
+
+def heartbeat_loop():
+    """Background thread: record every SCHEDULER_HEARTBEAT_SECONDS that this scheduler is alive"""
+    live_nodes = None
+    while True:
+        time.sleep(SCHEDULER_HEARTBEAT_SECONDS)
+        try:
+            heartbeat_scheduler_node(NODE_ID)
+            if CLUSTER_MODE:
+                node_ids = [node['node_id'] for node in get_live_scheduler_nodes()]
+                if node_ids != live_nodes:
+                    logger.info(f"Live scheduler nodes: {', '.join(node_ids)}")
+                    live_nodes = node_ids
+        except Exception as e:
+            logger.error(f"Error recording heartbeat: {e}")
+
+
+def live_run_ids() -> List[int]:
+    """
+    IDs of the runs this scheduler is tracking, for their heartbeats.
+
+    A run's slot is released when the thread capturing its output ends, so a
+    run whose thread died drops out here. A piped process that exited while
+    its output keeps going (children it left behind hold the pipe open) has
+    its process group stopped after RUN_HEARTBEAT_TIMEOUT_SECONDS, so the
+    capture can finish.
+    """
+    now = time.monotonic()
+    run_ids = []
+    for slot in registry.running_slots():
+        if slot.run_id is None:
+            continue
+        process = slot.process
+        if isinstance(process, subprocess.Popen) and process.poll() is not None:
+            if slot.exited_at is None:
+                slot.exited_at = now
+            elif now - slot.exited_at > RUN_HEARTBEAT_TIMEOUT_SECONDS:
+                logger.warning(f"Run {slot.run_id} exited {int(now - slot.exited_at)}s ago but its output is still open, "
+                               "stopping the processes it left behind")
+                stop_process(process.pid)
+                slot.exited_at = now
+        run_ids.append(slot.run_id)
+    return run_ids
+
+
+def stop_orphaned_run(run: Dict):
+    """Stop the processes of a supervised run of this node that no thread is tracking"""
+    if supervisor.is_alive(run['pid'], run['pid_start_time']):
+        logger.warning(f"Stopping untracked run {run['id']} of job ID {run['job_id']} (PID {run['pid']})")
+        stop_process(run['pid'])
+
+
+def run_heartbeat_loop():
+    """
+    Background thread: every RUN_HEARTBEAT_SECONDS, heartbeat this scheduler's
+    runs in one UPDATE, then abort the runs (of any node) whose heartbeat stopped.
+    """
+    while True:
+        time.sleep(RUN_HEARTBEAT_SECONDS)
+        try:
+            heartbeat_runs(live_run_ids())
+            for run in reap_orphaned_runs(NODE_ID, stop_orphaned_run):
+                RUNS_FINISHED.inc('aborted')
+                logger.warning(f"Run {run['id']} of job ID {run['job_id']} (node '{run['node_id']}') has had no "
+                               f"heartbeat since {run['heartbeat_at']}, marked as aborted")
+        except Exception as e:
+            logger.error(f"Error recording run heartbeats: {e}")
+
+
+def run_tick(current_utc: datetime):
+    """One scheduler tick at current_utc (naive UTC): start the due retries, then the jobs due this minute"""
+    # In cluster mode, which jobs this node is responsible for this minute
+    membership = get_membership()
+    if membership is not None:
+        prune_job_claims()
+    prune_commands()
+
+    # Check for pending retries
+    pending_retries = get_pending_retries(current_utc)
+    if pending_retries:
+        logger.info(f"Found {len(pending_retries)} pending retry(s)")
+
+        for retry in pending_retries:
+            retry_id = retry['id']
+            job_id = retry['job_id']
+            attempt_number = retry['attempt_number']
+
+            # Get the job details
+            with get_db() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+                job_row = cursor.fetchone()
+
+                if job_row:
+                    job = dict(job_row)
+
+                    # Another scheduler node handles this job's retries
+                    if not owns_job(job, membership):
+                        continue
+
+                    # Check if job is still active
+                    if not job['active']:
+                        logger.info(f"Job '{job['name']}' (ID: {job_id}) is inactive, canceling retry {attempt_number}")
+                        remove_retry(retry_id)
+                        continue
+
+                    # Reserve a slot atomically so the retry can't overlap a regular run
+                    _, slot = reserve_slot(job, allow_queue=False)
+                    if slot is None:
+                        logger.info(f"Skipping retry {attempt_number} of job '{job['name']}' (ID: {job_id}) for now")
+                        # Don't remove from queue yet - will retry next minute
+                        continue
+
+                    # Remove the retry from the queue - only the scheduler node that removes it runs it
+                    if not remove_retry(retry_id):
+                        release_slot(slot)
+                        continue
+
+                    # Execute the retry in a separate thread
+                    logger.info(f"Executing retry {attempt_number} for job '{job['name']}' (ID: {job_id})")
+                    thread = threading.Thread(target=_run_in_slot, args=(slot, execute_job, job, True, attempt_number, None, slot))
+                    thread.daemon = True
+                    thread.start()
+                else:
+                    # Job no longer exists, remove retry from queue
+                    logger.warning(f"Job ID {job_id} not found, removing retry from queue")
+                    remove_retry(retry_id)
+
+    # Get jobs that should run
+    current_minute = current_utc.replace(second=0, microsecond=0)
+    jobs = claim_due_jobs(get_jobs_to_run(current_minute), current_minute, membership)
+
+    # Execute each job (or the DAG it starts) in a separate thread
+    launch_due_jobs(jobs, current_minute, get_dependency_graph())
+
+
 def scheduler_loop():
     """Main scheduler loop - runs every minute"""
     logger.info("Scheduler started")
 
-    # Abort any jobs that were running when scheduler was stopped
-    abort_running_jobs()
+    # Reattach to jobs that survived the restart and abort the rest
+    recover_running_jobs()
+
+    # Only now, so a stop command or the reaper can't take a reattached run for a leftover
+    threading.Thread(target=command_loop, name='commands', daemon=True).start()
+    threading.Thread(target=run_heartbeat_loop, name='run-heartbeats', daemon=True).start()
 
     # Check for jobs immediately on startup
     logger.info("Performing initial job check")
-    jobs = get_jobs_to_run()
-    for job in jobs:
-        thread = threading.Thread(target=execute_job, args=(job,))
-        thread.daemon = True
-        thread.start()
+    current_minute = datetime.now(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+    launch_due_jobs(claim_due_jobs(get_jobs_to_run(current_minute), current_minute, get_membership()), current_minute)
+    heartbeat_scheduler_node(NODE_ID, tick=True)
 
     while True:
         try:
@@ -402,65 +1372,10 @@ def scheduler_loop():
             if sleep_seconds > 0:
                 time.sleep(sleep_seconds)
 
-            # Get current time as naive UTC for retry checking
-            current_utc = datetime.now(timezone.utc).replace(tzinfo=None)
-
-            # Check for pending retries
-            pending_retries = get_pending_retries(current_utc)
-            if pending_retries:
-                logger.info(f"Found {len(pending_retries)} pending retry(s)")
-
-                for retry in pending_retries:
-                    retry_id = retry['id']
-                    job_id = retry['job_id']
-                    attempt_number = retry['attempt_number']
-
-                    # Get the job details
-                    with get_db() as conn:
-                        cursor = conn.cursor()
-                        cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
-                        job_row = cursor.fetchone()
-
-                        if job_row:
-                            job = dict(job_row)
-
-                            # Check if job is already running before starting retry
-                            if is_job_running(job_id):
-                                logger.info(f"Job '{job['name']}' (ID: {job_id}) is already running, skipping retry {attempt_number}")
-                                # Don't remove from queue yet - will retry next minute
-                                continue
-
-                            # Check if job is still active
-                            if not job['active']:
-                                logger.info(f"Job '{job['name']}' (ID: {job_id}) is inactive, canceling retry {attempt_number}")
-                                remove_retry(retry_id)
-                                continue
-
-                            # Execute the retry in a separate thread
-                            logger.info(f"Executing retry {attempt_number} for job '{job['name']}' (ID: {job_id})")
-                            thread = threading.Thread(target=execute_job, args=(job, True, attempt_number))
-                            thread.daemon = True
-                            thread.start()
-
-                            # Remove the retry from the queue
-                            remove_retry(retry_id)
-                        else:
-                            # Job no longer exists, remove retry from queue
-                            logger.warning(f"Job ID {job_id} not found, removing retry from queue")
-                            remove_retry(retry_id)
-
-            # Get jobs that should run
-            jobs = get_jobs_to_run()
-
-            # Execute each job in a separate thread
-            for job in jobs:
-                # Check if job is already running before starting
-                if is_job_running(job['id']):
-                    logger.info(f"Job '{job['name']}' (ID: {job['id']}) is already running, skipping")
-                    continue
-                thread = threading.Thread(target=execute_job, args=(job,))
-                thread.daemon = True
-                thread.start()
+            tick_start = time.perf_counter()
+            run_tick(datetime.now(timezone.utc).replace(tzinfo=None))
+            TICK_SECONDS.observe(time.perf_counter() - tick_start)
+            heartbeat_scheduler_node(NODE_ID, tick=True)
 
         except KeyboardInterrupt:
             logger.info("Scheduler stopped by user")
@@ -475,5 +1390,23 @@ if __name__ == "__main__":
     init_database()
     logger.info("Database initialized")
 
+    register_scheduler_node(NODE_ID, socket.gethostname(), os.getpid(), NODE_LABELS)
+    if CLUSTER_MODE:
+        logger.info(f"Cluster mode: node '{NODE_ID}'" + (f" with labels {', '.join(NODE_LABELS)}" if NODE_LABELS else ""))
+    threading.Thread(target=heartbeat_loop, name='heartbeat', daemon=True).start()
+
+    if WORKER_PORT or WORKER_SOCKET:
+        try:
+            workers.start_server(WORKER_PORT, WORKER_SOCKET)
+        except ValueError as e:
+            logger.error(f"Not starting: {e}")
+            sys.exit(1)
+        logger.info("Accepting remote workers on " + " and ".join(
+            ([f"port {WORKER_PORT}"] if WORKER_PORT else []) + ([WORKER_SOCKET] if WORKER_SOCKET else [])))
+
+    if METRICS_PORT:
+        metrics.start_server(METRICS_PORT)
+        logger.info(f"Metrics available at http://0.0.0.0:{METRICS_PORT}/metrics")
+
     # Start scheduler
     scheduler_loop()
@@ -0,0 +1,299 @@
+"""
+HTTP server for the web UI and the manager.
+
+Bottle's built-in server (wsgiref) handles one request at a time, so a slow
+log page or a slow proxied instance would block every other user. serve()
+runs the app on a multi-threaded server instead, chosen with WEB_SERVER:
+
+    auto     - waitress if it is installed, otherwise threaded (default)
+    waitress - the waitress WSGI server (pip install "cronishe[server]")
+    threaded - standard library only: wsgiref with a pool of worker threads,
+               HTTP/1.1 keep-alive and socket timeouts
+
+Both servers use WEB_THREADS worker threads. Every open live log stream
+holds one of them, so size it for the expected number of viewers.
+"""
+import os
+import sys
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.simple_server import ServerHandler, WSGIRequestHandler, WSGIServer, make_server
+
+import bottle
+
+
+# Which server to run: auto, waitress or threaded
+WEB_SERVER = os.environ.get('WEB_SERVER', 'auto')
+
+# Worker threads handling requests
+WEB_THREADS = int(os.environ.get('WEB_THREADS', '16'))
+
+# Seconds a connection may sit idle (keep-alive, slow request or slow client) before it is closed
+WEB_TIMEOUT = float(os.environ.get('WEB_TIMEOUT', '60'))
+
+# Maximum open connections; further ones are refused with 503
+WEB_CONNECTION_LIMIT = int(os.environ.get('WEB_CONNECTION_LIMIT', '200'))
+
+# Bottle debug mode (tracebacks in error pages) - never enable in production
+WEB_DEBUG = os.environ.get('WEB_DEBUG', '0').lower() in ('1', 'true', 'yes')
+
+
+class _BodyReader:
+    """wsgi.input limited to the request's Content-Length, so unread bodies can be skipped on keep-alive"""
+
+    def __init__(self, rfile, length: int):
+        self._rfile = rfile
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self._rfile.readline(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def drain(self, limit: int = 1024 * 1024) -> bool:
+        """Discard what the app didn't read; False if more than limit bytes were left"""
+        if self.remaining > limit:
+            return False
+        while self.remaining:
+            if not self.read(min(self.remaining, 65536)):
+                return False
+        return True
+
+
+class KeepAliveServerHandler(ServerHandler):
+    """wsgiref response handler speaking HTTP/1.1"""
+
+    http_version = '1.1'
+    chunked = False
+
+    def cleanup_headers(self):
+        super().cleanup_headers()
+        handler = self.request_handler
+        bodyless = (self.status[:1] == '1' or self.status[:3] in ('204', '304')
+                    or self.environ['REQUEST_METHOD'] == 'HEAD')
+        if 'Content-Length' not in self.headers and not bodyless:
+            if handler.request_version == 'HTTP/1.1':
+                # Streamed response (JSON pages, log streams): send it in chunks to keep the connection
+                self.headers['Transfer-Encoding'] = 'chunked'
+                self.chunked = True
+            else:
+                # Without a length, closing the connection marks the end of the body
+                handler.close_connection = True
+        if handler.close_connection:
+            self.headers['Connection'] = 'close'
+        elif handler.request_version == 'HTTP/1.0':
+            self.headers['Connection'] = 'keep-alive'
+
+    def write(self, data):
+        if not self.headers_sent and self.status:
+            # Sending the headers decides whether the body is chunked
+            self.send_headers()
+        if self.chunked:
+            if not data:
+                # An empty chunk would end the body
+                return
+            data = b'%x\r\n%s\r\n' % (len(data), data)
+        super().write(data)
+
+    def finish_content(self):
+        super().finish_content()
+        if self.chunked:
+            self._write(b'0\r\n\r\n')
+            self._flush()
+
+    def handle_error(self):
+        # The response may be cut short, so the connection can't be reused
+        self.request_handler.close_connection = True
+        super().handle_error()
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """wsgiref request handler serving several requests per connection"""
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body go out in separate writes; with Nagle's algorithm the
+    # second waits for the client's delayed ACK on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.timeout = self.server.request_timeout
+        super().setup()
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            self.handle_one_request()
+
+    def handle_one_request(self):
+        try:
+            self.raw_requestline = self.rfile.readline(65537)
+        except (socket.timeout, ConnectionError):
+            self.close_connection = True
+            return
+        if not self.raw_requestline:
+            self.close_connection = True
+            return
+        if len(self.raw_requestline) > 65536:
+            self.requestline = ''
+            self.request_version = ''
+            self.command = ''
+            self.send_error(414)
+            self.close_connection = True
+            return
+
+        if not self.parse_request():
+            return
+
+        # Bodies we can't delimit (chunked uploads) end the connection after the response
+        if self.headers.get('Transfer-Encoding'):
+            self.close_connection = True
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = 0
+            self.close_connection = True
+        body = _BodyReader(self.rfile, length)
+
+        handler = KeepAliveServerHandler(
+            body, self.wfile, self.get_stderr(), self.get_environ(),
+            multithread=True,
+        )
+        handler.request_handler = self
+        handler.run(self.server.get_app())
+
+        if not self.close_connection and not body.drain():
+            self.close_connection = True
+
+    def log_request(self, code='-', size='-'):
+        if not self.server.quiet:
+            super().log_request(code, size)
+
+
+class PooledWSGIServer(WSGIServer):
+    """wsgiref server handing each connection to a fixed pool of worker threads"""
+
+    # Listen backlog
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, threads=WEB_THREADS, timeout=WEB_TIMEOUT,
+                 connection_limit=WEB_CONNECTION_LIMIT, quiet=False):
+        self.request_timeout = timeout
+        self.connection_limit = connection_limit
+        self.quiet = quiet
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            if self._connections >= self.connection_limit:
+                refused = True
+            else:
+                refused = False
+                self._connections += 1
+        if refused:
+            try:
+                request.sendall(b"HTTP/1.1 503 Service Unavailable\r\nConnection: close\r\nContent-Length: 0\r\n\r\n")
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._connections_lock:
+                self._connections -= 1
+
+    def handle_error(self, request, client_address):
+        # Clients going away mid-response are routine (closed tabs, dropped log streams)
+        if isinstance(sys.exc_info()[1], (ConnectionError, socket.timeout)):
+            return
+        super().handle_error(request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def make_threaded_server(app, host: str, port: int, threads: int = WEB_THREADS, timeout: float = WEB_TIMEOUT,
+                         connection_limit: int = WEB_CONNECTION_LIMIT, quiet: bool = False) -> PooledWSGIServer:
+    """Create (but don't start) the standard library server for app"""
+    def server_class(server_address, handler_class):
+        return PooledWSGIServer(server_address, handler_class, threads=threads, timeout=timeout,
+                                connection_limit=connection_limit, quiet=quiet)
+    return make_server(host, port, app, server_class=server_class, handler_class=KeepAliveRequestHandler)
+
+
+def precompile_templates(template_dir: str):
+    """
+    Compile every template in template_dir into Bottle's template cache.
+
+    Otherwise each page's template is parsed and compiled on its first
+    request after a restart.
+    """
+    for filename in sorted(os.listdir(template_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext != '.tpl':
+            continue
+        tpl = bottle.SimpleTemplate(name=name, lookup=bottle.TEMPLATE_PATH)
+        tpl.co  # compiled lazily on first access
+        # Same cache key as bottle.template() uses for a template name
+        bottle.TEMPLATES[(id(bottle.TEMPLATE_PATH), name)] = tpl
+
+
+def waitress_available() -> bool:
+    try:
+        import waitress  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def serve(app, host: str, port: int, server: str = WEB_SERVER, quiet: bool = False):
+    """Serve a WSGI app until interrupted"""
+    bottle.debug(WEB_DEBUG)
+
+    if server == 'auto':
+        server = 'waitress' if waitress_available() else 'threaded'
+
+    if server == 'waitress':
+        import waitress
+        print(f"Serving on http://{host}:{port} (waitress, {WEB_THREADS} threads)")
+        waitress.serve(
+            app, host=host, port=port,
+            threads=WEB_THREADS,
+            channel_timeout=WEB_TIMEOUT,
+            connection_limit=WEB_CONNECTION_LIMIT,
+            ident='cronishe',
+            _quiet=quiet,
+        )
+    elif server == 'threaded':
+        httpd = make_threaded_server(app, host, port, quiet=quiet)
+        print(f"Serving on http://{host}:{port} (threaded, {WEB_THREADS} threads)")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            httpd.server_close()
+    else:
+        raise ValueError(f"Unknown WEB_SERVER {server!r} (expected auto, waitress or threaded)")
@@ -0,0 +1,120 @@
+"""
+Serving of static/ with fingerprinted URLs and precompressed variants.
+
+Templates link assets through static_url(), which appends a short content
+hash (/static/logo.png?v=3f2a...). Requests carrying the current hash are
+cached by browsers for a year without revalidation; when a file changes,
+its URL changes with it. Requests without (or with an outdated) hash are
+revalidated on every use.
+
+precompress() writes a .gz copy next to every compressible asset once at
+startup, which is served to clients accepting gzip instead of compressing
+the file on every request.
+"""
+import os
+import gzip
+import hashlib
+import mimetypes
+from typing import Dict, Optional, Tuple
+
+from bottle import request, static_file
+
+from compression import accepts_gzip, is_compressible
+
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+# Cache lifetime for assets requested with their current fingerprint (one year)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+# filename -> (mtime_ns, size, fingerprint)
+_fingerprints: Dict[str, Tuple[int, int, str]] = {}
+
+
+def fingerprint(filename: str, root: str = STATIC_DIR) -> Optional[str]:
+    """Return a short hash of a static file's content (None if it doesn't exist)"""
+    path = os.path.join(root, filename)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    cached = _fingerprints.get(path)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:12]
+    _fingerprints[path] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def static_url(filename: str) -> str:
+    """URL of a static file, fingerprinted so it can be cached indefinitely"""
+    digest = fingerprint(filename)
+    return f"/static/{filename}?v={digest}" if digest else f"/static/{filename}"
+
+
+def precompress(root: str = STATIC_DIR) -> int:
+    """
+    Write <file>.gz for every compressible static file that lacks an up-to-date one.
+
+    Files that don't shrink are skipped. Returns the number of files written;
+    a read-only static directory is left as it is (assets are then served
+    uncompressed).
+    """
+    written = 0
+    for name in sorted(os.listdir(root)):
+        path = os.path.join(root, name)
+        if name.endswith('.gz') or not os.path.isfile(path):
+            continue
+        if not is_compressible(mimetypes.guess_type(name)[0]):
+            continue
+
+        gz_path = path + '.gz'
+        if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(path):
+            continue
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        # mtime=0 keeps the output reproducible
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) >= len(data):
+            continue
+        try:
+            with open(gz_path + '.tmp', 'wb') as f:
+                f.write(compressed)
+            os.replace(gz_path + '.tmp', gz_path)
+        except OSError as e:
+            print(f"Cannot precompress static files in {root}: {e}")
+            return written
+        written += 1
+    return written
+
+
+def serve(filename: str, root: str = STATIC_DIR):
+    """Serve a static file, precompressed when possible, with cache headers matching its URL"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    compressible = is_compressible(mimetype)
+    path = os.path.join(root, filename)
+    gz_path = path + '.gz'
+
+    if (compressible and accepts_gzip(request.headers.get('Accept-Encoding'))
+            and os.path.isfile(path) and os.path.isfile(gz_path)
+            and os.path.getmtime(gz_path) >= os.path.getmtime(path)):
+        resp = static_file(filename + '.gz', root=root, mimetype=mimetype)
+        resp.set_header('Content-Encoding', 'gzip')
+    else:
+        resp = static_file(filename, root=root)
+
+    if resp.status_code in (200, 304):
+        if compressible:
+            resp.set_header('Vary', 'Accept-Encoding')
+        version = request.query.get('v')
+        if version and version == fingerprint(filename, root):
+            resp.set_header('Cache-Control', f'public, max-age={IMMUTABLE_MAX_AGE}, immutable')
+        else:
+            resp.set_header('Cache-Control', 'no-cache')
+    return resp
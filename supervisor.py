@@ -0,0 +1,337 @@
+"""
+Supervisor shim that lets job runs survive a scheduler restart.
+
+Instead of being a direct child of the scheduler, each job runs under a tiny
+detached supervisor process:
+
+    scheduler  -->  supervisor.py (own session)  -->  job
+
+The supervisor copies the job's stdout/stderr to a spool file
+(<spool>/<run_id>.log) and writes the exit code to <spool>/<run_id>.exit
+when the job ends. The scheduler tails the spool file instead of a pipe, so
+if it restarts it can reattach to a still-running supervisor (identified by
+PID and process start time, to rule out PID reuse) and continue capturing
+from the last stored offset.
+
+The supervisor's stdout is a notification pipe to the scheduler that
+started it: a byte is written after each chunk of output, and the pipe
+closes when the supervisor exits, so the scheduler wakes up as soon as
+there is something to read. A scheduler that reattached after a restart
+has no such pipe and polls the spool file instead.
+
+Unix only - on other platforms the scheduler runs jobs directly.
+"""
+import os
+import sys
+import json
+import time
+import errno
+import select
+import signal
+import argparse
+import subprocess
+from typing import List, Optional
+
+
+# Poll interval bounds while waiting for new output in the spool file without a
+# notification pipe (seconds), and the longest wait on the pipe
+POLL_MIN = 0.05
+POLL_MAX = 0.5
+
+# How long the supervisor waits for more output once the job has exited and
+# only processes it left behind still hold its output open
+DRAIN_SECONDS = 0.1
+
+
+def is_supported() -> bool:
+    """Check whether jobs can be supervised on this platform"""
+    return os.name == 'posix'
+
+
+def process_start_time(pid: int) -> Optional[int]:
+    """
+    Return a process's start time (clock ticks since boot) or None.
+
+    Used together with the PID to make sure a PID found after a restart
+    still belongs to the same process. Only available where /proc exists.
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name (field 2) may contain spaces, so split after its closing paren
+    fields = stat[stat.rfind(b')') + 2:].split()
+    try:
+        return int(fields[19])
+    except (IndexError, ValueError):
+        return None
+
+
+def is_alive(pid: int, start_time: Optional[int]) -> bool:
+    """Check that pid is running and is the same process that was started at start_time"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if start_time is None:
+        return True
+    return process_start_time(pid) == start_time
+
+
+def read_exit_code(exit_path: str) -> Optional[int]:
+    """Read the job's exit code written by the supervisor, or None if it hasn't finished"""
+    try:
+        with open(exit_path) as f:
+            return json.load(f)['returncode']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def remove_spool(spool_base: str):
+    """Delete a finished run's spool files"""
+    for suffix in ('.log', '.exit'):
+        try:
+            os.unlink(spool_base + suffix)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Supervisor side (runs detached from the scheduler)
+# ---------------------------------------------------------------------------
+
+def supervise(log_path: str, exit_path: str, command: List[str], shell: bool) -> int:
+    """Run the job with output going to log_path, then record its exit code"""
+    # Stop signals go to the whole process group, which includes the job.
+    # Survive them ourselves so the exit code is always recorded (a handler,
+    # unlike SIG_IGN, is reset to the default for the job on exec).
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(sig, lambda *_: None)
+
+    # Notifications must never block the job's output (one pending byte is enough)
+    notify = sys.stdout.fileno()
+    os.set_blocking(notify, False)
+
+    with open(log_path, 'ab', buffering=0) as log:
+        try:
+            process = subprocess.Popen(
+                command[0] if shell else command,
+                shell=shell,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+        except OSError as e:
+            log.write(f"ERROR: {e}\n".encode())
+            returncode = 127
+        else:
+            output = process.stdout.fileno()
+            while True:
+                ready, _, _ = select.select([output], [], [], DRAIN_SECONDS)
+                if ready:
+                    chunk = os.read(output, 65536)
+                    if not chunk:
+                        break
+                    log.write(chunk)
+                    notify = _notify(notify)
+                elif process.poll() is not None:
+                    # The job exited, but processes it left behind hold its output open
+                    break
+            process.stdout.close()
+            returncode = process.wait()
+
+    # Write the exit code atomically so readers never see a partial file
+    tmp_path = exit_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'returncode': returncode}, f)
+    os.replace(tmp_path, exit_path)
+    return returncode
+
+
+def _notify(fd: Optional[int]) -> Optional[int]:
+    """Tell the scheduler there is new output; returns None once it is gone"""
+    if fd is None:
+        return None
+    try:
+        os.write(fd, b'.')
+    except BlockingIOError:
+        pass  # The scheduler hasn't read the previous notification yet
+    except OSError as e:
+        # The scheduler exited (EPIPE) or started us without a pipe
+        if e.errno in (errno.EPIPE, errno.EBADF, errno.EINVAL):
+            return None
+        raise
+    return fd
+
+
+# ---------------------------------------------------------------------------
+# Scheduler side
+# ---------------------------------------------------------------------------
+
+class SpoolReader:
+    """File-like reader that follows a spool file until the supervised job has exited"""
+
+    def __init__(self, handle: 'SupervisedProcess', offset: int = 0):
+        self._handle = handle
+        self._file = None
+        self._buffer = b''
+        # Byte offset just past the last line returned by readline()
+        self.offset = offset
+
+    def _open(self) -> bool:
+        if self._file is None:
+            try:
+                self._file = open(self._handle.log_path, 'rb')
+            except FileNotFoundError:
+                return False
+            self._file.seek(self.offset)
+        return True
+
+    def readline(self) -> str:
+        """Return the next complete line, blocking until one is written or the job ends ('' at EOF)"""
+        delay = POLL_MIN
+        while True:
+            newline = self._buffer.find(b'\n')
+            if newline != -1:
+                line = self._buffer[:newline + 1]
+                self._buffer = self._buffer[newline + 1:]
+                self.offset += len(line)
+                return line.decode('utf-8', errors='replace')
+
+            # Check for exit before reading, so nothing written before the exit is missed
+            finished = self._handle.poll() is not None
+            chunk = self._file.read(65536) if self._open() else b''
+            if chunk:
+                self._buffer += chunk
+                delay = POLL_MIN
+                continue
+
+            if finished:
+                line, self._buffer = self._buffer, b''
+                self.offset += len(line)
+                return line.decode('utf-8', errors='replace')
+
+            if self._handle.wait_for_output(delay):
+                delay = POLL_MIN
+            else:
+                delay = min(delay * 2, POLL_MAX)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SupervisedProcess:
+    """Minimal Popen-like handle for a job running under a supervisor"""
+
+    def __init__(self, pid: int, spool_base: str, start_time: Optional[int] = None,
+                 offset: int = 0, popen: Optional[subprocess.Popen] = None):
+        self.pid = pid
+        self.start_time = start_time
+        self.spool_base = spool_base
+        self.log_path = spool_base + '.log'
+        self.exit_path = spool_base + '.exit'
+        # Set when we started the supervisor ourselves (so we can reap it), with its notification pipe
+        self._popen = popen
+        self._notify = popen.stdout if popen is not None else None
+        self.returncode = None
+        self.stdout = SpoolReader(self, offset)
+
+    def poll(self) -> Optional[int]:
+        """Return the exit code if the job has finished, else None"""
+        if self.returncode is not None:
+            return self.returncode
+
+        returncode = read_exit_code(self.exit_path)
+        if returncode is not None:
+            self.returncode = returncode
+            if self._popen is not None:
+                self._popen.wait()
+            return returncode
+
+        # Supervisor gone without recording an exit code (e.g. SIGKILL): treat like a killed process
+        if self._popen is not None:
+            supervisor_gone = self._popen.poll() is not None
+        else:
+            supervisor_gone = not is_alive(self.pid, self.start_time)
+        if supervisor_gone:
+            returncode = read_exit_code(self.exit_path)
+            self.returncode = returncode if returncode is not None else -signal.SIGKILL
+        return self.returncode
+
+    def wait_for_output(self, delay: float) -> bool:
+        """
+        Block until the supervisor reports new output or exits (True), or
+        for delay seconds when there is no notification pipe (False).
+        """
+        if self._notify is None:
+            time.sleep(delay)
+            return False
+        ready, _, _ = select.select([self._notify], [], [], POLL_MAX)
+        if ready and not os.read(self._notify.fileno(), 4096):
+            # EOF: the supervisor has exited
+            self._notify.close()
+            self._notify = None
+        return True
+
+    def wait(self) -> int:
+        """Block until the job exits and return its exit code"""
+        if self._popen is not None:
+            self._popen.wait()
+        delay = POLL_MIN
+        while self.poll() is None:
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX)
+        self.stdout.close()
+        if self._notify is not None:
+            self._notify.close()
+            self._notify = None
+        return self.returncode
+
+
+def launch(spool_base: str, popen_args: dict) -> SupervisedProcess:
+    """
+    Start a job under a detached supervisor.
+
+    popen_args are the keyword arguments the job would otherwise be started
+    with (args, shell, env, cwd - see job_process.build_popen_args).
+    """
+    args = popen_args['args']
+    shell = popen_args.get('shell', False)
+    command = [args] if shell else list(args)
+
+    # -I: don't let the job's PYTHON* environment variables affect the supervisor
+    supervisor_args = [sys.executable, '-I', os.path.abspath(__file__),
+                       '--log', spool_base + '.log', '--exit', spool_base + '.exit']
+    if shell:
+        supervisor_args.append('--shell')
+    supervisor_args.append('--')
+    supervisor_args.extend(command)
+
+    popen = subprocess.Popen(
+        supervisor_args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=popen_args.get('env'),
+        cwd=popen_args.get('cwd'),
+        # Own session: survives the scheduler and is the target for stop signals
+        start_new_session=True,
+    )
+    return SupervisedProcess(popen.pid, spool_base, process_start_time(popen.pid), popen=popen)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cronishe job supervisor')
+    parser.add_argument('--log', required=True, help='Spool file for the job output')
+    parser.add_argument('--exit', required=True, help='File to write the exit code to')
+    parser.add_argument('--shell', action='store_true', help='Run the command through the shell')
+    parser.add_argument('command', nargs=argparse.REMAINDER, help='Command to run (after --)')
+    args = parser.parse_args()
+
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    sys.exit(0 if supervise(args.log, args.exit, command, args.shell) == 0 else 1)
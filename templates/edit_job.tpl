@@ -4,10 +4,10 @@
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Edit Job - Cronishe</title>
-    <link rel="apple-touch-icon" sizes="180x180" href="/static/apple-touch-icon.png">
-    <link rel="icon" type="image/png" sizes="32x32" href="/static/favicon-32x32.png">
-    <link rel="icon" type="image/png" sizes="16x16" href="/static/favicon-16x16.png">
-    <link rel="manifest" href="/static/site.webmanifest">
+    <link rel="apple-touch-icon" sizes="180x180" href="{{static_url('apple-touch-icon.png')}}">
+    <link rel="icon" type="image/png" sizes="32x32" href="{{static_url('favicon-32x32.png')}}">
+    <link rel="icon" type="image/png" sizes="16x16" href="{{static_url('favicon-16x16.png')}}">
+    <link rel="manifest" href="{{static_url('site.webmanifest')}}">
     <style>
         * {
             margin: 0;
@@ -70,7 +70,8 @@
 
         input[type="text"],
         input[type="number"],
-        select {
+        select,
+        textarea {
             width: 100%;
             padding: 10px;
             border: 1px solid #ddd;
@@ -80,11 +81,17 @@
 
         input[type="text"]:focus,
         input[type="number"]:focus,
-        select:focus {
+        select:focus,
+        textarea:focus {
             outline: none;
             border-color: #3498db;
         }
 
+        textarea {
+            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
+            resize: vertical;
+        }
+
         .checkbox-group {
             display: flex;
             gap: 15px;
@@ -192,7 +199,7 @@
     <div class="container">
         <div class="header">
             <div class="header-content">
-                <img src="/static/logo.png" alt="Cronishe" class="logo">
+                <img src="{{static_url('logo.png')}}" alt="Cronishe" class="logo">
                 <h1>Edit Job: {{job['name']}}</h1>
             </div>
         </div>
@@ -210,6 +217,55 @@
                     <div class="help-text">Example: <code>python /path/to/script.py</code> or <code>/path/to/executable.sh</code></div>
                 </div>
 
+                <div class="form-group">
+                    <label for="tags">Tags (optional)</label>
+                    <input type="text" id="tags" name="tags" value="{{job['tags_text']}}" placeholder="e.g. billing, nightly">
+                    <div class="help-text">Comma-separated. The manager can enable, disable, run or stop all jobs with a tag at once.</div>
+                </div>
+
+                <div class="form-group">
+                    <label for="node_label">Scheduler Label (optional)</label>
+                    <input type="text" id="node_label" name="node_label" value="{{job['node_label'] or ''}}" placeholder="e.g. gpu">
+                    <div class="help-text">With several schedulers in cluster mode, only scheduler nodes with this label in <code>SCHEDULER_LABELS</code> run the job.</div>
+                </div>
+
+                <div class="form-group">
+                    <label for="exec_mode">Execution Mode</label>
+                    <select id="exec_mode" name="exec_mode">
+                        <option value="shell" {{'selected' if job.get('exec_mode', 'shell') == 'shell' else ''}}>Shell (/bin/sh -c)</option>
+                        <option value="exec" {{'selected' if job.get('exec_mode') == 'exec' else ''}}>Direct exec (no shell)</option>
+                        <option value="python" {{'selected' if job.get('exec_mode') == 'python' else ''}}>Python (warm forkserver)</option>
+                    </select>
+                    <div class="help-text">Direct exec starts faster and receives stop signals directly, but does not support pipes, redirects or globbing. Python mode forks <code>python script.py</code> jobs from a warm interpreter with preloaded modules</div>
+                </div>
+
+                <div class="form-group">
+                    <label for="cwd">Working Directory (optional)</label>
+                    <input type="text" id="cwd" name="cwd" value="{{job.get('cwd') or ''}}" placeholder="/path/to/workdir">
+                </div>
+
+                <div class="form-group">
+                    <label for="env">Environment Variables (optional)</label>
+                    <textarea id="env" name="env" rows="3" placeholder="KEY=VALUE">{{job.get('env_text', '')}}</textarea>
+                    <div class="help-text">One <code>KEY=VALUE</code> per line, added to the scheduler's environment</div>
+                </div>
+
+                <div class="form-group">
+                    <label for="overlap_policy">If Still Running</label>
+                    <select id="overlap_policy" name="overlap_policy">
+                        <option value="skip" {{'selected' if job.get('overlap_policy', 'skip') == 'skip' else ''}}>Skip the new run</option>
+                        <option value="queue" {{'selected' if job.get('overlap_policy') == 'queue' else ''}}>Queue it until the current run finishes</option>
+                        <option value="parallel" {{'selected' if job.get('overlap_policy') == 'parallel' else ''}}>Run in parallel</option>
+                        <option value="replace" {{'selected' if job.get('overlap_policy') == 'replace' else ''}}>Stop the current run and start the new one</option>
+                    </select>
+                    <div class="help-text">What to do when the job is due while a previous run is still going. <code>Max parallel runs</code> only applies to the parallel policy</div>
+                </div>
+
+                <div class="form-group">
+                    <label for="max_parallel">Max Parallel Runs</label>
+                    <input type="number" id="max_parallel" name="max_parallel" min="1" value="{{job.get('max_parallel') or 1}}">
+                </div>
+
                 <div class="form-group">
                     <label for="frequency_type">Schedule Type</label>
                     <select id="frequency_type" name="frequency_type" onchange="toggleScheduleType()" required>
@@ -285,6 +341,16 @@
                     <div class="help-text">Priority zones (UTC, NZ, AU, US) are listed first</div>
                 </div>
 
+                <div class="form-group">
+                    <label for="depends_on">Run After (optional)</label>
+                    <select id="depends_on" name="depends_on" multiple size="5">
+                        % for choice in job_choices:
+                            <option value="{{choice['id']}}" {{'selected' if choice['id'] in job['depends_on'] else ''}}>{{choice['name']}} (#{{choice['id']}})</option>
+                        % end
+                    </select>
+                    <div class="help-text">Run this job when all selected jobs have succeeded instead of on its own schedule. Ctrl/Cmd-click to select several</div>
+                </div>
+
                 <div class="form-group">
                     <label for="on_start">On Start Webhook (optional)</label>
                     <input type="text" id="on_start" name="on_start" value="{{job.get('on_start') or ''}}" placeholder="https://example.com/webhook/start">
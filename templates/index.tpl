@@ -4,10 +4,10 @@
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Cronishe - Job Scheduler</title>
-    <link rel="apple-touch-icon" sizes="180x180" href="/static/apple-touch-icon.png">
-    <link rel="icon" type="image/png" sizes="32x32" href="/static/favicon-32x32.png">
-    <link rel="icon" type="image/png" sizes="16x16" href="/static/favicon-16x16.png">
-    <link rel="manifest" href="/static/site.webmanifest">
+    <link rel="apple-touch-icon" sizes="180x180" href="{{static_url('apple-touch-icon.png')}}">
+    <link rel="icon" type="image/png" sizes="32x32" href="{{static_url('favicon-32x32.png')}}">
+    <link rel="icon" type="image/png" sizes="16x16" href="{{static_url('favicon-16x16.png')}}">
+    <link rel="manifest" href="{{static_url('site.webmanifest')}}">
     <style>
         * {
             margin: 0;
@@ -146,6 +146,16 @@
             background: #f8f9fa;
         }
 
+        .job-tag {
+            display: inline-block;
+            margin: 4px 4px 0 0;
+            padding: 1px 7px;
+            border-radius: 10px;
+            background: #ecf0f1;
+            color: #555;
+            font-size: 11px;
+        }
+
         .status-badge {
             display: inline-block;
             padding: 4px 10px;
@@ -179,6 +189,18 @@
             gap: 5px;
         }
 
+        .sparkline {
+            display: block;
+        }
+
+        .sparkline rect {
+            fill: #27ae60;
+        }
+
+        .sparkline rect.has-failures {
+            fill: #e74c3c;
+        }
+
         .empty-state {
             text-align: center;
             padding: 60px 20px;
@@ -206,7 +228,7 @@
     <div class="container">
         <div class="header">
             <div class="header-content">
-                <img src="/static/logo.png" alt="Cronishe" class="logo">
+                <img src="{{static_url('logo.png')}}" alt="Cronishe" class="logo">
                 <div>
                     <h1>Cronishe - Job Scheduler</h1>
                     <div class="timezone-info">Showing times in: <span id="browser-timezone">Loading...</span></div>
@@ -234,13 +256,23 @@
                             <th>Last Run</th>
                             <th style="width: 80px;">Result</th>
                             <th style="width: 90px;">Duration</th>
+                            <th style="width: 120px;">Trend</th>
                             <th style="width: 280px;">Actions</th>
                         </tr>
                     </thead>
                     <tbody>
                         % for job in jobs:
                         <tr>
-                            <td style="word-wrap: break-word; white-space: normal;"><strong>{{job['name']}}</strong></td>
+                            <td style="word-wrap: break-word; white-space: normal;">
+                                <strong>{{job['name']}}</strong>
+                                % if job['tags']:
+                                <div>
+                                    % for tag in job['tags']:
+                                    <span class="job-tag">{{tag}}</span>
+                                    % end
+                                </div>
+                                % end
+                            </td>
                             <td><code>{{job['path']}}</code></td>
                             <td>{{job['schedule_text']}}</td>
                             <td>{{job.get('timezone') or 'UTC'}}</td>
@@ -270,6 +302,9 @@
                             <td>
                                 <code>{{job.get('last_duration', '-')}}</code>
                             </td>
+                            <td>
+                                <svg class="sparkline" data-job-id="{{job['id']}}" width="112" height="24"></svg>
+                            </td>
                             <td>
                                 <div class="actions">
                                     <button class="btn btn-success btn-sm" onclick="runJobNow({{job['id']}}, '{{job['name']}}')">Run Now</button>
@@ -328,6 +363,51 @@
             });
         });
 
+        // Draw daily run sparklines (bar height: runs per day, red: days with failures)
+        function drawSparkline(svg, data, days) {
+            const width = svg.width.baseVal.value;
+            const height = svg.height.baseVal.value;
+            const barWidth = width / days.length;
+            const maxRuns = Math.max(1, ...data.runs);
+            const ns = 'http://www.w3.org/2000/svg';
+
+            days.forEach(function(day, i) {
+                if (!data.runs[i]) return;
+                const barHeight = Math.max(2, Math.round(data.runs[i] / maxRuns * height));
+                const rect = document.createElementNS(ns, 'rect');
+                rect.setAttribute('x', (i * barWidth + 1).toFixed(1));
+                rect.setAttribute('y', height - barHeight);
+                rect.setAttribute('width', Math.max(1, barWidth - 2).toFixed(1));
+                rect.setAttribute('height', barHeight);
+                if (data.failures[i]) rect.classList.add('has-failures');
+
+                const title = document.createElementNS(ns, 'title');
+                const mean = data.duration_mean[i] === null ? '-' : data.duration_mean[i] + 's';
+                title.textContent = `${day}: ${data.runs[i]} runs, ${data.failures[i]} failed, mean ${mean}`;
+                rect.appendChild(title);
+                svg.appendChild(rect);
+            });
+        }
+
+        async function loadSparklines() {
+            const svgs = document.querySelectorAll('.sparkline');
+            if (!svgs.length) return;
+
+            try {
+                const response = await fetch('/api/jobs/sparklines');
+                if (!response.ok) return;
+                const data = await response.json();
+                svgs.forEach(function(svg) {
+                    const jobData = data.jobs[svg.getAttribute('data-job-id')];
+                    if (jobData) drawSparkline(svg, jobData, data.days);
+                });
+            } catch (error) {
+                // Sparklines are optional; leave them empty
+            }
+        }
+
+        document.addEventListener('DOMContentLoaded', loadSparklines);
+
         // Run job now
         async function runJobNow(jobId, jobName) {
             if (!confirm(`Run job "${jobName}" now?`)) {
@@ -349,7 +429,7 @@
                     return;
                 }
 
-                alert('Job started successfully!');
+                alert(data.message || 'Job started successfully!');
                 // Reload page to show updated state
                 setTimeout(() => location.reload(), 1000);
             } catch (error) {
@@ -4,10 +4,10 @@
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Job Runs - Cronishe</title>
-    <link rel="apple-touch-icon" sizes="180x180" href="/static/apple-touch-icon.png">
-    <link rel="icon" type="image/png" sizes="32x32" href="/static/favicon-32x32.png">
-    <link rel="icon" type="image/png" sizes="16x16" href="/static/favicon-16x16.png">
-    <link rel="manifest" href="/static/site.webmanifest">
+    <link rel="apple-touch-icon" sizes="180x180" href="{{static_url('apple-touch-icon.png')}}">
+    <link rel="icon" type="image/png" sizes="32x32" href="{{static_url('favicon-32x32.png')}}">
+    <link rel="icon" type="image/png" sizes="16x16" href="{{static_url('favicon-16x16.png')}}">
+    <link rel="manifest" href="{{static_url('site.webmanifest')}}">
     <style>
         * {
             margin: 0;
@@ -176,13 +176,18 @@
             color: #ecf0f1;
             margin-top: 5px;
         }
+
+        .load-more {
+            text-align: center;
+            margin-top: 20px;
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
             <div class="header-content">
-                <img src="/static/logo.png" alt="Cronishe" class="logo">
+                <img src="{{static_url('logo.png')}}" alt="Cronishe" class="logo">
                 <div>
                     <h1>Job Runs: {{job['name']}}</h1>
                     <div class="timezone-info">Showing times in: <span id="browser-timezone">Loading...</span></div>
@@ -214,7 +219,7 @@
                             <th style="width: 100px;">Actions</th>
                         </tr>
                     </thead>
-                    <tbody>
+                    <tbody id="runs-body">
                         % for run in runs:
                         <tr>
                             <td>{{run['id']}}</td>
@@ -256,6 +261,11 @@
                         % end
                     </tbody>
                 </table>
+                % if has_more:
+                <div class="load-more">
+                    <button id="load-more-runs" class="btn btn-secondary" data-before-id="{{runs[-1]['id']}}" onclick="loadMoreRuns()">Load more</button>
+                </div>
+                % end
             % end
         </div>
     </div>
@@ -295,6 +305,84 @@
             });
         });
 
+        // Append the next page of older runs from the API
+        async function loadMoreRuns() {
+            const button = document.getElementById('load-more-runs');
+            button.disabled = true;
+
+            try {
+                const response = await fetch(`/api/job/{{job['id']}}/runs?before_id=${button.dataset.beforeId}&limit={{page_size}}`);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Unknown error');
+                }
+
+                const tbody = document.getElementById('runs-body');
+                data.runs.forEach(function(run) {
+                    tbody.appendChild(buildRunRow(run));
+                });
+
+                if (data.has_more) {
+                    button.dataset.beforeId = data.next_before_id;
+                    button.disabled = false;
+                } else {
+                    button.parentElement.remove();
+                }
+            } catch (error) {
+                alert('Failed to load runs: ' + error.message);
+                button.disabled = false;
+            }
+        }
+
+        // Build a table row for a run returned by the API (same layout as the server-rendered rows)
+        function buildRunRow(run) {
+            const row = document.createElement('tr');
+
+            function addCell(content) {
+                const cell = document.createElement('td');
+                if (content instanceof Node) {
+                    cell.appendChild(content);
+                } else {
+                    cell.textContent = content;
+                }
+                row.appendChild(cell);
+                return cell;
+            }
+
+            addCell(run.id);
+            addCell(run.start_at ? formatLocalTime(run.start_at) : '-');
+            addCell(run.finish_at ? formatLocalTime(run.finish_at) : 'Running');
+
+            const duration = document.createElement('code');
+            duration.textContent = run.duration_formatted;
+            addCell(duration);
+
+            const result = document.createElement('span');
+            const labels = {success: ['result-success', 'Success'], fail: ['result-fail', 'Failed'], aborted: ['result-fail', 'Aborted']};
+            const [resultClass, resultText] = labels[run.result] || ['', 'Running'];
+            result.className = resultClass;
+            result.textContent = resultText;
+            addCell(result);
+
+            const actions = document.createElement('div');
+            actions.className = 'actions';
+            const logsLink = document.createElement('a');
+            logsLink.href = `/run/${run.id}/logs`;
+            logsLink.className = 'btn btn-primary btn-sm';
+            logsLink.textContent = 'View Logs';
+            actions.appendChild(logsLink);
+            if (!run.finish_at) {
+                const stopButton = document.createElement('button');
+                stopButton.className = 'btn btn-danger btn-sm';
+                stopButton.textContent = 'Stop';
+                stopButton.onclick = function() { stopRun(run.id); };
+                actions.appendChild(stopButton);
+            }
+            addCell(actions);
+
+            return row;
+        }
+
         // Stop a running job
         async function stopRun(runId) {
             if (!confirm('Are you sure you want to stop this job?')) {
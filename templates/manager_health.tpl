@@ -0,0 +1,49 @@
+<div class="health-panel" id="health-panel">
+    <h2>Instance Health</h2>
+    <table>
+        <thead>
+            <tr>
+                <th>Instance</th>
+                <th style="width: 100px;">State</th>
+                <th>Latency p50 / p95</th>
+                <th>Error Rate</th>
+                <th>Scheduler</th>
+                <th>Last Check</th>
+            </tr>
+        </thead>
+        <tbody>
+            % for instance in instances:
+            <tr>
+                <td><strong>{{instance['name']}}</strong> <span class="instance-url">{{instance['url']}}</span></td>
+                <td><span class="health-state health-{{instance['state']}}">{{instance['state'].capitalize()}}</span></td>
+                <td>
+                    % if instance['latency_p50_ms'] is not None:
+                        {{instance['latency_p50_ms']}} / {{instance['latency_p95_ms']}} ms
+                    % else:
+                        -
+                    % end
+                </td>
+                <td>{{'-' if instance['error_rate'] is None else f"{instance['error_rate'] * 100:.0f}%"}}</td>
+                <td>
+                    % scheduler = instance['scheduler']
+                    % if instance['state'] == 'down' or scheduler is None:
+                        -
+                    % elif not scheduler.get('alive'):
+                        <span class="result-fail">Not running</span>
+                    % elif not scheduler.get('ticking'):
+                        <span class="result-fail">Stuck</span>
+                    % else:
+                        <span class="result-success">Alive</span> ({{scheduler.get('heartbeat_age')}}s ago)
+                    % end
+                </td>
+                <td>
+                    {{instance['checked_ago'] + ' ago' if instance['checked_ago'] else 'Pending'}}
+                    % if instance['state'] == 'down':
+                        <div class="health-error">Down for {{instance['down_for']}}: {{instance['last_error'] or ''}}</div>
+                    % end
+                </td>
+            </tr>
+            % end
+        </tbody>
+    </table>
+</div>
@@ -4,10 +4,10 @@
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Cronishe - Multi-Instance Manager</title>
-    <link rel="apple-touch-icon" sizes="180x180" href="/static/apple-touch-icon.png">
-    <link rel="icon" type="image/png" sizes="32x32" href="/static/favicon-32x32.png">
-    <link rel="icon" type="image/png" sizes="16x16" href="/static/favicon-16x16.png">
-    <link rel="manifest" href="/static/site.webmanifest">
+    <link rel="apple-touch-icon" sizes="180x180" href="{{static_url('apple-touch-icon.png')}}">
+    <link rel="icon" type="image/png" sizes="32x32" href="{{static_url('favicon-32x32.png')}}">
+    <link rel="icon" type="image/png" sizes="16x16" href="{{static_url('favicon-16x16.png')}}">
+    <link rel="manifest" href="{{static_url('site.webmanifest')}}">
     <style>
         * {
             margin: 0;
@@ -51,6 +51,88 @@
             margin-top: 8px;
         }
 
+        .health-panel {
+            max-width: 1400px;
+            margin: 0 auto 30px;
+            background: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            padding: 20px 30px;
+        }
+
+        .health-panel h2 {
+            font-size: 18px;
+            margin-bottom: 12px;
+            color: #2c3e50;
+        }
+
+        .health-state {
+            display: inline-block;
+            padding: 4px 10px;
+            border-radius: 12px;
+            font-size: 12px;
+            font-weight: 600;
+        }
+
+        .health-up {
+            background: #d4edda;
+            color: #155724;
+        }
+
+        .health-degraded, .health-unknown {
+            background: #fef5e7;
+            color: #9a6b00;
+        }
+
+        .health-down {
+            background: #f8d7da;
+            color: #721c24;
+        }
+
+        .health-error {
+            font-size: 12px;
+            color: #7f8c8d;
+            margin-top: 4px;
+            word-break: break-all;
+        }
+
+        .bulk-panel {
+            max-width: 1400px;
+            margin: 0 auto 30px;
+            background: white;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+            padding: 20px 30px;
+        }
+
+        .bulk-panel h2 {
+            font-size: 18px;
+            margin-bottom: 12px;
+            color: #2c3e50;
+        }
+
+        .bulk-form {
+            display: flex;
+            gap: 10px;
+            flex-wrap: wrap;
+        }
+
+        .bulk-form input, .bulk-form select {
+            padding: 8px 10px;
+            border: 1px solid #ddd;
+            border-radius: 4px;
+            font-size: 14px;
+        }
+
+        .bulk-summary {
+            margin-top: 15px;
+            font-size: 14px;
+        }
+
+        #bulkResults table {
+            margin-top: 10px;
+        }
+
         .instance-container {
             max-width: 1400px;
             margin: 0 auto 30px;
@@ -108,6 +190,16 @@
             background: #f8f9fa;
         }
 
+        .job-tag {
+            display: inline-block;
+            margin: 4px 4px 0 0;
+            padding: 1px 7px;
+            border-radius: 10px;
+            background: #ecf0f1;
+            color: #555;
+            font-size: 11px;
+        }
+
         .status-badge {
             display: inline-block;
             padding: 4px 10px;
@@ -409,112 +501,49 @@
             padding: 40px 20px;
             color: #7f8c8d;
         }
+
+        .stale-notice {
+            background: #fef5e7;
+            color: #9a6b00;
+            padding: 10px 15px;
+            border-radius: 4px;
+            margin-bottom: 15px;
+            font-size: 13px;
+        }
     </style>
 </head>
 <body>
     <div class="main-header">
         <div>
             <h1>
-                <img src="/static/logo.png" alt="Cronishe" class="logo">
+                <img src="{{static_url('logo.png')}}" alt="Cronishe" class="logo">
                 Cronishe - Multi-Instance Manager
             </h1>
             <div class="timezone-info">Showing times in: <span id="browser-timezone">Loading...</span></div>
         </div>
     </div>
 
-    % for instance in instances:
-    <div class="instance-container">
-        <div class="instance-header">
-            <div>
-                <h2>{{instance['name']}}</h2>
-                <div class="instance-url">{{instance['url']}}</div>
-            </div>
-            <div style="display: flex; gap: 10px;">
-                % if not instance['error']:
-                <button class="btn btn-success" onclick="showAddJobModal('{{instance['url']}}', '{{instance['name']}}')">Add Job</button>
-                % end
-                <a href="{{instance['url']}}" target="_blank" class="btn btn-primary">Open Instance</a>
-            </div>
-        </div>
-
-        <div class="content">
-            % if instance['error']:
-                <div class="error-state">
-                    <h3>⚠ Unable to connect to instance</h3>
-                    <p>Failed to fetch jobs from <code>{{instance['url']}}</code></p>
-                    <p style="margin-top: 10px; font-size: 13px;">Check that the instance is running and accessible.</p>
-                </div>
-            % elif len(instance['jobs']) == 0:
-                <div class="empty-state">
-                    <h3>No jobs scheduled</h3>
-                    <p>This instance has no jobs configured</p>
-                </div>
-            % else:
-                <table>
-                    <thead>
-                        <tr>
-                            <th style="width: 200px;">Name</th>
-                            <th>Path</th>
-                            <th>Schedule</th>
-                            <th>Timezone</th>
-                            <th style="width: 100px;">Status</th>
-                            <th>Last Run</th>
-                            <th style="width: 80px;">Result</th>
-                            <th style="width: 300px;">Actions</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        % for job in instance['jobs']:
-                        <tr id="job-{{instance['url']}}-{{job['id']}}">
-                            <td style="word-wrap: break-word; white-space: normal;"><strong>{{job['name']}}</strong></td>
-                            <td><code style="background: #ecf0f1; color: #2c3e50;">{{job['path']}}</code></td>
-                            <td>{{job['schedule_text']}}</td>
-                            <td>{{job.get('timezone') or 'UTC'}}</td>
-                            <td>
-                                % if job['active']:
-                                    <span class="status-badge status-active">Active</span>
-                                % else:
-                                    <span class="status-badge status-inactive">Inactive</span>
-                                % end
-                            </td>
-                            <td>
-                                % if job.get('last_run'):
-                                    <span class="utc-time" data-utc="{{job['last_run']}}">{{job['last_run']}}</span>
-                                % else:
-                                    Never
-                                % end
-                            </td>
-                            <td>
-                                % if job['last_run_result'] == 'success':
-                                    <span class="result-success">Success</span>
-                                % elif job['last_run_result'] == 'fail':
-                                    <span class="result-fail">Failed</span>
-                                % else:
-                                    <span>-</span>
-                                % end
-                            </td>
-                            <td>
-                                <div class="actions">
-                                    <button class="btn btn-success" onclick="runJobNow('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Run Now</button>
-                                    <button class="btn btn-primary" onclick="viewRuns('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Runs</button>
-                                    <button class="btn btn-edit" onclick='showEditJobModal({{!repr(job)}}, "{{instance['url']}}")'>Edit</button>
-                                    <button class="btn btn-toggle" onclick="toggleJob('{{instance['url']}}', {{job['id']}})">
-                                        % if job['active']:
-                                            Disable
-                                        % else:
-                                            Enable
-                                        % end
-                                    </button>
-                                    <button class="btn btn-delete" onclick="deleteJob('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Delete</button>
-                                </div>
-                            </td>
-                        </tr>
-                        % end
-                    </tbody>
-                </table>
-            % end
+    {{!health}}
+
+    <div class="bulk-panel">
+        <h2>Bulk Actions</h2>
+        <div class="bulk-form">
+            <input type="text" id="bulkName" placeholder="Name pattern, e.g. billing-*">
+            <input type="text" id="bulkTag" placeholder="Tag">
+            <select id="bulkAction">
+                <option value="disable">Disable</option>
+                <option value="enable">Enable</option>
+                <option value="run">Run now</option>
+                <option value="stop">Stop running</option>
+            </select>
+            <button class="btn btn-primary" onclick="bulkAction(true)">Preview</button>
+            <button class="btn btn-delete" onclick="bulkAction(false)">Apply to all instances</button>
         </div>
+        <div id="bulkResults"></div>
     </div>
+
+    % for section in sections:
+    {{!section}}
     % end
 
     <!-- Job Modal -->
@@ -536,6 +565,11 @@
                         <input type="text" id="jobPath" required placeholder="e.g., python /path/to/script.py">
                     </div>
 
+                    <div class="form-group">
+                        <label for="jobTags">Tags</label>
+                        <input type="text" id="jobTags" placeholder="e.g., billing, nightly">
+                    </div>
+
                     <div class="schedule-section">
                         <div class="form-group">
                             <label for="frequencyType">Schedule Type *</label>
@@ -676,17 +710,114 @@
             return `${year}-${month}-${day} ${hours}:${minutes}:${seconds}`;
         }
 
-        // Convert all elements with class 'utc-time'
-        document.addEventListener('DOMContentLoaded', function() {
-            const timeElements = document.querySelectorAll('.utc-time');
+        // Convert all elements with class 'utc-time' below root
+        function convertUtcTimes(root) {
+            const timeElements = root.querySelectorAll('.utc-time');
             timeElements.forEach(function(el) {
                 const utcTime = el.getAttribute('data-utc');
                 if (utcTime) {
                     el.textContent = formatLocalTime(utcTime);
                 }
             });
+        }
+
+        // Replace an instance that hadn't responded when the page was rendered once it has
+        async function loadPendingInstance(section) {
+            const index = section.id.replace('instance-', '');
+            try {
+                const response = await fetch(`/instance/${index}`);
+                if (!response.ok) return;
+                const container = document.createElement('div');
+                container.innerHTML = await response.text();
+                const fresh = container.firstElementChild;
+                convertUtcTimes(fresh);
+                section.replaceWith(fresh);
+            } catch (error) {
+                // Leave the stale or loading section in place
+            }
+        }
+
+        // Keep the health panel current (the manager checks instances in the background)
+        async function refreshHealth() {
+            try {
+                const response = await fetch('/health');
+                if (!response.ok) return;
+                const container = document.createElement('div');
+                container.innerHTML = await response.text();
+                document.getElementById('health-panel').replaceWith(container.firstElementChild);
+            } catch (error) {
+                // Try again next time
+            }
+        }
+
+        document.addEventListener('DOMContentLoaded', function() {
+            convertUtcTimes(document);
+            document.querySelectorAll('.instance-container[data-pending]').forEach(loadPendingInstance);
+            setInterval(refreshHealth, {{int(health_interval * 1000)}});
         });
 
+        // Preview or apply a bulk action to the jobs matching a name pattern and/or tag on every instance
+        async function bulkAction(preview) {
+            const name = document.getElementById('bulkName').value.trim();
+            const tag = document.getElementById('bulkTag').value.trim();
+            const action = document.getElementById('bulkAction').value;
+            const resultsDiv = document.getElementById('bulkResults');
+
+            if (!name && !tag) {
+                alert('Enter a name pattern or a tag');
+                return;
+            }
+            const selection = [name && `name "${name}"`, tag && `tag "${tag}"`].filter(Boolean).join(' and ');
+            if (!preview && !confirm(`${action} all jobs matching ${selection} on all instances?`)) {
+                return;
+            }
+
+            resultsDiv.innerHTML = '<div class="loading-state">Working...</div>';
+            try {
+                const response = await fetch('/bulk', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json'
+                    },
+                    body: JSON.stringify({action: action, name: name, tag: tag, preview: preview})
+                });
+                const data = await response.json();
+                if (!response.ok) {
+                    resultsDiv.innerHTML = '';
+                    alert('Bulk action failed: ' + (data.error || 'Unknown error'));
+                    return;
+                }
+
+                const failed = data.results.filter(r => !r.success).length;
+                let html = `<div class="bulk-summary">${preview ? 'Matching' : 'Applied to'} ${data.results.length - failed} job(s)` +
+                    (failed ? `, <span class="result-fail">${failed} failed</span>` : '') + '</div>';
+                if (data.results.length) {
+                    html += '<table><thead><tr><th>Instance</th><th>Job</th><th>Result</th></tr></thead><tbody>';
+                    data.results.forEach(function(r) {
+                        const result = r.success
+                            ? `<span class="result-success">${preview ? 'Matches' : escapeHtml(r.message || 'OK')}</span>`
+                            : `<span class="result-fail">${escapeHtml(r.error || 'Failed')}</span>`;
+                        html += `<tr><td>${escapeHtml(r.instance)}</td><td>${escapeHtml(r.name || (r.job_id != null ? '#' + r.job_id : '-'))}</td><td>${result}</td></tr>`;
+                    });
+                    html += '</tbody></table>';
+                }
+                resultsDiv.innerHTML = html;
+
+                if (!preview) {
+                    // Refresh just the sections of the instances that were changed
+                    const touched = new Set(data.results.map(r => r.instance_index));
+                    document.querySelectorAll('.instance-container').forEach(function(section) {
+                        if (touched.has(parseInt(section.id.replace('instance-', '')))) {
+                            loadPendingInstance(section);
+                        }
+                    });
+                }
+            } catch (error) {
+                resultsDiv.innerHTML = '';
+                alert('Bulk action failed: ' + error.message);
+            }
+        }
+
         // Toggle job active/inactive
         async function toggleJob(instanceUrl, jobId) {
             try {
@@ -770,7 +901,7 @@
                     return;
                 }
 
-                alert('Job started successfully!');
+                alert(data.message || 'Job started successfully!');
                 // Reload page to show updated state
                 setTimeout(() => location.reload(), 1000);
             } catch (error) {
@@ -823,6 +954,7 @@
             // Fill form
             document.getElementById('jobName').value = job.name;
             document.getElementById('jobPath').value = job.path;
+            document.getElementById('jobTags').value = (job.tags || []).join(', ');
             document.getElementById('frequencyType').value = job.frequency_type;
 
             if (job.frequency_type === 'every') {
@@ -866,6 +998,7 @@
             const jobData = {
                 name: document.getElementById('jobName').value,
                 path: document.getElementById('jobPath').value,
+                tags: document.getElementById('jobTags').value,
                 frequency_type: document.getElementById('frequencyType').value,
                 timezone: document.getElementById('jobTimezone').value,
                 on_start: document.getElementById('onStart').value || null,
@@ -0,0 +1,112 @@
+<div class="instance-container" id="instance-{{instance['index']}}"{{!' data-pending="true"' if instance['pending'] else ''}}>
+    <div class="instance-header">
+        <div>
+            <h2>{{instance['name']}}</h2>
+            <div class="instance-url">{{instance['url']}}</div>
+        </div>
+        <div style="display: flex; gap: 10px;">
+            % if instance['jobs'] is not None:
+            <button class="btn btn-success" onclick="showAddJobModal('{{instance['url']}}', '{{instance['name']}}')">Add Job</button>
+            % end
+            <a href="{{instance['url']}}" target="_blank" class="btn btn-primary">Open Instance</a>
+        </div>
+    </div>
+
+    <div class="content">
+        % if instance['pending'] and instance['jobs'] is not None:
+            <div class="stale-notice">Showing jobs fetched {{instance['age']}} ago, still waiting for the instance to respond.</div>
+        % end
+        % if instance['error'] and instance.get('down_for'):
+            <div class="error-state">
+                <h3>⚠ Instance down</h3>
+                <p><code>{{instance['url']}}</code> was marked down {{instance['down_for']}} ago.</p>
+                <p style="margin-top: 10px; font-size: 13px;">Requests to it fail immediately until a background health check finds it back up.</p>
+            </div>
+        % elif instance['error']:
+            <div class="error-state">
+                <h3>⚠ Unable to connect to instance</h3>
+                <p>Failed to fetch jobs from <code>{{instance['url']}}</code></p>
+                <p style="margin-top: 10px; font-size: 13px;">Check that the instance is running and accessible.</p>
+            </div>
+        % elif instance['jobs'] is None:
+            <div class="loading-state">Waiting for the instance to respond...</div>
+        % elif len(instance['jobs']) == 0:
+            <div class="empty-state">
+                <h3>No jobs scheduled</h3>
+                <p>This instance has no jobs configured</p>
+            </div>
+        % else:
+            <table>
+                <thead>
+                    <tr>
+                        <th style="width: 200px;">Name</th>
+                        <th>Path</th>
+                        <th>Schedule</th>
+                        <th>Timezone</th>
+                        <th style="width: 100px;">Status</th>
+                        <th>Last Run</th>
+                        <th style="width: 80px;">Result</th>
+                        <th style="width: 300px;">Actions</th>
+                    </tr>
+                </thead>
+                <tbody>
+                    % for job in instance['jobs']:
+                    <tr id="job-{{instance['url']}}-{{job['id']}}">
+                        <td style="word-wrap: break-word; white-space: normal;">
+                            <strong>{{job['name']}}</strong>
+                            % if job.get('tags'):
+                            <div>
+                                % for tag in job['tags']:
+                                <span class="job-tag">{{tag}}</span>
+                                % end
+                            </div>
+                            % end
+                        </td>
+                        <td><code style="background: #ecf0f1; color: #2c3e50;">{{job['path']}}</code></td>
+                        <td>{{job['schedule_text']}}</td>
+                        <td>{{job.get('timezone') or 'UTC'}}</td>
+                        <td>
+                            % if job['active']:
+                                <span class="status-badge status-active">Active</span>
+                            % else:
+                                <span class="status-badge status-inactive">Inactive</span>
+                            % end
+                        </td>
+                        <td>
+                            % if job.get('last_run'):
+                                <span class="utc-time" data-utc="{{job['last_run']}}">{{job['last_run']}}</span>
+                            % else:
+                                Never
+                            % end
+                        </td>
+                        <td>
+                            % if job['last_run_result'] == 'success':
+                                <span class="result-success">Success</span>
+                            % elif job['last_run_result'] == 'fail':
+                                <span class="result-fail">Failed</span>
+                            % else:
+                                <span>-</span>
+                            % end
+                        </td>
+                        <td>
+                            <div class="actions">
+                                <button class="btn btn-success" onclick="runJobNow('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Run Now</button>
+                                <button class="btn btn-primary" onclick="viewRuns('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Runs</button>
+                                <button class="btn btn-edit" onclick='showEditJobModal({{!repr(job)}}, "{{instance['url']}}")'>Edit</button>
+                                <button class="btn btn-toggle" onclick="toggleJob('{{instance['url']}}', {{job['id']}})">
+                                    % if job['active']:
+                                        Disable
+                                    % else:
+                                        Enable
+                                    % end
+                                </button>
+                                <button class="btn btn-delete" onclick="deleteJob('{{instance['url']}}', {{job['id']}}, '{{job['name']}}')">Delete</button>
+                            </div>
+                        </td>
+                    </tr>
+                    % end
+                </tbody>
+            </table>
+        % end
+    </div>
+</div>
@@ -4,10 +4,10 @@
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Run Logs - Cronishe</title>
-    <link rel="apple-touch-icon" sizes="180x180" href="/static/apple-touch-icon.png">
-    <link rel="icon" type="image/png" sizes="32x32" href="/static/favicon-32x32.png">
-    <link rel="icon" type="image/png" sizes="16x16" href="/static/favicon-16x16.png">
-    <link rel="manifest" href="/static/site.webmanifest">
+    <link rel="apple-touch-icon" sizes="180x180" href="{{static_url('apple-touch-icon.png')}}">
+    <link rel="icon" type="image/png" sizes="32x32" href="{{static_url('favicon-32x32.png')}}">
+    <link rel="icon" type="image/png" sizes="16x16" href="{{static_url('favicon-16x16.png')}}">
+    <link rel="manifest" href="{{static_url('site.webmanifest')}}">
     <style>
         * {
             margin: 0;
@@ -154,13 +154,18 @@
             color: #ecf0f1;
             margin-top: 5px;
         }
+
+        .load-more {
+            text-align: center;
+            margin-top: 15px;
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
             <div class="header-content">
-                <img src="/static/logo.png" alt="Cronishe" class="logo">
+                <img src="{{static_url('logo.png')}}" alt="Cronishe" class="logo">
                 <div>
                     <h1>Run Logs: {{run['job_name']}} - Run #{{run['id']}}</h1>
                     <div class="timezone-info">Showing times in: <span id="browser-timezone">Loading...</span></div>
@@ -180,32 +185,38 @@
                     % end
                 </p>
                 <p><strong>Finished:</strong>
+                    <span id="run-finished">
                     % if run.get('finish_at_utc'):
                         <span class="utc-time" data-utc="{{run['finish_at_utc']}}">{{run['finish_at_utc']}}</span>
                     % else:
                         Running
                     % end
+                    </span>
                 </p>
                 <p><strong>Result:</strong>
+                    <span id="run-result">
                     % if run['result'] == 'success':
                         <span class="result-success">Success</span>
                     % elif run['result'] == 'fail':
                         <span class="result-fail">Failed</span>
+                    % elif run['result'] == 'aborted':
+                        <span class="result-fail">Aborted</span>
                     % else:
                         <span>Running</span>
                     % end
+                    </span>
                 </p>
             </div>
 
             <h3 style="margin-bottom: 10px;">Output</h3>
 
-            % if len(logs) == 0:
+            % if len(logs) == 0 and run.get('finish_at'):
                 <div class="empty-state">
                     <h2>No output</h2>
                     <p>This job run didn't produce any output</p>
                 </div>
             % else:
-                <div class="log-container">
+                <div class="log-container" id="log-container">
                     % for log in logs:
                     <div class="log-line">
                         % if log.get('timestamp_utc'):
@@ -215,6 +226,11 @@
                     </div>
                     % end
                 </div>
+                % if has_more:
+                <div class="load-more">
+                    <button id="load-more-logs" class="btn btn-secondary" data-after-id="{{logs[-1]['id']}}" onclick="loadMoreLogs()">Load more</button>
+                </div>
+                % end
             % end
         </div>
     </div>
@@ -260,6 +276,84 @@
             return `${hours}:${minutes}:${seconds}.${ms}`;
         }
 
+        // Append a log line returned by the API or the live stream
+        function appendLogLine(log) {
+            const line = document.createElement('div');
+            line.className = 'log-line';
+            if (log.timestamp) {
+                const timestamp = document.createElement('span');
+                timestamp.className = 'log-timestamp';
+                timestamp.textContent = formatLocalTimeShort(log.timestamp);
+                line.appendChild(timestamp);
+                line.appendChild(document.createTextNode(' '));
+            }
+            line.appendChild(document.createTextNode(log.log_line));
+            document.getElementById('log-container').appendChild(line);
+        }
+
+        // Follow a running job's output via Server-Sent Events, starting after the last rendered line
+        function startLiveTail(afterId) {
+            // The stream delivers any remaining lines itself
+            const loadMore = document.getElementById('load-more-logs');
+            if (loadMore) {
+                loadMore.parentElement.remove();
+            }
+
+            const container = document.getElementById('log-container');
+            const source = new EventSource(`/api/run/{{run['id']}}/logs/stream?after_id=${afterId}`);
+
+            source.onmessage = function(event) {
+                // Keep following the bottom unless the user scrolled up
+                const atBottom = container.scrollHeight - container.scrollTop - container.clientHeight < 30;
+                appendLogLine(JSON.parse(event.data));
+                if (atBottom) {
+                    container.scrollTop = container.scrollHeight;
+                }
+            };
+
+            source.addEventListener('end', function(event) {
+                source.close();
+                const run = JSON.parse(event.data);
+                document.getElementById('run-finished').textContent = run.finish_at ? formatLocalTime(run.finish_at) : '-';
+                const labels = {success: ['result-success', 'Success'], fail: ['result-fail', 'Failed'], aborted: ['result-fail', 'Aborted']};
+                const [resultClass, resultText] = labels[run.result] || ['', '-'];
+                const result = document.createElement('span');
+                result.className = resultClass;
+                result.textContent = resultText;
+                document.getElementById('run-result').replaceChildren(result);
+            });
+        }
+
+        // Append the next page of log lines from the API
+        async function loadMoreLogs() {
+            const button = document.getElementById('load-more-logs');
+            button.disabled = true;
+
+            try {
+                const response = await fetch(`/api/run/{{run['id']}}/logs?after_id=${button.dataset.afterId}&limit={{page_size}}`);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Unknown error');
+                }
+
+                data.logs.forEach(appendLogLine);
+
+                if (data.has_more) {
+                    button.dataset.afterId = data.next_after_id;
+                    button.disabled = false;
+                } else {
+                    button.parentElement.remove();
+                }
+            } catch (error) {
+                alert('Failed to load logs: ' + error.message);
+                button.disabled = false;
+            }
+        }
+
+        % if not run.get('finish_at'):
+        startLiveTail({{logs[-1]['id'] if logs else 0}});
+        % end
+
         // Convert all elements with class 'utc-time'
         document.addEventListener('DOMContentLoaded', function() {
             // Full timestamps
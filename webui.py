@@ -1,20 +1,108 @@
 import os
 import json
-import signal
-from bottle import Bottle, request, response, template, static_file, redirect, TEMPLATE_PATH
-from datetime import datetime, timezone
-from database import init_database, get_db, get_running_run, abort_run, add_log_line
+import time
+import queue
+import itertools
+from functools import lru_cache
+from bottle import Bottle, BaseTemplate, request, response, template, redirect, abort, TEMPLATE_PATH
+from datetime import datetime, timedelta, timezone
+from database import (
+    init_database,
+    get_db,
+    get_running_run,
+    get_dependency_graph,
+    get_state_version,
+    get_job_list,
+    iter_job_list,
+    get_deleted_jobs,
+    split_tags,
+    set_jobs_active,
+    get_running_runs,
+    get_scheduler_nodes,
+    get_live_scheduler_nodes,
+    create_commands,
+    get_commands,
+    expire_commands,
+    wake_schedulers,
+    RUN_SIGNALS,
+    SCHEDULER_LEASE_SECONDS,
+    get_job_stats,
+    get_daily_stats,
+    get_runs_page,
+    get_logs_page,
+    iter_logs_page,
+    has_more_logs,
+    validate_dependencies,
+    set_job_dependencies,
+    EXEC_MODES,
+    OVERLAP_POLICIES,
+    DURATION_HISTOGRAM_BOUNDS,
+    STATS_PERIODS,
+    STATS_HOURLY_RETENTION_DAYS
+)
 from zoneinfo import available_timezones
 
+import log_tail
+import serving
+import static_assets
+from compression import GzipMiddleware
+
 app = Bottle()
 
 # Template directory
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
 TEMPLATE_PATH.insert(0, TEMPLATE_DIR)
+BaseTemplate.defaults['static_url'] = static_assets.static_url
+
+# Page sizes (default, maximum) for run history and log lines
+RUNS_PAGE_SIZE = (50, 500)
+LOGS_PAGE_SIZE = (1000, 10000)
+
+# Run statistics windows: period -> (length of one bucket, (default, maximum) buckets)
+STATS_WINDOWS = {
+    'day': (timedelta(days=1), (30, 366)),
+    'hour': (timedelta(hours=1), (48, 24 * STATS_HOURLY_RETENTION_DAYS)),
+}
+
+# Days covered by the dashboard sparklines
+SPARKLINE_DAYS = 14
+
+# A scheduler whose minute loop hasn't completed a tick for this long is reported as stuck
+SCHEDULER_TICK_STALE_SECONDS = 180
+
+# Most jobs one /api/jobs/bulk-* request may name
+BULK_MAX_JOBS = 500
+
+# Seconds to wait for the scheduler to acknowledge a run/stop/signal command
+COMMAND_TIMEOUT = float(os.environ.get('COMMAND_TIMEOUT', '5'))
+
+# HTTP status for each kind of command error reported by the scheduler
+COMMAND_ERROR_STATUS = {'not_found': 404, 'conflict': 409, 'unsupported': 400}
+
+# Approximate size of the chunks streamed JSON responses are written in
+JSON_CHUNK_SIZE = 64 * 1024
+
+# Part of every ETag, so responses cached before a restart (possibly rendered by older code) are not reused
+ETAG_SALT = format(int(time.time()), 'x')
+
+
+# Job columns that determine its schedule text
+SCHEDULE_FIELDS = (
+    'frequency_type', 'frequency_every_min', 'frequency_at_hr', 'frequency_at_min',
+    'frequency_at_mon', 'frequency_at_tue', 'frequency_at_wed', 'frequency_at_thu',
+    'frequency_at_fri', 'frequency_at_sat', 'frequency_at_sun',
+)
 
 
 def get_schedule_text(job):
     """Convert job schedule to human-readable text"""
+    return _schedule_text(tuple(job[field] for field in SCHEDULE_FIELDS))
+
+
+@lru_cache(maxsize=4096)
+def _schedule_text(schedule):
+    """Schedule text for a tuple of SCHEDULE_FIELDS values (memoized - most jobs share a few schedules)"""
+    job = dict(zip(SCHEDULE_FIELDS, schedule))
     if job['frequency_type'] == 'every':
         minutes = job['frequency_every_min']
         if minutes == 1:
@@ -51,6 +139,118 @@ def get_schedule_text(job):
             return f"At {time_str}"
 
 
+def not_modified(name):
+    """
+    Attach an ETag for the current data version and check it against If-None-Match.
+
+    Returns True (with the status set to 304) if the client's copy is still
+    current, in which case the handler should return an empty body.
+    """
+    etag = f'"{name}-{ETAG_SALT}-{get_state_version()}"'
+    response.set_header('ETag', etag)
+    response.set_header('Cache-Control', 'no-cache')
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        if '*' in tags or etag in tags or f'W/{etag}' in tags:
+            response.status = 304
+            return True
+    return False
+
+
+def get_page_args(page_size):
+    """Read after_id, before_id and limit query parameters
+
+    page_size is a (default, maximum) tuple. Returns (after_id, before_id, limit).
+    Raises ValueError on invalid input.
+    """
+    default_limit, max_limit = page_size
+    args = {}
+    for name in ('after_id', 'before_id', 'limit'):
+        value = request.query.get(name)
+        if value in (None, ''):
+            args[name] = None
+            continue
+        try:
+            args[name] = int(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+
+    if args['after_id'] is not None and args['before_id'] is not None:
+        raise ValueError("Use either after_id or before_id, not both")
+
+    limit = args['limit'] if args['limit'] is not None else default_limit
+    limit = max(1, min(limit, max_limit))
+    return args['after_id'], args['before_id'], limit
+
+
+def stream_json(items, key=None, head=None, tail=None):
+    """Encode a JSON response incrementally, to be returned from a handler as a generator
+
+    Without key the body is a JSON array of items. With key it is an object
+    holding the fields of head, the array of items under key, then the fields
+    returned by tail() - called after the last item, so it can describe what
+    was sent (e.g. paging cursors). Items are encoded one at a time and written
+    in chunks of about JSON_CHUNK_SIZE bytes, so memory use doesn't grow with
+    the number of items.
+
+    The first item is fetched before anything is sent, so an error running
+    the query still raises in the handler and gets a proper error status
+    instead of a truncated 200 response.
+    """
+    items = iter(items)
+    try:
+        first = [next(items)]
+    except StopIteration:
+        first = []
+
+    def fields(values):
+        return [f'{json.dumps(name)}: {json.dumps(value)}' for name, value in values.items()]
+
+    def chunks():
+        opening = '['
+        if key is not None:
+            opening = '{' + ''.join(field + ', ' for field in fields(head or {})) + json.dumps(key) + ': ['
+        buffer = [opening]
+        size = len(opening)
+        separator = ''
+        for item in itertools.chain(first, items):
+            encoded = separator + json.dumps(item)
+            separator = ', '
+            buffer.append(encoded)
+            size += len(encoded)
+            if size >= JSON_CHUNK_SIZE:
+                yield ''.join(buffer).encode()
+                buffer = []
+                size = 0
+
+        if key is None:
+            buffer.append(']')
+        else:
+            buffer.append(']' + ''.join(', ' + field for field in fields(tail() if tail else {})) + '}')
+        yield ''.join(buffer).encode()
+
+    return chunks()
+
+
+def format_run(run):
+    """Add formatted duration to a run (runs without a finish time are still running)
+
+    Running runs also get heartbeat_age: seconds since their scheduler last
+    reported them alive (None for finished runs).
+    """
+    run['heartbeat_age'] = None
+    if run['start_at'] and not run['finish_at']:
+        run['duration_formatted'] = 'Running'
+        if run.get('heartbeat_at'):
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            run['heartbeat_age'] = round((now - datetime.fromisoformat(run['heartbeat_at'])).total_seconds(), 1)
+    else:
+        run['duration_formatted'] = format_duration(run['duration'])
+    return run
+
+
 def format_duration(seconds):
     """Format duration in seconds to HH:MM:SS"""
     if seconds is None:
@@ -63,8 +263,189 @@ def format_duration(seconds):
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
-def get_timezone_list():
-    """Get list of timezones with priority zones first (UTC, NZ, AU, US)"""
+def histogram_percentile(histogram, pct, duration_min, duration_max):
+    """Estimate a duration percentile from a rollup histogram
+
+    Interpolates within the bucket the percentile falls into, clamped to the
+    observed min and max. Returns None for an empty histogram.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    target = total * pct / 100
+    seen = 0
+    for i, count in enumerate(histogram):
+        if count and seen + count >= target:
+            lower = DURATION_HISTOGRAM_BOUNDS[i - 1] if i else 0
+            upper = DURATION_HISTOGRAM_BOUNDS[i] if i < len(DURATION_HISTOGRAM_BOUNDS) else duration_max
+            value = lower + (upper - lower) * (target - seen) / count
+            return round(min(max(value, duration_min), duration_max), 1)
+        seen += count
+    return duration_max
+
+
+def summarize_stats(rows):
+    """Merge rollup rows into totals, success rate and duration percentiles"""
+    histogram = [0] * (len(DURATION_HISTOGRAM_BOUNDS) + 1)
+    runs = failures = aborted = duration_count = duration_sum = 0
+    duration_min = duration_max = None
+    for row in rows:
+        runs += row['runs']
+        failures += row['failures']
+        aborted += row['aborted']
+        duration_count += row['duration_count']
+        duration_sum += row['duration_sum']
+        if row['duration_count']:
+            duration_min = row['duration_min'] if duration_min is None else min(duration_min, row['duration_min'])
+            duration_max = row['duration_max'] if duration_max is None else max(duration_max, row['duration_max'])
+        histogram = [a + b for a, b in zip(histogram, row['histogram'])]
+
+    completed = runs - aborted
+    return {
+        'runs': runs,
+        'failures': failures,
+        'aborted': aborted,
+        'success_rate': round((completed - failures) / completed, 4) if completed else None,
+        'duration': {
+            'count': duration_count,
+            'min': duration_min,
+            'max': duration_max,
+            'mean': round(duration_sum / duration_count, 1) if duration_count else None,
+            'p50': histogram_percentile(histogram, 50, duration_min, duration_max),
+            'p95': histogram_percentile(histogram, 95, duration_min, duration_max),
+            'p99': histogram_percentile(histogram, 99, duration_min, duration_max),
+        },
+        'histogram': histogram,
+    }
+
+
+def parse_env(value):
+    """Normalize a job environment to a JSON string
+
+    Accepts a dict (JSON API) or KEY=VALUE lines (HTML forms).
+    Returns None when no variables are set.
+    """
+    if not value:
+        return None
+
+    if isinstance(value, dict):
+        env = {str(k): str(v) for k, v in value.items()}
+    else:
+        env = {}
+        for line in str(value).splitlines():
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '=' not in line:
+                raise ValueError(f"Invalid environment line (expected KEY=VALUE): {line}")
+            key, val = line.split('=', 1)
+            env[key.strip()] = val
+
+    return json.dumps(env) if env else None
+
+
+def format_env(env_json):
+    """Format a stored job environment as KEY=VALUE lines for the edit form"""
+    if not env_json:
+        return ''
+    return '\n'.join(f"{k}={v}" for k, v in json.loads(env_json).items())
+
+
+def get_exec_fields(source):
+    """Read exec_mode, env and cwd from form or JSON data
+
+    Returns a tuple (exec_mode, env_json, cwd). Raises ValueError on invalid input.
+    """
+    exec_mode = source.get('exec_mode') or 'shell'
+    if exec_mode not in EXEC_MODES:
+        raise ValueError(f"Invalid exec_mode '{exec_mode}' (expected one of: {', '.join(EXEC_MODES)})")
+
+    env = parse_env(source.get('env'))
+    cwd = source.get('cwd') or None
+
+    return exec_mode, env, cwd
+
+
+def get_overlap_fields(source):
+    """Read overlap_policy and max_parallel from form or JSON data
+
+    Returns a tuple (overlap_policy, max_parallel). Raises ValueError on invalid input.
+    """
+    overlap_policy = source.get('overlap_policy') or 'skip'
+    if overlap_policy not in OVERLAP_POLICIES:
+        raise ValueError(f"Invalid overlap_policy '{overlap_policy}' (expected one of: {', '.join(OVERLAP_POLICIES)})")
+
+    try:
+        max_parallel = source.get('max_parallel')
+        max_parallel = 1 if max_parallel in (None, '') else int(max_parallel)
+    except (TypeError, ValueError):
+        raise ValueError("max_parallel must be an integer")
+    if max_parallel < 1:
+        raise ValueError("max_parallel must be at least 1")
+
+    return overlap_policy, max_parallel
+
+
+def get_depends_on(source):
+    """Read upstream job IDs from form (multi-select) or JSON (list) data
+
+    Raises ValueError on non-numeric IDs.
+    """
+    if hasattr(source, 'getall'):
+        values = source.getall('depends_on')
+    else:
+        values = source.get('depends_on') or []
+        if not isinstance(values, list):
+            raise ValueError("depends_on must be a list of job IDs")
+
+    try:
+        return sorted({int(value) for value in values if value not in ('', None)})
+    except (TypeError, ValueError):
+        raise ValueError("depends_on must contain job IDs")
+
+
+def get_tags(source):
+    """Read tags from form (comma-separated) or JSON (list or comma-separated) data
+
+    Returns the tags as stored (sorted, comma-separated) or None. Raises ValueError on invalid input.
+    """
+    values = source.get('tags') or []
+    if isinstance(values, str):
+        values = values.split(',')
+    elif not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("tags must be a list of strings")
+
+    tags = sorted({value.strip() for value in values if value.strip()})
+    for tag in tags:
+        if len(tag) > 50:
+            raise ValueError(f"Tag too long (at most 50 characters): {tag}")
+    return ','.join(tags) or None
+
+
+def get_node_label(source):
+    """Read the scheduler node label a job is pinned to from form or JSON data
+
+    Returns the label or None. Raises ValueError on invalid input.
+    """
+    label = source.get('node_label') or ''
+    if not isinstance(label, str):
+        raise ValueError("node_label must be a string")
+    label = label.strip()
+    if ',' in label or len(label) > 50:
+        raise ValueError("node_label must be a single label of at most 50 characters")
+    return label or None
+
+
+def get_job_choices():
+    """Get (id, name) of all jobs for the dependency picker"""
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM jobs ORDER BY name")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def build_timezone_list():
+    """Build the list of timezones with priority zones first (UTC, NZ, AU, US)"""
     all_timezones = sorted(available_timezones())
 
     # Priority timezones
@@ -89,45 +470,36 @@ def get_timezone_list():
     priority_zones = [tz for tz in priority_zones if tz not in seen and not seen.add(tz)]
 
     # Get remaining timezones
-    remaining_zones = [tz for tz in all_timezones if tz not in priority_zones]
+    remaining_zones = [tz for tz in all_timezones if tz not in seen]
+
+    return tuple(priority_zones + remaining_zones)
 
-    return priority_zones + remaining_zones
+
+# The installed zone database doesn't change while we run, so the list is built once
+TIMEZONES = build_timezone_list()
+
+
+def get_timezone_list():
+    """Get list of timezones with priority zones first (UTC, NZ, AU, US)"""
+    return TIMEZONES
 
 
 @app.route('/')
 def index():
     """Main page - list all jobs"""
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM jobs ORDER BY id")
-        jobs = [dict(row) for row in cursor.fetchall()]
+    if not_modified('dashboard'):
+        return ''
 
-        # Get last run duration for each job
-        for job in jobs:
-            # First check if there's a currently running job
-            cursor.execute("""
-                SELECT id FROM job_runs
-                WHERE job_id = ? AND start_at IS NOT NULL AND finish_at IS NULL
-                LIMIT 1
-            """, (job['id'],))
-            running_job = cursor.fetchone()
-
-            if running_job:
-                job['last_duration'] = 'Running'
-            else:
-                # Get the last completed run's duration
-                cursor.execute("""
-                    SELECT duration FROM job_runs
-                    WHERE job_id = ?
-                    ORDER BY start_at DESC
-                    LIMIT 1
-                """, (job['id'],))
-                last_run = cursor.fetchone()
-                job['last_duration'] = format_duration(last_run['duration']) if last_run and last_run['duration'] is not None else '-'
-
-    # Enhance job data with formatted schedule
+    jobs = get_job_list()
+
+    # Enhance job data with formatted duration and schedule (downstream jobs run after their upstreams)
+    job_names = {job['id']: job['name'] for job in jobs}
     for job in jobs:
-        job['schedule_text'] = get_schedule_text(job)
+        job['last_duration'] = 'Running' if job['running'] else format_duration(job['last_duration'])
+        if job['depends_on']:
+            job['schedule_text'] = "After " + ', '.join(job_names.get(i, f"#{i}") for i in job['depends_on'])
+        else:
+            job['schedule_text'] = get_schedule_text(job)
         # Pass raw timestamp for client-side conversion
         if job['last_run']:
             job['last_run_utc'] = job['last_run']
@@ -141,7 +513,7 @@ def index():
 def add_job_form():
     """Show add job form"""
     timezones = get_timezone_list()
-    return template('add_job', timezones=timezones)
+    return template('add_job', timezones=timezones, job_choices=get_job_choices())
 
 
 @app.route('/job/add', method='POST')
@@ -155,6 +527,15 @@ def add_job_submit():
     on_success = request.forms.get('on_success') or None
     on_fail = request.forms.get('on_fail') or None
     retry_count = int(request.forms.get('retry_count', 3))
+    try:
+        exec_mode, env, cwd = get_exec_fields(request.forms)
+        overlap_policy, max_parallel = get_overlap_fields(request.forms)
+        depends_on = get_depends_on(request.forms)
+        tags = get_tags(request.forms)
+        node_label = get_node_label(request.forms)
+        validate_dependencies(None, depends_on)
+    except ValueError as e:
+        abort(400, str(e))
 
     with get_db() as conn:
         cursor = conn.cursor()
@@ -162,9 +543,9 @@ def add_job_submit():
         if frequency_type == 'every':
             every_min = int(request.forms.get('frequency_every_min', 0))
             cursor.execute("""
-                INSERT INTO jobs (name, path, frequency_type, frequency_every_min, timezone, active, retry_count, on_start, on_success, on_fail)
-                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
-            """, (name, path, 'every', every_min, timezone, retry_count, on_start, on_success, on_fail))
+                INSERT INTO jobs (name, path, frequency_type, frequency_every_min, timezone, active, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (name, path, 'every', every_min, timezone, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel))
         else:  # 'at'
             mon = 1 if request.forms.get('day_mon') else 0
             tue = 1 if request.forms.get('day_tue') else 0
@@ -180,12 +561,16 @@ def add_job_submit():
                 INSERT INTO jobs (name, path, frequency_type,
                     frequency_at_mon, frequency_at_tue, frequency_at_wed, frequency_at_thu,
                     frequency_at_fri, frequency_at_sat, frequency_at_sun,
-                    frequency_at_hr, frequency_at_min, timezone, active, retry_count, on_start, on_success, on_fail)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
-            """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, retry_count, on_start, on_success, on_fail))
+                    frequency_at_hr, frequency_at_min, timezone, active, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel))
 
+        job_id = cursor.lastrowid
+        cursor.execute("UPDATE jobs SET tags = ?, node_label = ? WHERE id = ?", (tags, node_label, job_id))
         conn.commit()
 
+    set_job_dependencies(job_id, depends_on)
+
     redirect('/')
 
 
@@ -201,9 +586,13 @@ def edit_job_form(job_id):
             redirect('/')
 
         job = dict(job)
+        job['env_text'] = format_env(job.get('env'))
+        job['tags_text'] = ', '.join(split_tags(job['tags']))
+        job['depends_on'] = get_dependency_graph().get(job_id, [])
 
     timezones = get_timezone_list()
-    return template('edit_job', job=job, timezones=timezones)
+    job_choices = [choice for choice in get_job_choices() if choice['id'] != job_id]
+    return template('edit_job', job=job, timezones=timezones, job_choices=job_choices)
 
 
 @app.route('/job/<job_id:int>/edit', method='POST')
@@ -217,6 +606,15 @@ def edit_job_submit(job_id):
     on_success = request.forms.get('on_success') or None
     on_fail = request.forms.get('on_fail') or None
     retry_count = int(request.forms.get('retry_count', 3))
+    try:
+        exec_mode, env, cwd = get_exec_fields(request.forms)
+        overlap_policy, max_parallel = get_overlap_fields(request.forms)
+        depends_on = get_depends_on(request.forms)
+        tags = get_tags(request.forms)
+        node_label = get_node_label(request.forms)
+        validate_dependencies(job_id, depends_on)
+    except ValueError as e:
+        abort(400, str(e))
 
     with get_db() as conn:
         cursor = conn.cursor()
@@ -228,9 +626,10 @@ def edit_job_submit(job_id):
                     frequency_at_mon=NULL, frequency_at_tue=NULL, frequency_at_wed=NULL,
                     frequency_at_thu=NULL, frequency_at_fri=NULL, frequency_at_sat=NULL,
                     frequency_at_sun=NULL, frequency_at_hr=NULL, frequency_at_min=NULL,
-                    timezone=?, retry_count=?, on_start=?, on_success=?, on_fail=?
+                    timezone=?, retry_count=?, on_start=?, on_success=?, on_fail=?,
+                    exec_mode=?, env=?, cwd=?, overlap_policy=?, max_parallel=?
                 WHERE id=?
-            """, (name, path, 'every', every_min, timezone, retry_count, on_start, on_success, on_fail, job_id))
+            """, (name, path, 'every', every_min, timezone, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel, job_id))
         else:  # 'at'
             mon = 1 if request.forms.get('day_mon') else 0
             tue = 1 if request.forms.get('day_tue') else 0
@@ -247,12 +646,16 @@ def edit_job_submit(job_id):
                     frequency_every_min=NULL,
                     frequency_at_mon=?, frequency_at_tue=?, frequency_at_wed=?, frequency_at_thu=?,
                     frequency_at_fri=?, frequency_at_sat=?, frequency_at_sun=?,
-                    frequency_at_hr=?, frequency_at_min=?, timezone=?, retry_count=?, on_start=?, on_success=?, on_fail=?
+                    frequency_at_hr=?, frequency_at_min=?, timezone=?, retry_count=?, on_start=?, on_success=?, on_fail=?,
+                    exec_mode=?, env=?, cwd=?, overlap_policy=?, max_parallel=?
                 WHERE id=?
-            """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, retry_count, on_start, on_success, on_fail, job_id))
+            """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, retry_count, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel, job_id))
 
+        cursor.execute("UPDATE jobs SET tags = ?, node_label = ? WHERE id = ?", (tags, node_label, job_id))
         conn.commit()
 
+    set_job_dependencies(job_id, depends_on)
+
     redirect('/')
 
 
@@ -280,7 +683,7 @@ def delete_job(job_id):
 
 @app.route('/job/<job_id:int>/runs')
 def job_runs(job_id):
-    """Show job run history"""
+    """Show job run history (newest page; older runs are loaded from the API)"""
     with get_db() as conn:
         cursor = conn.cursor()
 
@@ -291,31 +694,20 @@ def job_runs(job_id):
             redirect('/')
         job = dict(job)
 
-        # Get runs
-        cursor.execute("""
-            SELECT * FROM job_runs
-            WHERE job_id = ?
-            ORDER BY start_at DESC
-            LIMIT 50
-        """, (job_id,))
-        runs = [dict(row) for row in cursor.fetchall()]
+    runs, has_more = get_runs_page(job_id, limit=RUNS_PAGE_SIZE[0])
 
-        # Pass raw timestamps and format duration
-        for run in runs:
-            run['start_at_utc'] = run['start_at']
-            run['finish_at_utc'] = run['finish_at']
-            # Check if run is still running (has start_at but no finish_at)
-            if run['start_at'] and not run['finish_at']:
-                run['duration_formatted'] = 'Running'
-            else:
-                run['duration_formatted'] = format_duration(run['duration'])
+    # Pass raw timestamps and format duration
+    for run in runs:
+        run['start_at_utc'] = run['start_at']
+        run['finish_at_utc'] = run['finish_at']
+        format_run(run)
 
-    return template('job_runs', job=job, runs=runs)
+    return template('job_runs', job=job, runs=runs, has_more=has_more, page_size=RUNS_PAGE_SIZE[0])
 
 
 @app.route('/run/<run_id:int>/logs')
 def run_logs(run_id):
-    """Show logs for a specific run"""
+    """Show logs for a specific run (first page; further lines are loaded from the API)"""
     with get_db() as conn:
         cursor = conn.cursor()
 
@@ -331,45 +723,116 @@ def run_logs(run_id):
             redirect('/')
         run = dict(run)
 
-        # Get logs
-        cursor.execute("""
-            SELECT * FROM run_logs
-            WHERE run_id = ?
-            ORDER BY timestamp
-        """, (run_id,))
-        logs = [dict(row) for row in cursor.fetchall()]
+    logs, has_more = get_logs_page(run_id, limit=LOGS_PAGE_SIZE[0])
 
-        # Pass raw timestamps for client-side conversion
-        run['start_at_utc'] = run['start_at']
-        run['finish_at_utc'] = run['finish_at']
+    # Pass raw timestamps for client-side conversion
+    run['start_at_utc'] = run['start_at']
+    run['finish_at_utc'] = run['finish_at']
 
-        for log in logs:
-            log['timestamp_utc'] = log['timestamp']
+    for log in logs:
+        log['timestamp_utc'] = log['timestamp']
 
-    return template('run_logs', run=run, logs=logs)
+    return template('run_logs', run=run, logs=logs, has_more=has_more, page_size=LOGS_PAGE_SIZE[0])
 
 
 @app.route('/static/<filename>')
 def server_static(filename):
-    """Serve static files"""
-    return static_file(filename, root=os.path.join(os.path.dirname(__file__), 'static'))
+    """Serve static files (fingerprinted URLs are cached for a year)"""
+    return static_assets.serve(filename)
 
 
 # JSON API endpoints for multi-instance manager
+@app.route('/api/health')
+def api_health():
+    """Report whether the database is reachable and the scheduler alive
+
+    status is "ok", "degraded" (no live scheduler, or its minute loop is
+    stuck) or "error" (database unreachable, with status code 503). Cheap
+    enough to be polled every few seconds.
+    """
+    response.content_type = 'application/json'
+    response.set_header('Cache-Control', 'no-store')
+    try:
+        nodes = get_scheduler_nodes()
+    except Exception as e:
+        response.status = 503
+        return json.dumps({'status': 'error', 'error': str(e)})
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def age(timestamp):
+        return round((now - datetime.fromisoformat(timestamp)).total_seconds(), 1) if timestamp else None
+
+    for node in nodes:
+        node['heartbeat_age'] = age(node['heartbeat_at'])
+        node['last_tick_age'] = age(node['last_tick_at'])
+        node['alive'] = node['heartbeat_age'] <= SCHEDULER_LEASE_SECONDS
+        node['labels'] = split_tags(node['labels'])
+    live = [node for node in nodes if node['alive']]
+    ticking = [node for node in live
+               if node['last_tick_age'] is not None and node['last_tick_age'] <= SCHEDULER_TICK_STALE_SECONDS]
+
+    return json.dumps({
+        'status': 'ok' if ticking else 'degraded',
+        'scheduler': {
+            'alive': bool(live),
+            'ticking': bool(ticking),
+            'heartbeat_age': min((node['heartbeat_age'] for node in nodes), default=None),
+            'nodes': nodes,
+        },
+    })
+
+
 @app.route('/api/jobs')
 def api_jobs():
-    """Return all jobs as JSON"""
+    """Return all jobs as JSON (with an ETag - unchanged lists return 304)
+
+    The list is streamed straight from the database cursor.
+
+    With since=<version> (0 for everything), only the changes after that
+    version are returned, as an object: {"version": current version,
+    "full": true if jobs is the complete list and should replace the
+    client's copy, "jobs": [changed jobs], "deleted": [deleted job IDs]}.
+    Pass the returned version as since on the next call.
+    """
     response.content_type = 'application/json'
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM jobs ORDER BY id")
-        jobs = [dict(row) for row in cursor.fetchall()]
+    since = request.query.get('since')
+    if since is not None:
+        return api_job_changes(since)
+
+    if not_modified('jobs'):
+        return ''
 
-    # Enhance job data with formatted schedule
+    return stream_json(with_schedule_text(iter_job_list()))
+
+
+def with_schedule_text(jobs):
     for job in jobs:
+        # Enhance job data with formatted schedule
         job['schedule_text'] = get_schedule_text(job)
+        yield job
+
+
+def api_job_changes(since):
+    """The /api/jobs?since= response"""
+    try:
+        since = int(since)
+        if since < 0:
+            raise ValueError
+    except ValueError:
+        response.status = 400
+        return json.dumps({'error': 'since must be a non-negative integer'})
+
+    # Read the version first: anything changed after this point is sent (again) next time
+    version = get_state_version()
+    # A version newer than this database's (e.g. it was replaced) means starting over
+    full = since == 0 or since > version
+    if since == version:
+        return json.dumps({'version': version, 'full': False, 'jobs': [], 'deleted': []})
 
-    return json.dumps(jobs)
+    deleted = [] if full else get_deleted_jobs(since)
+    return stream_json(with_schedule_text(iter_job_list(since=None if full else since)), key='jobs',
+                       head={'version': version, 'full': full}, tail=lambda: {'deleted': deleted})
 
 
 @app.route('/api/job/<job_id:int>')
@@ -386,14 +849,25 @@ def api_job(job_id):
 
         job = dict(job)
         job['schedule_text'] = get_schedule_text(job)
+        job['depends_on'] = get_dependency_graph().get(job_id, [])
+        job['tags'] = split_tags(job['tags'])
 
     return json.dumps(job)
 
 
 @app.route('/api/job/<job_id:int>/runs')
 def api_job_runs(job_id):
-    """Return job runs as JSON"""
+    """Return one page of job runs as JSON, newest first
+
+    Query parameters: before_id (older runs), after_id (newer runs), limit.
+    """
     response.content_type = 'application/json'
+    try:
+        after_id, before_id, limit = get_page_args(RUNS_PAGE_SIZE)
+    except ValueError as e:
+        response.status = 400
+        return json.dumps({'error': str(e)})
+
     with get_db() as conn:
         cursor = conn.cursor()
 
@@ -405,30 +879,122 @@ def api_job_runs(job_id):
             return json.dumps({'error': 'Job not found'})
         job = dict(job)
 
-        # Get runs
-        cursor.execute("""
-            SELECT * FROM job_runs
-            WHERE job_id = ?
-            ORDER BY start_at DESC
-            LIMIT 50
-        """, (job_id,))
-        runs = [dict(row) for row in cursor.fetchall()]
+    runs, has_more = get_runs_page(job_id, before_id, after_id, limit)
+    for run in runs:
+        format_run(run)
+
+    return json.dumps({
+        'job': job,
+        'runs': runs,
+        'has_more': has_more,
+        # Cursors for the next page in each direction
+        'next_before_id': runs[-1]['id'] if runs else before_id,
+        'next_after_id': runs[0]['id'] if runs else after_id,
+    })
 
-        # Format duration
-        for run in runs:
-            # Check if run is still running (has start_at but no finish_at)
-            if run['start_at'] and not run['finish_at']:
-                run['duration_formatted'] = 'Running'
-            else:
-                run['duration_formatted'] = format_duration(run['duration'])
 
-    return json.dumps({'job': job, 'runs': runs})
+@app.route('/api/job/<job_id:int>/stats')
+def api_job_stats(job_id):
+    """Return a job's run statistics from the hourly or daily rollups
+
+    Query parameters: period (day or hour, default day) and buckets (how many
+    periods to cover, including the current one).
+    """
+    response.content_type = 'application/json'
+    period = request.query.get('period', 'day')
+    if period not in STATS_WINDOWS:
+        response.status = 400
+        return json.dumps({'error': 'period must be day or hour'})
+    length, (default, maximum) = STATS_WINDOWS[period]
+    try:
+        buckets = int(request.query.get('buckets', default))
+        if buckets < 1:
+            raise ValueError
+    except ValueError:
+        response.status = 400
+        return json.dumps({'error': 'buckets must be a positive integer'})
+    buckets = min(buckets, maximum)
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM jobs WHERE id = ?", (job_id,))
+        if not cursor.fetchone():
+            response.status = 404
+            return json.dumps({'error': 'Job not found'})
+
+    since = (datetime.now(timezone.utc).replace(tzinfo=None) - length * (buckets - 1)).strftime(STATS_PERIODS[period])
+    if not_modified(f'stats-{job_id}-{period}-{since}'):
+        return ''
+
+    rows = get_job_stats(job_id, period, datetime.fromisoformat(since))
+    summary = summarize_stats(rows)
+    for row in rows:
+        del row['job_id'], row['period']
+        row['duration_mean'] = round(row['duration_sum'] / row['duration_count'], 1) if row['duration_count'] else None
+
+    return json.dumps({
+        'job_id': job_id,
+        'period': period,
+        'since': since,
+        'histogram_bounds': DURATION_HISTOGRAM_BOUNDS,
+        'summary': summary,
+        # Only periods with finished runs are listed
+        'buckets': rows,
+    })
+
+
+@app.route('/api/jobs/sparklines')
+def api_jobs_sparklines():
+    """Return every job's daily runs, failures and mean duration for the dashboard sparklines
+
+    Query parameter: days (default SPARKLINE_DAYS, at most 366). Read from the
+    daily rollups only, never from the run history.
+    """
+    response.content_type = 'application/json'
+    try:
+        days = min(int(request.query.get('days', SPARKLINE_DAYS)), 366)
+        if days < 1:
+            raise ValueError
+    except ValueError:
+        response.status = 400
+        return json.dumps({'error': 'days must be a positive integer'})
+
+    first = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days - 1)
+    dates = [(first + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+    if not_modified(f'sparklines-{dates[0]}-{days}'):
+        return ''
+
+    index = {date: i for i, date in enumerate(dates)}
+    jobs = {}
+    for job_id, rows in get_daily_stats(first).items():
+        runs, failures, mean = [0] * days, [0] * days, [None] * days
+        for row in rows:
+            i = index.get(row['bucket'][:10])
+            if i is None:
+                continue
+            runs[i] = row['runs']
+            failures[i] = row['failures']
+            if row['duration_count']:
+                mean[i] = round(row['duration_sum'] / row['duration_count'], 1)
+        jobs[job_id] = {'runs': runs, 'failures': failures, 'duration_mean': mean}
+
+    return json.dumps({'days': dates, 'jobs': jobs})
 
 
 @app.route('/api/run/<run_id:int>/logs')
 def api_run_logs(run_id):
-    """Return run logs as JSON"""
+    """Return one page of run log lines as JSON, in output order
+
+    Query parameters: after_id (following lines), before_id (preceding lines), limit.
+    The lines are streamed straight from the database cursor.
+    """
     response.content_type = 'application/json'
+    try:
+        after_id, before_id, limit = get_page_args(LOGS_PAGE_SIZE)
+    except ValueError as e:
+        response.status = 400
+        return json.dumps({'error': str(e)})
+
     with get_db() as conn:
         cursor = conn.cursor()
 
@@ -445,15 +1011,155 @@ def api_run_logs(run_id):
             return json.dumps({'error': 'Run not found'})
         run = dict(run)
 
-        # Get logs
+    first_id = last_id = None
+
+    def logs():
+        nonlocal first_id, last_id
+        for log in iter_logs_page(run_id, after_id, before_id, limit):
+            if first_id is None:
+                first_id = log['id']
+            last_id = log['id']
+            yield log
+
+    def paging():
+        if first_id is None:
+            has_more = False
+        elif before_id is not None:
+            has_more = has_more_logs(run_id, before_id=first_id)
+        else:
+            has_more = has_more_logs(run_id, after_id=last_id)
+        return {
+            'has_more': has_more,
+            # Cursors for the next page in each direction
+            'next_after_id': last_id if last_id is not None else after_id,
+            'next_before_id': first_id if first_id is not None else before_id,
+        }
+
+    return stream_json(logs(), key='logs', head={'run': run}, tail=paging)
+
+
+def sse_event(data, event=None, event_id=None):
+    """Format one Server-Sent Event"""
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+@app.route('/api/run/<run_id:int>/logs/stream')
+def api_run_logs_stream(run_id):
+    """Stream a run's log lines as Server-Sent Events
+
+    Starts after the after_id query parameter (or the Last-Event-ID header
+    sent by reconnecting EventSource clients). Each line is a message whose
+    id is its rowid; a final 'end' event carries the run's result. Viewers
+    of the same running job share one DB poll (see log_tail).
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM job_runs WHERE id = ?", (run_id,))
+        run = cursor.fetchone()
+    if not run:
+        response.status = 404
+        response.content_type = 'application/json'
+        return json.dumps({'error': 'Run not found'})
+
+    try:
+        after_id = int(request.headers.get('Last-Event-ID') or request.query.get('after_id') or 0)
+    except ValueError:
+        response.status = 400
+        response.content_type = 'application/json'
+        return json.dumps({'error': 'after_id must be an integer'})
+
+    response.content_type = 'text/event-stream'
+    response.set_header('Cache-Control', 'no-cache')
+    # Don't let reverse proxies buffer the stream
+    response.set_header('X-Accel-Buffering', 'no')
+
+    def finished_event():
+        with get_db() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT result, finish_at, duration FROM job_runs WHERE id = ?", (run_id,))
+            return sse_event(dict(cursor.fetchone()), event='end')
+
+    def stream():
+        last_id = after_id
+        finished = run['finish_at'] is not None
+        subscriber = None
+        if not finished:
+            subscriber, start_cursor = log_tail.hub.subscribe(run_id, after_id)
+
+        try:
+            yield "retry: 2000\n\n"
+
+            # Backlog: everything for a finished run, otherwise up to where the shared tail starts
+            while True:
+                logs, has_more = get_logs_page(run_id, after_id=last_id, limit=LOGS_PAGE_SIZE[0])
+                if subscriber is not None:
+                    logs = [log for log in logs if log['id'] <= start_cursor]
+                for log in logs:
+                    yield sse_event(log, event_id=log['id'])
+                    last_id = log['id']
+                if not logs or not has_more:
+                    break
+
+            if subscriber is None:
+                yield finished_event()
+                return
+
+            # Live lines from the shared tail
+            while True:
+                if subscriber.dropped:
+                    # Fell too far behind - the client reconnects right away and
+                    # resumes from its Last-Event-ID (the lines are in run_logs)
+                    return
+                try:
+                    batch = subscriber.queue.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+
+                if batch is None:
+                    yield finished_event()
+                    return
+                for log in batch:
+                    if log['id'] > last_id:
+                        yield sse_event(log, event_id=log['id'])
+                        last_id = log['id']
+        finally:
+            if subscriber is not None:
+                log_tail.hub.unsubscribe(run_id, subscriber)
+
+    return stream()
+
+
+@app.route('/api/dag-run/<dag_run_id:int>')
+def api_dag_run(dag_run_id):
+    """Return a DAG run and the job runs it started as JSON"""
+    response.content_type = 'application/json'
+    with get_db() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT * FROM dag_runs WHERE id = ?", (dag_run_id,))
+        dag_run = cursor.fetchone()
+        if not dag_run:
+            response.status = 404
+            return json.dumps({'error': 'DAG run not found'})
+        dag_run = dict(dag_run)
+
         cursor.execute("""
-            SELECT * FROM run_logs
-            WHERE run_id = ?
-            ORDER BY timestamp
-        """, (run_id,))
-        logs = [dict(row) for row in cursor.fetchall()]
+            SELECT jr.*, j.name as job_name
+            FROM job_runs jr
+            JOIN jobs j ON jr.job_id = j.id
+            WHERE jr.dag_run_id = ?
+            ORDER BY jr.id
+        """, (dag_run_id,))
+        runs = [dict(row) for row in cursor.fetchall()]
 
-    return json.dumps({'run': run, 'logs': logs})
+    return json.dumps({'dag_run': dag_run, 'runs': runs})
 
 
 @app.route('/api/job', method='POST')
@@ -479,15 +1185,26 @@ def api_create_job():
             response.status = 400
             return json.dumps({'error': 'Missing required fields: name, path, frequency_type'})
 
+        try:
+            exec_mode, env, cwd = get_exec_fields(data)
+            overlap_policy, max_parallel = get_overlap_fields(data)
+            depends_on = get_depends_on(data)
+            tags = get_tags(data)
+            node_label = get_node_label(data)
+            validate_dependencies(None, depends_on)
+        except ValueError as e:
+            response.status = 400
+            return json.dumps({'error': str(e)})
+
         with get_db() as conn:
             cursor = conn.cursor()
 
             if frequency_type == 'every':
                 every_min = int(data.get('frequency_every_min', 0))
                 cursor.execute("""
-                    INSERT INTO jobs (name, path, frequency_type, frequency_every_min, timezone, active, on_start, on_success, on_fail)
-                    VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?)
-                """, (name, path, 'every', every_min, timezone, on_start, on_success, on_fail))
+                    INSERT INTO jobs (name, path, frequency_type, frequency_every_min, timezone, active, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                    VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (name, path, 'every', every_min, timezone, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel))
             else:  # 'at'
                 mon = 1 if data.get('day_mon') else 0
                 tue = 1 if data.get('day_tue') else 0
@@ -503,12 +1220,15 @@ def api_create_job():
                     INSERT INTO jobs (name, path, frequency_type,
                         frequency_at_mon, frequency_at_tue, frequency_at_wed, frequency_at_thu,
                         frequency_at_fri, frequency_at_sat, frequency_at_sun,
-                        frequency_at_hr, frequency_at_min, timezone, active, on_start, on_success, on_fail)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
-                """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, on_start, on_success, on_fail))
+                        frequency_at_hr, frequency_at_min, timezone, active, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, on_start, on_success, on_fail, exec_mode, env, cwd, overlap_policy, max_parallel))
 
-            conn.commit()
             job_id = cursor.lastrowid
+            cursor.execute("UPDATE jobs SET tags = ?, node_label = ? WHERE id = ?", (tags, node_label, job_id))
+            conn.commit()
+
+        set_job_dependencies(job_id, depends_on)
 
         return json.dumps({'success': True, 'job_id': job_id})
 
@@ -540,6 +1260,50 @@ def api_update_job(job_id):
             response.status = 400
             return json.dumps({'error': 'Missing required fields: name, path, frequency_type'})
 
+        # Exec settings are optional in updates - only change the ones provided
+        exec_updates = {}
+        if any(key in data for key in ('exec_mode', 'env', 'cwd')):
+            try:
+                exec_mode, env, cwd = get_exec_fields(data)
+            except ValueError as e:
+                response.status = 400
+                return json.dumps({'error': str(e)})
+            exec_values = {'exec_mode': exec_mode, 'env': env, 'cwd': cwd}
+            exec_updates = {key: exec_values[key] for key in exec_values if key in data}
+
+        if any(key in data for key in ('overlap_policy', 'max_parallel')):
+            try:
+                overlap_policy, max_parallel = get_overlap_fields(data)
+            except ValueError as e:
+                response.status = 400
+                return json.dumps({'error': str(e)})
+            overlap_values = {'overlap_policy': overlap_policy, 'max_parallel': max_parallel}
+            exec_updates.update({key: overlap_values[key] for key in overlap_values if key in data})
+
+        if 'tags' in data:
+            try:
+                exec_updates['tags'] = get_tags(data)
+            except ValueError as e:
+                response.status = 400
+                return json.dumps({'error': str(e)})
+
+        if 'node_label' in data:
+            try:
+                exec_updates['node_label'] = get_node_label(data)
+            except ValueError as e:
+                response.status = 400
+                return json.dumps({'error': str(e)})
+
+        # Dependencies are also optional in updates
+        depends_on = None
+        if 'depends_on' in data:
+            try:
+                depends_on = get_depends_on(data)
+                validate_dependencies(job_id, depends_on)
+            except ValueError as e:
+                response.status = 400
+                return json.dumps({'error': str(e)})
+
         with get_db() as conn:
             cursor = conn.cursor()
 
@@ -573,8 +1337,15 @@ def api_update_job(job_id):
                     WHERE id=?
                 """, (name, path, 'at', mon, tue, wed, thu, fri, sat, sun, hour, minute, timezone, on_start, on_success, on_fail, job_id))
 
+            if exec_updates:
+                assignments = ', '.join(f"{key}=?" for key in exec_updates)
+                cursor.execute(f"UPDATE jobs SET {assignments} WHERE id=?", (*exec_updates.values(), job_id))
+
             conn.commit()
 
+        if depends_on is not None:
+            set_job_dependencies(job_id, depends_on)
+
         return json.dumps({'success': True})
 
     except Exception as e:
@@ -627,40 +1398,83 @@ def api_delete_job(job_id):
         return json.dumps({'error': str(e)})
 
 
+def send_commands(commands):
+    """
+    Queue commands for the schedulers (see database.COMMAND_ACTIONS) and wait
+    for them to be carried out.
+
+    Returns one result per command: {'success': True, 'message'} or
+    {'success': False, 'error', 'status'} with the HTTP status to answer
+    with. Commands not taken up within COMMAND_TIMEOUT are withdrawn.
+    """
+    command_ids = create_commands(commands)
+    wake_schedulers()
+    deadline = time.monotonic() + COMMAND_TIMEOUT
+    delay = 0.005
+    while True:
+        rows = get_commands(command_ids)
+        if all(row['status'] in ('done', 'error') for row in rows.values()):
+            break
+        if time.monotonic() >= deadline:
+            expire_commands(command_ids)
+            rows = get_commands(command_ids)
+            break
+        time.sleep(delay)
+        delay = min(delay * 2, 0.1)
+
+    results = []
+    for command_id in command_ids:
+        row = rows[command_id]
+        if row['status'] == 'done':
+            results.append({'success': True, 'message': row['result']['message']})
+        elif row['status'] == 'error':
+            results.append({'success': False, 'error': row['result']['error'],
+                            'status': COMMAND_ERROR_STATUS.get(row['result'].get('code'), 500)})
+        else:
+            results.append({'success': False, 'error': 'The scheduler did not respond in time', 'status': 504})
+    return results
+
+
+def command_response(result):
+    """JSON response for one send_commands result"""
+    if not result['success']:
+        response.status = result['status']
+        return json.dumps({'error': result['error']})
+    return json.dumps({'success': True, 'message': result['message']})
+
+
+def live_node_ids():
+    return {node['node_id'] for node in get_live_scheduler_nodes()}
+
+
+def run_node_error(run, live):
+    """Why a stop/signal command for run can't be delivered (None if its scheduler is alive)"""
+    if not live:
+        return 'No scheduler is running'
+    if run['node_id'] is not None and run['node_id'] not in live:
+        return f"Scheduler '{run['node_id']}' running this run is not responding"
+    return None
+
+
 @app.route('/api/job/<job_id:int>/run', method='POST')
 def api_run_job_now(job_id):
-    """Run a job immediately via API"""
+    """Run a job immediately via API (started by the scheduler the job belongs to)"""
     response.content_type = 'application/json'
 
     try:
-        # Import here to avoid circular dependency
-        from scheduler import execute_job
-        from database import is_job_running
-        import threading
-
-        # Get job from database
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
-            job = cursor.fetchone()
-
-            if not job:
+            cursor.execute("SELECT id FROM jobs WHERE id = ?", (job_id,))
+            if not cursor.fetchone():
                 response.status = 404
                 return json.dumps({'error': 'Job not found'})
 
-            job_dict = dict(job)
-
-        # Check if job is already running
-        if is_job_running(job_id):
-            response.status = 409
-            return json.dumps({'error': 'Job is already running'})
+        # The scheduler applies the job's overlap policy and reports what it did
+        if not live_node_ids():
+            response.status = 503
+            return json.dumps({'error': 'No scheduler is running'})
 
-        # Execute job in a separate thread
-        thread = threading.Thread(target=execute_job, args=(job_dict,))
-        thread.daemon = True
-        thread.start()
-
-        return json.dumps({'success': True, 'message': 'Job started'})
+        return command_response(send_commands([{'action': 'run', 'job_id': job_id}])[0])
 
     except Exception as e:
         response.status = 500
@@ -669,67 +1483,174 @@ def api_run_job_now(job_id):
 
 @app.route('/api/run/<run_id:int>/stop', method='POST')
 def api_stop_run(run_id):
-    """Stop a running job by killing the process"""
+    """Stop a running job (by the scheduler running it)"""
     response.content_type = 'application/json'
 
     try:
-        # Get the running job run
         run = get_running_run(run_id)
         if not run:
             response.status = 404
             return json.dumps({'error': 'Run not found or not running'})
 
-        pid = run.get('pid')
-        if not pid:
-            response.status = 400
-            return json.dumps({'error': 'No PID available for this run'})
+        error = run_node_error(run, live_node_ids())
+        if error:
+            response.status = 503
+            return json.dumps({'error': error})
 
-        # Calculate duration
-        start_at = datetime.fromisoformat(run['start_at'])
-        duration = int((datetime.now(timezone.utc).replace(tzinfo=None) - start_at).total_seconds())
+        return command_response(send_commands([{'action': 'stop', 'run_id': run_id, 'node_id': run['node_id']}])[0])
 
-        # Try to kill the process
-        try:
-            # On Windows, use taskkill to kill process tree
-            import platform
-            if platform.system() == 'Windows':
-                import subprocess
-                # Kill the process tree (including child processes)
-                subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
-                             capture_output=True, check=False)
-            else:
-                # On Unix, send SIGTERM to the process group
-                import os
-                try:
-                    os.killpg(os.getpgid(pid), signal.SIGTERM)
-                except ProcessLookupError:
-                    pass
-                except OSError:
-                    # Process might not have its own process group, kill just the process
-                    try:
-                        os.kill(pid, signal.SIGTERM)
-                    except ProcessLookupError:
-                        pass
-        except Exception as kill_error:
-            # Process might already be dead, continue anyway
-            pass
-
-        # Add log entry
-        add_log_line(run_id, "Job stopped by user")
-
-        # Mark run as aborted in database
-        abort_run(run_id, duration)
-
-        return json.dumps({'success': True, 'message': 'Job stopped'})
+    except Exception as e:
+        response.status = 500
+        return json.dumps({'error': str(e)})
+
+
+@app.route('/api/run/<run_id:int>/signal', method='POST')
+def api_signal_run(run_id):
+    """Send a signal to a running job's process group
+
+    Body: {"signal": one of RUN_SIGNALS}. Not available for runs on remote workers.
+    """
+    response.content_type = 'application/json'
+
+    sig = (request.json or {}).get('signal')
+    if sig not in RUN_SIGNALS:
+        response.status = 400
+        return json.dumps({'error': f"signal must be one of: {', '.join(RUN_SIGNALS)}"})
+
+    try:
+        run = get_running_run(run_id)
+        if not run:
+            response.status = 404
+            return json.dumps({'error': 'Run not found or not running'})
 
+        error = run_node_error(run, live_node_ids())
+        if error:
+            response.status = 503
+            return json.dumps({'error': error})
+
+        return command_response(send_commands(
+            [{'action': 'signal', 'run_id': run_id, 'signal': sig, 'node_id': run['node_id']}])[0])
+
+    except Exception as e:
+        response.status = 500
+        return json.dumps({'error': str(e)})
+
+
+@app.route('/api/jobs/bulk-<action:re:enable|disable|run|stop>', method='POST')
+def api_bulk(action):
+    """Enable, disable, run or stop several jobs at once
+
+    Body: {"job_ids": [...]} (at most BULK_MAX_JOBS). Enabling and disabling
+    happen in one transaction. Runs and stops are queued for the schedulers
+    in one transaction and awaited together. Returns {"results": [...]} with
+    one entry per job ID: success, and error if it failed (unknown job,
+    already running, not running, scheduler not responding). Successful
+    runs carry the scheduler's message (started, queued or replacing).
+    """
+    response.content_type = 'application/json'
+
+    data = request.json or {}
+    job_ids = data.get('job_ids')
+    if (not isinstance(job_ids, list) or not job_ids
+            or not all(isinstance(job_id, int) and not isinstance(job_id, bool) for job_id in job_ids)):
+        response.status = 400
+        return json.dumps({'error': 'job_ids must be a non-empty list of job IDs'})
+    if len(job_ids) > BULK_MAX_JOBS:
+        response.status = 400
+        return json.dumps({'error': f'At most {BULK_MAX_JOBS} jobs per request'})
+    job_ids = list(dict.fromkeys(job_ids))
+
+    try:
+        if action in ('enable', 'disable'):
+            results = bulk_set_active(job_ids, action == 'enable')
+        elif action == 'run':
+            results = bulk_run(job_ids)
+        else:
+            results = bulk_stop(job_ids)
     except Exception as e:
         response.status = 500
         return json.dumps({'error': str(e)})
 
+    return json.dumps({'results': results})
+
+
+def bulk_set_active(job_ids, active):
+    jobs = set_jobs_active(job_ids, active)
+    results = []
+    for job_id in job_ids:
+        if job_id not in jobs:
+            results.append({'job_id': job_id, 'success': False, 'error': 'Job not found'})
+        else:
+            results.append({'job_id': job_id, 'name': jobs[job_id]['name'], 'success': True,
+                            'active': int(active), 'changed': jobs[job_id]['changed']})
+    return results
+
+
+def bulk_run(job_ids):
+    placeholders = ','.join('?' * len(job_ids))
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, name FROM jobs WHERE id IN ({placeholders})", job_ids)
+        jobs = {row['id']: dict(row) for row in cursor.fetchall()}
+    # The scheduler applies each job's overlap policy and reports what it did
+    to_run = [job_id for job_id in job_ids if job_id in jobs]
+    if to_run and not live_node_ids():
+        outcome = {job_id: {'success': False, 'error': 'No scheduler is running'} for job_id in to_run}
+    elif to_run:
+        outcome = dict(zip(to_run, send_commands([{'action': 'run', 'job_id': job_id} for job_id in to_run])))
+    else:
+        outcome = {}
+
+    results = []
+    for job_id in job_ids:
+        job = jobs.get(job_id)
+        if job is None:
+            results.append({'job_id': job_id, 'success': False, 'error': 'Job not found'})
+        elif outcome[job_id]['success']:
+            results.append({'job_id': job_id, 'name': job['name'], 'success': True, 'message': outcome[job_id]['message']})
+        else:
+            results.append({'job_id': job_id, 'name': job['name'], 'success': False, 'error': outcome[job_id]['error']})
+    return results
+
+
+def bulk_stop(job_ids):
+    runs = get_running_runs(job_ids)
+    live = live_node_ids()
+    errors = {}
+    to_stop = []
+    for run in runs:
+        error = run_node_error(run, live)
+        if error:
+            errors.setdefault(run['job_id'], error)
+        else:
+            to_stop.append(run)
+    outcome = send_commands([{'action': 'stop', 'run_id': run['id'], 'node_id': run['node_id']}
+                             for run in to_stop]) if to_stop else []
+
+    stopped = {}
+    for run, result in zip(to_stop, outcome):
+        if result['success']:
+            stopped.setdefault(run['job_id'], []).append(run['id'])
+        else:
+            errors.setdefault(run['job_id'], result['error'])
+
+    results = []
+    for job_id in job_ids:
+        if job_id in stopped:
+            results.append({'job_id': job_id, 'success': True, 'stopped_runs': sorted(stopped[job_id])})
+        elif job_id in errors:
+            results.append({'job_id': job_id, 'success': False, 'error': errors[job_id]})
+        else:
+            results.append({'job_id': job_id, 'success': False, 'error': 'Not running'})
+    return results
+
 
 if __name__ == '__main__':
     # Initialize database
     init_database()
 
-    # Run web server
-    app.run(host='0.0.0.0', port=48080, debug=True)
+    static_assets.precompress()
+    serving.precompile_templates(TEMPLATE_DIR)
+
+    # Run web server (responses gzip-compressed for clients that accept it)
+    serving.serve(GzipMiddleware(app), host='0.0.0.0', port=48080)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Cronishe worker: runs jobs assigned by a scheduler on this machine.
+
+    python worker.py --scheduler http://scheduler-host:48071 --capacity 4 --labels gpu
+    python worker.py --scheduler unix:///tmp/cronishe-workers.sock
+
+The worker registers with its capacity (runs at once) and labels, then
+long-polls the scheduler for runs. Each run's output is sent back in batches
+of up to WORKER_BATCH_LINES lines, at least every WORKER_FLUSH_SECONDS, and
+its exit code and resource usage (CPU time, peak memory) when it ends. While
+the scheduler is unreachable, runs keep going and their results are sent
+once it is back.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import cluster
+from job_process import build_popen_args, stop_process
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# Output lines sent per request, and the longest a line waits before it is sent
+WORKER_BATCH_LINES = int(os.environ.get('WORKER_BATCH_LINES', '200'))
+WORKER_FLUSH_SECONDS = float(os.environ.get('WORKER_FLUSH_SECONDS', '0.5'))
+
+# Output lines kept per run while the scheduler is unreachable (older ones are dropped)
+MAX_BUFFERED_LINES = 10000
+
+# Seconds between attempts to reach an unreachable scheduler
+RECONNECT_SECONDS = 2
+
+# How long a finished run's result is retried before it is given up
+REPORT_RETRY_SECONDS = 600
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class SchedulerClient:
+    """JSON requests to the scheduler's worker API, over one keep-alive connection per thread"""
+
+    def __init__(self, url: str, token: Optional[str] = None):
+        parts = urlsplit(url)
+        if parts.scheme == 'unix':
+            self._connect = lambda timeout: UnixHTTPConnection(parts.path, timeout)
+        elif parts.scheme == 'http':
+            self._connect = lambda timeout: http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        else:
+            raise ValueError(f"Unsupported scheduler URL (use http:// or unix://): {url}")
+        self.token = token
+        self._local = threading.local()
+
+    def post(self, path: str, payload: dict, timeout: float = 10) -> Tuple[int, dict]:
+        """POST payload as JSON; returns (status, response JSON). Raises OSError if the scheduler is unreachable."""
+        body = json.dumps(payload).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+
+        conn = getattr(self._local, 'conn', None)
+        reused = conn is not None
+        if conn is None:
+            conn = self._local.conn = self._connect(timeout)
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        try:
+            conn.request('POST', path, body, headers)
+            response = conn.getresponse()
+            return response.status, json.loads(response.read() or b'{}')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            conn.close()
+            self._local.conn = None
+            if reused and isinstance(e, (ConnectionError, http.client.RemoteDisconnected)):
+                # The scheduler closed the idle keep-alive connection - retry once on a new one
+                return self.post(path, payload, timeout)
+            raise OSError(str(e)) from e
+
+
+def wait_for_exit(process: subprocess.Popen) -> Tuple[int, Optional[dict]]:
+    """Wait for a job process; returns its exit code and resource usage (None where unavailable)"""
+    if not hasattr(os, 'wait4'):
+        return process.wait(), None
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    max_rss_kb = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    return process.returncode, {'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 3), 'max_rss_kb': max_rss_kb}
+
+
+class Worker:
+    """Polls the scheduler for runs and executes them"""
+
+    def __init__(self, client: SchedulerClient, worker_id: str, capacity: int, labels: List[str]):
+        self.client = client
+        self.worker_id = worker_id
+        self.capacity = capacity
+        self.labels = labels
+        self._lock = threading.Lock()
+        self.runs: Dict[int, dict] = {}  # run ID -> {'process': Popen or None, 'stop': bool}
+
+    def register(self):
+        """Register with the scheduler, retrying until it answers"""
+        payload = {'worker_id': self.worker_id, 'hostname': socket.gethostname(),
+                   'capacity': self.capacity, 'labels': self.labels}
+        while True:
+            try:
+                status, data = self.client.post('/workers/register', payload)
+                if status == 200:
+                    logger.info(f"Registered as '{self.worker_id}' (capacity {self.capacity}"
+                                + (f", labels {', '.join(self.labels)})" if self.labels else ")"))
+                    return
+                logger.error(f"Registration rejected ({status}): {data.get('error')}")
+            except OSError as e:
+                logger.warning(f"Scheduler unreachable ({e}), retrying in {RECONNECT_SECONDS}s")
+            time.sleep(RECONNECT_SECONDS)
+
+    def run_forever(self):
+        self.register()
+        while True:
+            with self._lock:
+                running = list(self.runs)
+            try:
+                status, data = self.client.post(f'/workers/{self.worker_id}/poll',
+                                                {'running': running, 'wait': 20}, timeout=30)
+            except OSError as e:
+                logger.warning(f"Scheduler unreachable ({e}), retrying in {RECONNECT_SECONDS}s")
+                time.sleep(RECONNECT_SECONDS)
+                continue
+
+            if status == 404:
+                logger.warning("Scheduler doesn't know this worker (restarted?), registering again")
+                self.register()
+                continue
+            if status != 200:
+                logger.error(f"Poll failed ({status}): {data.get('error')}")
+                time.sleep(RECONNECT_SECONDS)
+                continue
+
+            for assignment in data.get('assignments', []):
+                self.start(assignment['run_id'], assignment['job'])
+            for run_id in data.get('stop', []):
+                self.stop(run_id)
+
+    def start(self, run_id: int, job: dict):
+        with self._lock:
+            if run_id in self.runs:
+                return
+            self.runs[run_id] = {'process': None, 'stop': False}
+        thread = threading.Thread(target=self.execute, args=(run_id, job), name=f'run-{run_id}', daemon=True)
+        thread.start()
+
+    def stop(self, run_id: int):
+        with self._lock:
+            state = self.runs.get(run_id)
+            if state is None:
+                return
+            state['stop'] = True
+            process = state['process']
+        if process is not None:
+            logger.info(f"Stopping run {run_id}")
+            stop_process(process.pid)
+
+    def execute(self, run_id: int, job: dict):
+        """Thread body: run a job, send its output and result to the scheduler"""
+        logger.info(f"Starting run {run_id} of job '{job['name']}' (ID: {job['id']})")
+        try:
+            process = subprocess.Popen(
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                **build_popen_args(job)
+            )
+        except Exception as e:
+            logger.error(f"Run {run_id} of job '{job['name']}' failed to start: {e}")
+            self.send_output(run_id, [f"ERROR: {e}"])
+            self.report(run_id, -1, None)
+            return
+
+        with self._lock:
+            state = self.runs[run_id]
+            state['process'] = process
+            stopped = state['stop']
+        if stopped:
+            stop_process(process.pid)
+
+        lines = queue.Queue()
+
+        def read():
+            for line in iter(process.stdout.readline, ''):
+                lines.put(line.rstrip())
+            lines.put(None)
+
+        threading.Thread(target=read, name=f'run-{run_id}-output', daemon=True).start()
+
+        batch = []
+        flush_at = time.monotonic() + WORKER_FLUSH_SECONDS
+        finished = False
+        while not finished:
+            try:
+                line = lines.get(timeout=max(0.0, flush_at - time.monotonic()))
+                if line is None:
+                    finished = True
+                else:
+                    batch.append(line)
+            except queue.Empty:
+                pass
+            if batch and (finished or len(batch) >= WORKER_BATCH_LINES or time.monotonic() >= flush_at):
+                batch = self.send_output(run_id, batch, process)
+            if time.monotonic() >= flush_at:
+                flush_at = time.monotonic() + WORKER_FLUSH_SECONDS
+
+        exit_code, resources = wait_for_exit(process)
+        if batch:
+            self.send_output(run_id, batch)
+        logger.info(f"Run {run_id} of job '{job['name']}' finished (exit code: {exit_code})")
+        self.report(run_id, exit_code, resources)
+
+    def send_output(self, run_id: int, batch: List[str], process: Optional[subprocess.Popen] = None) -> List[str]:
+        """Send a batch of output lines; returns the lines still to send (kept while the scheduler is unreachable)"""
+        try:
+            status, data = self.client.post(f'/runs/{run_id}/output', {'lines': batch})
+        except OSError as e:
+            if len(batch) > MAX_BUFFERED_LINES:
+                dropped = len(batch) - MAX_BUFFERED_LINES
+                batch = [f"[{dropped} line(s) dropped while the scheduler was unreachable]"] + batch[-MAX_BUFFERED_LINES:]
+            logger.warning(f"Couldn't send output of run {run_id} ({e}), keeping {len(batch)} line(s)")
+            return batch
+
+        if status == 404 or (status == 200 and data.get('stop')):
+            if status == 404:
+                logger.warning(f"Scheduler doesn't know run {run_id} anymore")
+            if process is not None and process.poll() is None:
+                self.stop(run_id)
+        return []
+
+    def report(self, run_id: int, exit_code: int, resources: Optional[dict]):
+        """Send a run's result, retrying for up to REPORT_RETRY_SECONDS"""
+        give_up_at = time.monotonic() + REPORT_RETRY_SECONDS
+        payload = {'exit_code': exit_code, 'resources': resources}
+        while True:
+            try:
+                status, _ = self.client.post(f'/runs/{run_id}/finish', payload)
+                if status == 404:
+                    logger.warning(f"Scheduler doesn't know run {run_id} anymore, result not recorded")
+                break
+            except OSError as e:
+                if time.monotonic() >= give_up_at:
+                    logger.error(f"Giving up reporting the result of run {run_id}: {e}")
+                    break
+                time.sleep(RECONNECT_SECONDS)
+        with self._lock:
+            self.runs.pop(run_id, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run jobs assigned by a Cronishe scheduler')
+    parser.add_argument('--scheduler', default=os.environ.get('WORKER_SCHEDULER_URL', 'http://localhost:48071'),
+                        help='Scheduler worker API: http://host:port or unix:///path/to/socket')
+    parser.add_argument('--id', default=os.environ.get('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}",
+                        help='Worker ID (unique per scheduler)')
+    parser.add_argument('--capacity', type=int, default=int(os.environ.get('WORKER_CAPACITY') or os.cpu_count() or 1),
+                        help='Runs executed at the same time')
+    parser.add_argument('--labels', default=os.environ.get('WORKER_LABELS', ''),
+                        help='Comma-separated labels; jobs with a scheduler label only run on workers that have it')
+    args = parser.parse_args()
+
+    client = SchedulerClient(args.scheduler, os.environ.get('WORKER_TOKEN') or None)
+    worker = Worker(client, args.id, max(1, args.capacity), cluster.parse_labels(args.labels))
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Worker stopped by user")
+
+
+if __name__ == '__main__':
+    main()
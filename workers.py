@@ -0,0 +1,417 @@
+"""
+Remote workers: run jobs on other machines than the scheduler's.
+
+Workers (worker.py) connect to the scheduler's worker API over HTTP or a
+local Unix socket and register with a capacity (runs at once) and labels.
+They then long-poll for runs. A run goes to the least loaded live worker
+that has the job's node_label (any worker for jobs without one) and waits
+up to WORKER_WAIT_SECONDS while all of those are busy. Workers send the run's output back in batches,
+then its exit code and resource usage.
+
+On the scheduler, a run on a worker is a RemoteProcess. It stands in for the
+local process in execute_job/monitor_run, so results, webhooks and retries
+are handled the same way for both. A worker that stops polling for
+WORKER_TIMEOUT seconds is dropped and its runs fail.
+"""
+import hmac
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds without a poll after which a worker is considered gone
+WORKER_TIMEOUT = float(os.environ.get('WORKER_TIMEOUT', '30'))
+
+# Shared secret workers must send as a Bearer token (none: no authentication,
+# only allowed for the Unix socket)
+WORKER_TOKEN = os.environ.get('WORKER_TOKEN') or None
+
+# Longest a run waits for a free slot on a busy worker before it fails
+WORKER_WAIT_SECONDS = float(os.environ.get('WORKER_WAIT_SECONDS', '600'))
+
+# Longest a worker's poll is held open while there is nothing to send it
+POLL_SECONDS = 20
+
+# Job fields sent to the worker with a run
+ASSIGNMENT_FIELDS = ('id', 'name', 'path', 'exec_mode', 'env', 'cwd')
+
+
+class WorkerBusyError(RuntimeError):
+    """Raised when no worker that can run a job had a free slot within WORKER_WAIT_SECONDS"""
+
+
+class RemoteProcess:
+    """A run on a remote worker, used by the scheduler in place of a local process"""
+
+    pid = None
+
+    def __init__(self, pool: 'WorkerPool', worker_id: str, run_id: int, job: Dict):
+        self.pool = pool
+        self.worker_id = worker_id
+        self.run_id = run_id
+        self.job = job
+        self.delivered = False
+        self.stop_requested = False
+        self.returncode: Optional[int] = None
+        self.resources: Optional[dict] = None
+        self._output = queue.Queue()
+        self._done = threading.Event()
+
+    def assignment(self) -> dict:
+        return {'run_id': self.run_id, 'job': {key: self.job.get(key) for key in ASSIGNMENT_FIELDS}}
+
+    def feed(self, lines: List[str]):
+        """Queue a batch of output lines received from the worker"""
+        if lines and not self._done.is_set():
+            self._output.put(list(lines))
+
+    def complete(self, exit_code: int, resources: Optional[dict] = None):
+        """Record the run's end; later calls are ignored"""
+        if self._done.is_set():
+            return
+        self.returncode = exit_code
+        self.resources = resources
+        self._done.set()
+        self._output.put(None)
+
+    def fail(self, reason: str):
+        self.feed([f"ERROR: {reason}"])
+        self.complete(-1)
+
+    def output_batches(self):
+        """Yield the output batches as they arrive, until the run has ended"""
+        while True:
+            lines = self._output.get()
+            if lines is None:
+                return
+            yield lines
+
+    def wait(self) -> int:
+        self._done.wait()
+        return self.returncode
+
+    def terminate(self):
+        """Ask the worker to stop the run"""
+        self.pool.stop(self)
+
+
+class Worker:
+    """Scheduler-side record of a registered worker"""
+
+    def __init__(self, worker_id: str, hostname: str, capacity: int, labels: List[str]):
+        self.worker_id = worker_id
+        self.hostname = hostname
+        self.capacity = capacity
+        self.labels = set(labels)
+        self.runs: Dict[int, RemoteProcess] = {}
+        self.pending: List[RemoteProcess] = []  # assigned, not yet sent in a poll response
+        self.stops: List[int] = []
+        self.polling = 0
+        self.last_seen = time.monotonic()
+        self.registered_at = time.time()
+
+    @property
+    def load(self) -> float:
+        return len(self.runs) / self.capacity
+
+    def summary(self) -> dict:
+        return {
+            'worker_id': self.worker_id,
+            'hostname': self.hostname,
+            'capacity': self.capacity,
+            'labels': sorted(self.labels),
+            'running': len(self.runs),
+            'last_seen_age': round(time.monotonic() - self.last_seen, 1) if not self.polling else 0.0,
+            'registered_at': self.registered_at,
+        }
+
+
+class WorkerPool:
+    """The workers registered with this scheduler and the runs assigned to them"""
+
+    def __init__(self, timeout: float = WORKER_TIMEOUT, wait_seconds: float = WORKER_WAIT_SECONDS):
+        self.timeout = timeout
+        self.wait_seconds = wait_seconds
+        self._cond = threading.Condition()
+        self._workers: Dict[str, Worker] = {}
+        self._runs: Dict[int, RemoteProcess] = {}
+
+    def is_active(self) -> bool:
+        """Whether any worker is registered"""
+        return bool(self._workers)
+
+    def register(self, worker_id: str, hostname: str, capacity: int, labels: List[str]):
+        with self._cond:
+            old = self._workers.pop(worker_id, None)
+            if old is not None:
+                self._drop(old, f"worker '{worker_id}' restarted")
+            self._workers[worker_id] = Worker(worker_id, hostname, capacity, labels)
+            self._cond.notify_all()
+        logger.info(f"Worker '{worker_id}' registered from {hostname} (capacity {capacity}"
+                    + (f", labels {', '.join(labels)})" if labels else ")"))
+
+    def assign(self, job: Dict, run_id: int) -> Optional[RemoteProcess]:
+        """
+        Send a run to the least loaded worker that can run job, waiting while
+        all of them are busy. Returns None if no such worker is registered.
+
+        Raises WorkerBusyError if none had a free slot within wait_seconds.
+        """
+        label = job.get('node_label') or None
+        waiting = False
+        deadline = time.monotonic() + self.wait_seconds
+        with self._cond:
+            while True:
+                self._expire()
+                candidates = [worker for worker in self._workers.values() if label is None or label in worker.labels]
+                if not candidates:
+                    return None
+                free = [worker for worker in candidates if len(worker.runs) < worker.capacity]
+                if free:
+                    worker = min(free, key=lambda worker: (worker.load, len(worker.runs)))
+                    process = RemoteProcess(self, worker.worker_id, run_id, job)
+                    worker.runs[run_id] = process
+                    worker.pending.append(process)
+                    self._runs[run_id] = process
+                    self._cond.notify_all()
+                    return process
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WorkerBusyError(f"All workers for job '{job['name']}' stayed busy for {self.wait_seconds:g}s")
+                if not waiting:
+                    logger.info(f"All workers for job '{job['name']}' are busy, waiting for a free slot")
+                    waiting = True
+                self._cond.wait(min(1.0, remaining))
+
+    def poll(self, worker_id: str, running: List[int], wait: float = POLL_SECONDS) -> Optional[dict]:
+        """
+        A worker's poll: wait up to `wait` seconds for runs to start or stop.
+
+        running lists the runs the worker has going. Runs sent to it earlier
+        that it doesn't list (and hasn't reported as finished) never reached
+        it - the poll response was lost, e.g. because the worker's request
+        timed out - so they are sent again. Returns None for an unknown worker.
+        """
+        deadline = time.monotonic() + min(wait, POLL_SECONDS)
+        with self._cond:
+            worker = self._workers.get(worker_id)
+            if worker is None:
+                return None
+            running = set(running)
+            for process in worker.runs.values():
+                if process.delivered and process.run_id not in running:
+                    process.delivered = False
+                    worker.pending.append(process)
+
+            worker.polling += 1
+            try:
+                while not worker.pending and not worker.stops and self._workers.get(worker_id) is worker:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            finally:
+                worker.polling -= 1
+                worker.last_seen = time.monotonic()
+
+            if self._workers.get(worker_id) is not worker:
+                return None
+            for process in worker.pending:
+                process.delivered = True
+            assignments = [process.assignment() for process in worker.pending]
+            stops = worker.stops
+            worker.pending, worker.stops = [], []
+        return {'assignments': assignments, 'stop': stops}
+
+    def output(self, run_id: int, lines: List[str]) -> Optional[bool]:
+        """Output lines from a worker; returns whether the run should stop (None: unknown run)"""
+        with self._cond:
+            process = self._runs.get(run_id)
+            if process is None:
+                return None
+            worker = self._workers.get(process.worker_id)
+            if worker is not None:
+                worker.last_seen = time.monotonic()
+        process.feed(lines)
+        return process.stop_requested
+
+    def finish(self, run_id: int, exit_code: int, resources: Optional[dict]) -> bool:
+        """A worker reports a run's end; returns False for an unknown run"""
+        with self._cond:
+            process = self._runs.get(run_id)
+            if process is None:
+                return False
+            self._remove(process)
+            process.complete(exit_code, resources)
+            self._cond.notify_all()
+        return True
+
+    def stop(self, process: RemoteProcess):
+        with self._cond:
+            process.stop_requested = True
+            worker = self._workers.get(process.worker_id)
+            if worker is None or process.run_id not in worker.runs:
+                return
+            if process in worker.pending:
+                # Not sent to the worker yet - it never starts
+                self._remove(process)
+                process.complete(-15)
+            else:
+                worker.stops.append(process.run_id)
+            self._cond.notify_all()
+
+    def expire(self):
+        """Drop the workers that stopped polling"""
+        with self._cond:
+            self._expire()
+
+    def summary(self) -> List[dict]:
+        with self._cond:
+            return [worker.summary() for worker in self._workers.values()]
+
+    def _remove(self, process: RemoteProcess):
+        """Forget a run (caller holds the lock)"""
+        self._runs.pop(process.run_id, None)
+        worker = self._workers.get(process.worker_id)
+        if worker is not None:
+            worker.runs.pop(process.run_id, None)
+            if process in worker.pending:
+                worker.pending.remove(process)
+
+    def _drop(self, worker: Worker, reason: str):
+        """Fail all of a removed worker's runs (caller holds the lock)"""
+        for process in list(worker.runs.values()):
+            self._runs.pop(process.run_id, None)
+            process.fail(reason)
+        worker.runs.clear()
+        self._cond.notify_all()
+
+    def _expire(self):
+        now = time.monotonic()
+        for worker in list(self._workers.values()):
+            if not worker.polling and now - worker.last_seen > self.timeout:
+                logger.warning(f"Worker '{worker.worker_id}' stopped polling, dropping it")
+                del self._workers[worker.worker_id]
+                self._drop(worker, f"Worker '{worker.worker_id}' stopped responding")
+
+
+# The workers registered with this scheduler process
+pool = WorkerPool()
+
+
+class _WorkerAPIHandler(BaseHTTPRequestHandler):
+    """JSON API the workers talk to (see worker.py)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/workers':
+            self._send(200, {'workers': pool.summary()})
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        try:
+            data = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        except ValueError:
+            self._send(400, {'error': 'Invalid JSON'})
+            return
+        if WORKER_TOKEN and not hmac.compare_digest((self.headers.get('Authorization') or '').encode(),
+                                                    f'Bearer {WORKER_TOKEN}'.encode()):
+            self._send(401, {'error': 'Invalid or missing worker token'})
+            return
+
+        parts = self.path.strip('/').split('/')
+        if parts == ['workers', 'register']:
+            try:
+                worker_id = str(data['worker_id'])
+                capacity = max(1, int(data.get('capacity') or 1))
+                labels = [str(label) for label in data.get('labels') or []]
+            except (KeyError, TypeError, ValueError):
+                self._send(400, {'error': 'worker_id, capacity and labels are required'})
+                return
+            pool.register(worker_id, str(data.get('hostname') or ''), capacity, labels)
+            self._send(200, {'poll_seconds': POLL_SECONDS})
+        elif len(parts) == 3 and parts[0] == 'workers' and parts[2] == 'poll':
+            result = pool.poll(parts[1], data.get('running') or [], float(data.get('wait', POLL_SECONDS)))
+            if result is None:
+                self._send(404, {'error': 'Unknown worker, register first'})
+            else:
+                self._send(200, result)
+        elif len(parts) == 3 and parts[0] == 'runs' and parts[1].isdigit() and parts[2] == 'output':
+            stop = pool.output(int(parts[1]), [str(line) for line in data.get('lines') or []])
+            if stop is None:
+                self._send(404, {'error': 'Unknown run'})
+            else:
+                self._send(200, {'stop': stop})
+        elif len(parts) == 3 and parts[0] == 'runs' and parts[1].isdigit() and parts[2] == 'finish':
+            if pool.finish(int(parts[1]), int(data.get('exit_code', -1)), data.get('resources')):
+                self._send(200, {'success': True})
+            else:
+                self._send(404, {'error': 'Unknown run'})
+        else:
+            self._send(404, {'error': 'Not found'})
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The worker went away while its poll was held open
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        # Every poll and output batch is a request
+        pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('unix', 0)
+
+
+def _reap_loop():
+    """Background thread: drop workers that stopped polling, even while no runs are assigned"""
+    while True:
+        time.sleep(max(1.0, pool.timeout / 3))
+        pool.expire()
+
+
+def start_server(port: int = 0, socket_path: Optional[str] = None, host: str = '0.0.0.0') -> list:
+    """
+    Serve the worker API on host:port and/or a Unix socket from daemon threads; returns the servers.
+
+    Raises ValueError for a TCP port without WORKER_TOKEN: anyone who can
+    reach the port could otherwise register as a worker and receive the jobs.
+    """
+    if port and not WORKER_TOKEN:
+        raise ValueError("WORKER_TOKEN must be set to serve the worker API on a TCP port")
+    servers = []
+    if port:
+        server = ThreadingHTTPServer((host, port), _WorkerAPIHandler)
+        server.daemon_threads = True
+        servers.append(server)
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        servers.append(_UnixHTTPServer(socket_path, _WorkerAPIHandler))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, name='worker-api', daemon=True).start()
+    if servers:
+        threading.Thread(target=_reap_loop, name='worker-reaper', daemon=True).start()
+    return servers